@@ -0,0 +1,58 @@
+import os
+import trackintel as ti
+from pathlib import Path
+
+datasetlist = ["geolife_long", "geolife_long_10_MB"]
+bm_dataset = datasetlist[0]
+
+
+trackintel_root = Path(__file__).parents[1]
+
+
+def _staypoints_with_locations():
+    """Generate staypoints with locations of the benchmark dataset"""
+    os.chdir(trackintel_root)
+    pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", bm_dataset))
+    pfs, sp = pfs.as_positionfixes.generate_staypoints(method="sliding", dist_threshold=25, time_threshold=5)
+    sp, _ = sp.as_staypoints.generate_locations(method="dbscan", epsilon=50, num_samples=1)
+    return sp
+
+
+class BM_Location_Identifier_FREQ:
+    """Benchmarks for location identification with the FREQ method"""
+
+    def setup(self):
+        self.sp = _staypoints_with_locations()
+
+    def common_func(self):
+        """Label locations"""
+        return ti.analysis.location_identifier(self.sp, method="FREQ", pre_filter=False)
+
+    def time_location_identifier_freq_geolife_long(self):
+        self.common_func()
+
+    def mem_location_identifier_freq_geolife_long(self):
+        return self.common_func()
+
+    def peakmem_location_identifier_freq_geolife_long(self):
+        self.common_func()
+
+
+class BM_Location_Identifier_OSNA:
+    """Benchmarks for location identification with the OSNA method"""
+
+    def setup(self):
+        self.sp = _staypoints_with_locations()
+
+    def common_func(self):
+        """Label locations"""
+        return ti.analysis.location_identifier(self.sp, method="OSNA", pre_filter=False)
+
+    def time_location_identifier_osna_geolife_long(self):
+        self.common_func()
+
+    def mem_location_identifier_osna_geolife_long(self):
+        return self.common_func()
+
+    def peakmem_location_identifier_osna_geolife_long(self):
+        self.common_func()
@@ -49,6 +49,30 @@ class BM_Generate_SP:
         self.common_func()
 
 
+class BM_Generate_SP_Python:
+    """Benchmarks for generate staypoints with the python engine"""
+
+    def setup(self):
+        os.chdir(trackintel_root)
+        self.pfs, self._ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", bm_dataset))
+
+    def common_func(self):
+        """Generate sp"""
+        pfs, sp = self.pfs.as_positionfixes.generate_staypoints(
+            method="sliding", dist_threshold=25, time_threshold=5, engine="python"
+        )
+        return sp
+
+    def time_gen_sp_python_geolife_long(self):
+        self.common_func()
+
+    def mem_gen_sp_python_geolife_long(self):
+        return self.common_func()
+
+    def peakmem_gen_sp_python_geolife_long(self):
+        self.common_func()
+
+
 class BM_Generate_TPLS:
     """Benchmarks for generate triplegs"""
 
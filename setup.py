@@ -21,7 +21,7 @@ LICENSE = "MIT"
 
 # What packages are required for this module to be executed?
 REQUIRED = [
-    "pandas",
+    "pandas>=2.0",
     "geopandas>=0.12.0",
     "matplotlib",
     "numpy",
@@ -30,12 +30,14 @@ REQUIRED = [
     "geoalchemy2",
     "osmnx",
     "scikit-learn",
+    "scipy",
     "tqdm",
     "similaritymeasures",
+    "pyarrow",
 ]
 
 install_requires = [
-    "pandas",
+    "pandas>=2.0",
     "matplotlib",
     "numpy",
     "shapely",
@@ -43,9 +45,11 @@ install_requires = [
     "geoalchemy2",
     "osmnx",
     "scikit-learn",
+    "scipy",
     "tqdm",
     "geopandas>=0.12.0",
     "similaritymeasures",
+    "pyarrow",
 ]
 
 # What packages are optional?
@@ -9,8 +9,6 @@ from geopandas.testing import assert_geodataframe_equal
 from pandas.testing import assert_frame_equal, assert_index_equal
 from shapely.geometry import Point
 from trackintel.analysis.location_identification import (
-    _freq_assign,
-    _freq_transform,
     _osna_label_timeframes,
     freq_method,
     location_identifier,
@@ -182,6 +180,22 @@ class TestFreq_method:
         assert freq["purpose"].count() == example_freq["purpose"].count()
         assert_geodataframe_equal(example_freq, freq)
 
+    def test_float_location_id(self, example_freq):
+        """Test if location_id with dtype float (e.g., after filtering noise) are handled."""
+        example_freq["location_id"] = example_freq["location_id"].astype(float)
+        freq = freq_method(example_freq)
+        example_freq["purpose"] = None
+        example_freq.loc[example_freq["location_id"] == 0, "purpose"] = "home"
+        example_freq.loc[example_freq["location_id"] == 1, "purpose"] = "work"
+        assert_geodataframe_equal(example_freq, freq)
+
+    def test_more_labels_than_locations(self, example_freq):
+        """Test if only as many labels as locations per user are assigned."""
+        labels = ("label1", "label2", "label3", "label4", "label5")
+        example_freq = example_freq[example_freq["location_id"] < 2]
+        freq = freq_method(example_freq, *labels)
+        assert freq["purpose"].tolist() == [labels[0]] * 3 + [labels[1]] * 2 + [labels[0]] * 3 + [labels[1]] * 2
+
     def test_empty_sp(self, example_freq):
         """Test if empty sp also get purpose column."""
         example_freq.drop(example_freq.index, inplace=True)
@@ -190,41 +204,6 @@ class TestFreq_method:
         assert_geodataframe_equal(example_freq, freq)
 
 
-class Test_Freq_Transform:
-    """Test help function _freq_transform."""
-
-    def test_function(self):
-        """Test if groupby assign works."""
-        list_dict = [
-            {"location_id": 0, "duration": 1},
-            {"location_id": 0, "duration": 1},
-            {"location_id": 1, "duration": 1},
-        ]
-        df = pd.DataFrame(list_dict)
-        freq = _freq_transform(df, "work")
-        sol = pd.Series(["work", "work", None])
-        assert freq.equals(sol)
-
-
-class Test_Freq_Assign:
-    """Test help function _freq_assign."""
-
-    def test_function(self):
-        """Test function with simple input."""
-        dur = pd.Series([9, 0, 8, 1, 7, 6, 5])
-        labels = ("label1", "label2", "label3")
-        freq_sol = np.array([labels[0], None, labels[1], None, labels[2], None, None])
-        freq = _freq_assign(dur, *labels)
-        assert all(freq == freq_sol)
-
-    def test_more_labels_than_entries(self):
-        dur = pd.Series([9, 0])
-        labels = ("label1", "label2", "label3")
-        freq_sol = np.array([labels[0], labels[1]])
-        freq = _freq_assign(dur, *labels)
-        assert all(freq == freq_sol)
-
-
 class TestLocation_Identifier:
     """Test function `location_identifier`"""
 
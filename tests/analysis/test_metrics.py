@@ -70,6 +70,12 @@ class TestRadius_gyration:
         v2 = np.sqrt(np.mean(d2**2))
         assert_series_equal(s, pd.Series([v1, v2]), check_index=False, check_names=False)
 
+    def test_unordered(self, staypoints):
+        """Test if staypoints of different users can be interleaved"""
+        s1 = radius_gyration(staypoints, method="duration")
+        s2 = radius_gyration(staypoints.sample(frac=1, random_state=0), method="duration")
+        assert_series_equal(s1, s2)
+
     def test_tqdm(self, staypoints):
         """Test if tqdm works fine"""
         radius_gyration(staypoints, print_progress=True)
@@ -184,17 +184,6 @@ class TestTemporal_tracking_quality:
         with pytest.raises(KeyError):
             ti.analysis.tracking_quality.temporal_tracking_quality(locs)
 
-    def test_tracking_quality_user_error(self, testdata_sp_tpls_geolife_long):
-        """Test if the an error is raised when passing unknown 'granularity' to _get_tracking_quality_user()."""
-        sp_tpls = testdata_sp_tpls_geolife_long
-        user_0 = sp_tpls.loc[sp_tpls["user_id"] == 0]
-        start_date = sp_tpls["started_at"].min().floor(freq="D")
-
-        with pytest.raises(ValueError):
-            ti.analysis.tracking_quality._get_tracking_quality_user(user_0, start_date, granularity=12345)
-        with pytest.raises(ValueError):
-            ti.analysis.tracking_quality._get_tracking_quality_user(user_0, start_date, granularity="random")
-
     def test_staypoints_accessors(self, testdata_all_geolife_long):
         """Test tracking_quality calculation from staypoints accessor."""
         sp, _, _ = testdata_all_geolife_long
@@ -264,6 +253,56 @@ class TestTemporal_tracking_quality:
             # get the "quality" of the last record and compare to the correct_quality
             assert quality.values[-1][-1] == correct_quality
 
+    def test_multi_day_record(self):
+        """Test the tracked time of a record spanning several days is distributed to all bins it covers."""
+        t = pd.Timestamp("1971-01-01 12:00:00", tz="utc")  # Friday
+        sp = get_test_sp(t, pd.Timedelta(days=10)).iloc[[-1]]
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="day")
+        assert quality["quality"].tolist() == [0.5] + [1] * 9 + [0.5]
+        assert quality["day"].iloc[-1] == pd.Timestamp("1971-01-11", tz="utc")
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="week")
+        assert quality["quality"].tolist() == pytest.approx([2.5 / 7, 7 / 7, 0.5 / 7])
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="weekday")
+        # Monday and Friday are tracked 1.5 days in two weeks
+        assert quality["quality"].tolist() == [0.75, 1, 1, 1, 0.75, 1, 1]
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="hour")
+        # every hour is tracked on 10 consecutive days
+        assert quality["quality"].tolist() == [1] * 24
+
+    def test_daylight_saving_time(self):
+        """Test if the tracked time in bins with a daylight saving time change is the elapsed time."""
+        t = pd.Timestamp("2021-03-27 12:00:00", tz="Europe/Zurich")  # Saturday, the clock jumps on Sunday 2:00
+        sp = get_test_sp(t, pd.Timestamp("2021-03-29 12:00:00", tz="Europe/Zurich") - t).iloc[[-1]]
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="day")
+        # Sunday only has 23 hours
+        assert quality["quality"].tolist() == pytest.approx([0.5, 23 / 24, 0.5])
+        assert quality["day"].tolist() == [pd.Timestamp(f"2021-03-{d}", tz="Europe/Zurich") for d in [27, 28, 29]]
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="week")
+        assert quality["quality"].tolist() == pytest.approx([35 / 24 / 7, 0.5 / 7])
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="weekday")
+        # Monday, Saturday, Sunday
+        assert quality["weekday"].tolist() == [0, 5, 6]
+        assert quality["quality"].tolist() == pytest.approx([0.5, 0.5, 23 / 24])
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="hour")
+        # the hour from 2:00 to 3:00 does not exist on Sunday
+        assert quality["quality"].tolist() == [1, 1, 0.5] + [1] * 21
+
+        t = pd.Timestamp("2021-10-31 00:00:00", tz="Europe/Zurich")  # the clock is set back on Sunday 3:00
+        sp = get_test_sp(t, pd.Timedelta(hours=6)).iloc[[-1]]
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="day")
+        assert quality["quality"].tolist() == [0.25]
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(sp, granularity="hour")
+        # the hour from 2:00 to 3:00 is passed twice
+        assert quality["quality"].tolist() == [1, 1, 2, 1, 1]
+
 
 class TestSplit_overlaps:
     """Tests for the _split_overlaps() function."""
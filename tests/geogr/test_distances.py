@@ -4,8 +4,12 @@ from math import radians
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+from numpy.testing import assert_array_equal
+from scipy import sparse
+from scipy.spatial.distance import cdist
 import pytest
 from geopandas.testing import assert_geodataframe_equal
+from pandas.testing import assert_series_equal
 import shapely
 from shapely import wkt
 from shapely.geometry import LineString, MultiLineString, Point
@@ -245,6 +249,71 @@ class TestCalculate_distance_matrix:
         assert np.all(euc00 == res00)
         assert np.all(euc01 == res01)
 
+    def test_block_size(self, geolife_sp):
+        """Test if the result does not depend on the block size."""
+        x = geolife_sp.iloc[0:10]
+        y = geolife_sp.iloc[5:15]
+        d_full = calculate_distance_matrix(X=x, Y=y, dist_metric="haversine")
+        d_block = calculate_distance_matrix(X=x, Y=y, dist_metric="haversine", block_size=3, n_jobs=2)
+        assert_array_equal(d_full, d_block)
+        # sklearn euclidean distances are only exact up to numerical precision
+        d_full = calculate_distance_matrix(X=x, Y=y, dist_metric="euclidean")
+        d_block = calculate_distance_matrix(X=x, Y=y, dist_metric="euclidean", block_size=3)
+        assert np.allclose(d_full, d_block, atol=1e-5)
+
+    def test_dtype(self, geolife_sp):
+        """Test if the distance matrix can be returned as float32."""
+        d64 = calculate_distance_matrix(X=geolife_sp, dist_metric="haversine")
+        d32 = calculate_distance_matrix(X=geolife_sp, dist_metric="haversine", dtype="float32")
+        assert d32.dtype == np.float32
+        assert np.allclose(d64, d32, rtol=1e-6)
+
+    def test_out_memmap(self, geolife_sp, tmp_path):
+        """Test if the distances can be written into a memmap."""
+        x = geolife_sp.iloc[0:10]
+        d = calculate_distance_matrix(X=x, dist_metric="haversine")
+        out = np.memmap(tmp_path / "d.dat", dtype="float32", mode="w+", shape=(len(x), len(x)))
+        d_out = calculate_distance_matrix(X=x, dist_metric="haversine", block_size=4, out=out)
+        assert d_out is out
+        assert np.allclose(d, np.memmap(tmp_path / "d.dat", dtype="float32", shape=(len(x), len(x))), rtol=1e-6)
+
+    def test_out_shape_error(self, geolife_sp):
+        """Test if an error is raised if out has the wrong shape."""
+        with pytest.raises(ValueError, match="out must have the shape"):
+            calculate_distance_matrix(X=geolife_sp, out=np.zeros((1, 1)))
+
+    def test_max_distance(self, geolife_sp):
+        """Test if the sparse matrix contains exactly the pairs within max_distance."""
+        geolife_sp = geolife_sp.set_crs(4326)
+        for dist_metric, sp in [("haversine", geolife_sp), ("euclidean", geolife_sp.to_crs(2056))]:
+            if dist_metric == "haversine":
+                d = calculate_distance_matrix(X=sp.iloc[0:20], Y=sp, dist_metric=dist_metric)
+            else:
+                # sklearn euclidean distances are not precise enough for large coordinates
+                coords = shapely.get_coordinates(sp.geometry)
+                d = cdist(coords[0:20], coords)
+            d_sparse = calculate_distance_matrix(X=sp.iloc[0:20], Y=sp, dist_metric=dist_metric, max_distance=500)
+            assert isinstance(d_sparse, sparse.csr_matrix)
+            assert d_sparse.shape == d.shape
+            row, col = np.nonzero(d <= 500)
+            d_sparse = d_sparse.tocoo()
+            # distance 0 (e.g. the diagonal) is stored explicitly
+            assert set(zip(row, col)) == set(zip(d_sparse.row, d_sparse.col))
+            assert np.allclose(d[d_sparse.row, d_sparse.col], d_sparse.data)
+
+    def test_max_distance_dtype(self, geolife_sp):
+        """Test if the sparse matrix has the requested dtype."""
+        d_sparse = calculate_distance_matrix(X=geolife_sp, max_distance=500, dtype="float32")
+        assert d_sparse.dtype == np.float32
+
+    def test_max_distance_error(self, geolife_sp):
+        """Test if an error is raised for unsupported metrics and out."""
+        error_msg = "max_distance is only supported for Points with the metrics"
+        with pytest.raises(ValueError, match=error_msg):
+            calculate_distance_matrix(X=geolife_sp, dist_metric="cityblock", max_distance=500)
+        with pytest.raises(ValueError, match="out cannot be used together with max_distance."):
+            calculate_distance_matrix(X=geolife_sp, out=np.zeros((len(geolife_sp), len(geolife_sp))), max_distance=5)
+
     def test_trajectory_distance_dtw(self, geolife_tpls):
         """Calculate Linestring length using dtw, single and multi core."""
         tpls = geolife_tpls
@@ -268,6 +337,41 @@ class TestCalculate_distance_matrix:
 
         assert np.isclose(np.sum(np.abs(D_single - D_multi)), 0)
 
+    @pytest.mark.parametrize("dist_metric", ["dtw", "frechet"])
+    def test_trajectory_max_distance(self, geolife_tpls, dist_metric):
+        """Test if the pruned sparse matrix contains exactly the pairs of the dense matrix within max_distance."""
+        tpls = geolife_tpls.iloc[:10]
+        D = calculate_distance_matrix(X=tpls, dist_metric=dist_metric)
+        max_distance = np.median(D)
+        D_sparse = calculate_distance_matrix(X=tpls, dist_metric=dist_metric, max_distance=max_distance, n_jobs=2)
+        assert sparse.issparse(D_sparse)
+        assert_array_equal(D_sparse.toarray(), np.where(D <= max_distance, D, 0))
+        assert D_sparse.nnz == (D <= max_distance).sum()  # including the explicit zeros on the diagonal
+        # not symmetric
+        D = calculate_distance_matrix(X=tpls.iloc[:4], Y=tpls.iloc[4:], dist_metric=dist_metric)
+        D_sparse = calculate_distance_matrix(
+            X=tpls.iloc[:4], Y=tpls.iloc[4:], dist_metric=dist_metric, max_distance=max_distance
+        )
+        assert_array_equal(D_sparse.toarray(), np.where(D <= max_distance, D, 0))
+
+    def test_trajectory_block_size(self, geolife_tpls):
+        """Test that the result does not depend on the blocks."""
+        tpls = geolife_tpls.iloc[:6]
+        D = calculate_distance_matrix(X=tpls, dist_metric="dtw")
+        D_block = calculate_distance_matrix(X=tpls, dist_metric="dtw", block_size=4, n_jobs=2)
+        assert_array_equal(D, D_block)
+        assert_array_equal(D, D.T)
+
+        out = np.full((6, 6), np.nan, dtype="float32")
+        D_out = calculate_distance_matrix(X=tpls, dist_metric="dtw", block_size=4, out=out)
+        assert D_out is out
+        assert_array_equal(D_out, D.astype("float32"))
+
+        D = calculate_distance_matrix(X=tpls.iloc[:4], Y=tpls, dist_metric="dtw")
+        D_block = calculate_distance_matrix(X=tpls.iloc[:4], Y=tpls, dist_metric="dtw", block_size=3)
+        assert_array_equal(D, D_block)
+        assert_array_equal(D[:, :4], D[:, :4].T)
+
     def test_trajectory_distance_via_accessor_x(self, geolife_tpls):
         """Calculate Linestring length using dtw via accessor."""
         tpls = geolife_tpls
@@ -495,7 +599,20 @@ class TestPfsMeanSpeedTriplegs:
         test_tpl_speed = np.mean(pfs_speed["speed"].values[1:])
         # compare to the one computed in the function
         computed_tpls_speed = tpls_speed.loc[test_tpl]["speed"]
-        assert test_tpl_speed == computed_tpls_speed
+        # the mean is reduced for all triplegs at once -> summation order can differ in the last digit
+        assert test_tpl_speed == pytest.approx(computed_tpls_speed, rel=1e-12)
+
+    def test_unordered_positionfixes(self, example_triplegs):
+        """Test if positionfixes of different triplegs can be interleaved and single positionfixes are handled"""
+        pfs, tpls = example_triplegs
+        tpls_speed = ti.geogr.distances.get_speed_triplegs(tpls, pfs, method="pfs_mean_speed")
+        pfs = pfs.sample(frac=1, random_state=0)
+        # tripleg with a single positionfix has no speed
+        first_tripleg = pfs.index[pfs["tripleg_id"] == tpls.index[0]]
+        pfs.loc[first_tripleg[1:], "tripleg_id"] = np.nan
+        tpls_speed_shuffled = ti.geogr.distances.get_speed_triplegs(tpls, pfs, method="pfs_mean_speed")
+        assert np.isnan(tpls_speed_shuffled["speed"].iloc[0])
+        assert_series_equal(tpls_speed["speed"].iloc[1:], tpls_speed_shuffled["speed"].iloc[1:], rtol=1e-12)
 
     def test_accessor(self, example_triplegs):
         """Test whether the accessor yields the same output as the function"""
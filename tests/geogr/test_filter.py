@@ -1,7 +1,10 @@
 import os
 import pytest
 import geopandas as gpd
+import pandas as pd
 from geopandas.testing import assert_geodataframe_equal
+from pandas.testing import assert_index_equal
+from shapely.geometry import LineString, Point, box
 
 import trackintel as ti
 
@@ -117,3 +120,34 @@ class TestSpatial_filter:
         extent = gpd.read_file(os.path.join("tests", "data", "area", "tsinghua.geojson"))
         with pytest.raises(ValueError):
             locs.spatial_filter(areas=extent, method=12345)
+
+    def test_area_id(self, locs_from_geolife):
+        """Test if the matched area is returned once per matching area."""
+        locs = locs_from_geolife.to_crs("epsg:4326")
+        extent = gpd.read_file(os.path.join("tests", "data", "area", "tsinghua.geojson"))
+        west, south, east, north = extent.total_bounds
+        areas = gpd.GeoDataFrame(
+            {"area": ["all", "west"]},
+            geometry=[box(west, south, east, north), box(west, south, (west + east) / 2, north)],
+            crs=extent.crs,
+        )
+
+        within_loc = locs.spatial_filter(areas=areas, method="within")
+        within_loc_id = locs.spatial_filter(areas=areas, method="within", area_id="area")
+
+        assert "area" not in within_loc.columns
+        assert within_loc.index.is_unique
+        assert set(within_loc_id.index) == set(within_loc.index)
+        assert (within_loc_id["area"] == "all").sum() == len(within_loc)
+        # every location in the western half is returned a second time
+        west_loc = locs.spatial_filter(areas=areas.iloc[[1]], method="within")
+        assert_index_equal(within_loc_id.index[within_loc_id["area"] == "west"], west_loc.index)
+
+    def test_no_union(self):
+        """Test if features are compared with the single areas and not their union."""
+        sp = gpd.GeoDataFrame(geometry=[Point(0.5, 0.5), LineString([(0.5, 0.5), (1.5, 0.5)])])
+        areas = gpd.GeoDataFrame(geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)])
+        within = ti.geogr.spatial_filter(sp, areas, method="within")
+        intersects = ti.geogr.spatial_filter(sp, areas, method="intersects")
+        assert_index_equal(within.index, pd.Index([0]))
+        assert_index_equal(intersects.index, pd.Index([0, 1]))
@@ -85,6 +85,72 @@ class TestPositionfixes:
         pfs = ti.read_positionfixes_csv(file, sep=";", index_col=ind_name)
         assert isinstance(pfs, ti.Positionfixes)
 
+    @pytest.mark.parametrize("engine", ["c", "pyarrow"])
+    def test_chunksize(self, engine):
+        """Test if reading in chunks yields the same positionfixes as reading at once."""
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id")
+        chunks = list(ti.read_positionfixes_csv(file, sep=";", index_col="id", chunksize=4, engine=engine))
+        assert [len(c) for c in chunks] == [4, 2]
+        assert all(isinstance(c, ti.Positionfixes) for c in chunks)
+        assert_geodataframe_equal(pd.concat(chunks), pfs)
+
+        # the default index is continued over the chunks
+        chunks = ti.read_positionfixes_csv(file, sep=";", index_col=None, chunksize=4, engine=engine)
+        pfs = ti.read_positionfixes_csv(file, sep=";", index_col=None)
+        assert_geodataframe_equal(pd.concat(chunks), pfs)
+
+    def test_chunksize_pyarrow_error(self):
+        """Test if an error is raised for arguments that are not supported by the streaming pyarrow reader."""
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        # the error is raised when calling the function and not when reading the first chunk
+        with pytest.raises(ValueError, match=r"The arguments \['nrows'\] are not supported"):
+            ti.read_positionfixes_csv(file, sep=";", index_col="id", chunksize=4, engine="pyarrow", nrows=2)
+        with pytest.raises(ValueError, match="dtype must be a dict"):
+            ti.read_positionfixes_csv(file, sep=";", index_col="id", chunksize=4, engine="pyarrow", dtype=str)
+
+    def test_chunksize_pyarrow_column_types(self, tmp_path):
+        """Test if columns are read correctly if their values in the first block of the file are empty."""
+        n = 100000  # larger than one block of pyarrow
+        df = pd.DataFrame(
+            {
+                "id": range(n),
+                "user_id": 0,
+                "tracked_at": pd.date_range("2021-01-01", periods=n, freq="s", tz="utc"),
+                "longitude": 8.5,
+                "latitude": 47.4,
+                "accuracy": [None] * (n - 5) + [3.5] * 5,
+                "label": [None] * (n - 5) + ["walk"] * 5,
+            }
+        )
+        file = tmp_path / "positionfixes.csv"
+        df.to_csv(file, index=False)
+        pfs = ti.read_positionfixes_csv(file, index_col="id")
+        # columns with other than numeric values need their dtype
+        kwargs = {"index_col": "id", "chunksize": 30000, "engine": "pyarrow", "dtype": {"label": "string"}}
+        chunks = list(ti.read_positionfixes_csv(file, **kwargs))
+        assert [len(c) for c in chunks] == [30000, 30000, 30000, 10000]
+        pfs_chunks = pd.concat(chunks)
+        assert pfs_chunks["accuracy"].iloc[-5:].tolist() == [3.5] * 5
+        assert pfs_chunks["label"].dtype == "string"
+        assert_geodataframe_equal(pfs_chunks, pfs.astype({"label": "string"}))
+
+    def test_pyarrow_engine(self):
+        """Test if the pyarrow engine leads to the same positionfixes."""
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id")
+        pfs_pyarrow = ti.read_positionfixes_csv(file, sep=";", index_col="id", engine="pyarrow")
+        assert_geodataframe_equal(pfs_pyarrow, pfs)
+
+    def test_datetime_format(self):
+        """Test if tracked_at is parsed with the given format."""
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id")
+        pfs_format = ti.read_positionfixes_csv(file, sep=";", index_col="id", datetime_format="%Y-%m-%dT%H:%M:%S%z")
+        assert_geodataframe_equal(pfs_format, pfs)
+        with pytest.raises(ValueError):
+            ti.read_positionfixes_csv(file, sep=";", index_col="id", datetime_format="%d.%m.%Y %H:%M")
+
 
 class TestTriplegs:
     """Test for 'read_triplegs_csv' and 'write_triplegs_csv' functions."""
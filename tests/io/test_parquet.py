@@ -0,0 +1,192 @@
+import os
+
+import pandas as pd
+import pyarrow.compute as pc
+import pytest
+from geopandas.testing import assert_geodataframe_equal
+from pandas.testing import assert_frame_equal
+
+import trackintel as ti
+
+
+@pytest.fixture
+def example_positionfixes():
+    """Positionfixes of two users."""
+    file = os.path.join("tests", "data", "positionfixes.csv")
+    pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id", crs="EPSG:4326")
+    pfs.loc[pfs.index[-3:], "user_id"] = 2
+    pfs["tracked_at"] = pfs["tracked_at"].dt.tz_convert("Europe/Zurich")
+    pfs["tripleg_id"] = pd.array([0, 0, None, 1, 1, None], dtype="Int64")
+    return pfs
+
+
+@pytest.fixture
+def example_staypoints():
+    """Staypoints of the geolife dataset."""
+    file = os.path.join("tests", "data", "geolife", "geolife_staypoints.csv")
+    return ti.read_staypoints_csv(file, tz="utc", index_col="id", crs="epsg:4326")
+
+
+@pytest.fixture
+def example_tours():
+    """Tours with a list column."""
+    t1 = pd.Timestamp("1971-01-01 00:00:00", tz="utc")
+    t2 = pd.Timestamp("1971-01-01 05:00:00", tz="utc")
+    t3 = pd.Timestamp("1971-01-02 07:00:00", tz="utc")
+    h = pd.Timedelta(hours=1)
+
+    list_dict = [
+        {"user_id": 0, "started_at": t1, "finished_at": t1 + h, "trips": [0, 1, 2]},
+        {"user_id": 0, "started_at": t2, "finished_at": t2 + h, "trips": [2, 3, 4]},
+        {"user_id": 1, "started_at": t3, "finished_at": t3 + h, "trips": [4, 5, 6]},
+    ]
+    tours = pd.DataFrame(data=list_dict)
+    tours.index.name = "id"
+    return ti.Tours(tours)
+
+
+class TestPositionfixes:
+    """Test for 'read_positionfixes_parquet' and 'write_positionfixes_parquet' functions."""
+
+    def test_to_from_parquet(self, example_positionfixes, tmp_path):
+        """Test if timezone, nullable integers, crs and index survive the round trip."""
+        pfs = example_positionfixes
+        file = tmp_path / "pfs.parquet"
+        pfs.to_parquet(file)
+        pfs_read = ti.read_positionfixes_parquet(file)
+        assert isinstance(pfs_read, ti.Positionfixes)
+        assert_geodataframe_equal(pfs, pfs_read)
+
+        ti.io.write_positionfixes_parquet(pfs, file)
+        assert_geodataframe_equal(pfs, ti.io.read_positionfixes_parquet(file))
+
+    def test_columns(self, example_positionfixes, tmp_path):
+        """Test if required columns and geometry are always read."""
+        pfs = example_positionfixes
+        file = tmp_path / "pfs.parquet"
+        pfs.to_parquet(file)
+        pfs_read = ti.read_positionfixes_parquet(file, columns=["elevation"])
+        assert set(pfs_read.columns) == {"elevation", "user_id", "tracked_at", "geom"}
+        assert_geodataframe_equal(pfs_read, pfs[pfs_read.columns])
+
+    def test_filters(self, example_positionfixes, tmp_path):
+        """Test the user_id, start, end and filters arguments."""
+        pfs = example_positionfixes
+        file = tmp_path / "pfs.parquet"
+        pfs.to_parquet(file)
+
+        assert_geodataframe_equal(ti.read_positionfixes_parquet(file, user_id=2), pfs[pfs["user_id"] == 2])
+        assert_geodataframe_equal(ti.read_positionfixes_parquet(file, user_id=[1, 2]), pfs)
+
+        start = pd.Timestamp("2015-11-27 12:39:28", tz="utc")
+        end = pd.Timestamp("2015-11-27 18:00:00", tz="Europe/Zurich")
+        pfs_read = ti.read_positionfixes_parquet(file, start=start, end=end)
+        assert_geodataframe_equal(pfs_read, pfs[(pfs["tracked_at"] >= start) & (pfs["tracked_at"] < end)])
+        # without timezone UTC is assumed
+        pfs_read = ti.read_positionfixes_parquet(file, start="2015-11-27 12:39:28")
+        assert_geodataframe_equal(pfs_read, pfs[pfs["tracked_at"] >= start])
+
+        pfs_read = ti.read_positionfixes_parquet(file, user_id=1, filters=[("elevation", ">", 500)])
+        assert_geodataframe_equal(pfs_read, pfs[(pfs["user_id"] == 1) & (pfs["elevation"] > 500)])
+        pfs_read = ti.read_positionfixes_parquet(file, filters=pc.field("tripleg_id") == 1)
+        assert_geodataframe_equal(pfs_read, pfs[pfs["tripleg_id"] == 1])
+
+    def test_directory(self, example_positionfixes, tmp_path):
+        """Test reading a directory with several files."""
+        pfs = example_positionfixes
+        pfs.iloc[:2].to_parquet(tmp_path / "0.parquet")
+        pfs.iloc[2:].to_parquet(tmp_path / "1.parquet")
+        assert_geodataframe_equal(ti.read_positionfixes_parquet(tmp_path), pfs)
+
+
+class TestTriplegs:
+    """Test for 'read_triplegs_parquet' and 'write_triplegs_parquet' functions."""
+
+    def test_to_from_parquet(self, tmp_path):
+        """Test basic reading and writing functions."""
+        tpls = ti.read_triplegs_csv(os.path.join("tests", "data", "triplegs.csv"), sep=";", index_col="id")
+        file = tmp_path / "tpls.parquet"
+        tpls.to_parquet(file)
+        tpls_read = ti.read_triplegs_parquet(file)
+        assert isinstance(tpls_read, ti.Triplegs)
+        assert_geodataframe_equal(tpls, tpls_read)
+
+
+class TestStaypoints:
+    """Test for 'read_staypoints_parquet' and 'write_staypoints_parquet' functions."""
+
+    def test_to_from_parquet(self, example_staypoints, tmp_path):
+        """Test basic reading and writing functions."""
+        sp = example_staypoints
+        file = tmp_path / "sp.parquet"
+        sp.to_parquet(file)
+        sp_read = ti.read_staypoints_parquet(file)
+        assert isinstance(sp_read, ti.Staypoints)
+        assert_geodataframe_equal(sp, sp_read)
+
+    def test_time_span(self, example_staypoints, tmp_path):
+        """Test if all staypoints that overlap with [start, end) are read."""
+        sp = example_staypoints
+        file = tmp_path / "sp.parquet"
+        sp.to_parquet(file)
+        start, end = sp["finished_at"].iloc[2], sp["started_at"].iloc[5]
+        sp_read = ti.read_staypoints_parquet(file, start=start, end=end)
+        assert_geodataframe_equal(sp_read, sp[(sp["finished_at"] >= start) & (sp["started_at"] < end)])
+        assert sp.index[2] in sp_read.index
+        assert sp.index[5] not in sp_read.index
+
+
+class TestLocations:
+    """Test for 'read_locations_parquet' and 'write_locations_parquet' functions."""
+
+    def test_to_from_parquet(self, tmp_path):
+        """Test if both geometry columns are read."""
+        locs = ti.read_locations_csv(os.path.join("tests", "data", "locations.csv"), sep=";", index_col="id")
+        file = tmp_path / "locs.parquet"
+        locs.to_parquet(file)
+        locs_read = ti.read_locations_parquet(file)
+        assert isinstance(locs_read, ti.Locations)
+        assert_geodataframe_equal(locs, locs_read)
+        assert_geodataframe_equal(ti.read_locations_parquet(file, columns=[]), locs[["user_id", "center"]])
+
+
+class TestTrips:
+    """Test for 'read_trips_parquet' and 'write_trips_parquet' functions."""
+
+    def test_to_from_parquet(self, tmp_path):
+        """Test trips with and without geometry."""
+        trips = ti.read_trips_csv(os.path.join("tests", "data", "trips.csv"), sep=";", index_col="id")
+        file = tmp_path / "trips.parquet"
+        trips.to_parquet(file)
+        trips_read = ti.read_trips_parquet(file)
+        assert isinstance(trips_read, ti.TripsDataFrame)
+        assert_frame_equal(trips, trips_read)
+
+        file = os.path.join("tests", "data", "geolife_long", "trips.csv")
+        trips = ti.read_trips_csv(file, index_col="id", geom_col="geom", crs="EPSG:4326")
+        trips.to_parquet(tmp_path / "trips_geom.parquet")
+        trips_read = ti.read_trips_parquet(tmp_path / "trips_geom.parquet")
+        assert isinstance(trips_read, ti.TripsGeoDataFrame)
+        assert_geodataframe_equal(trips, trips_read)
+
+
+class TestTours:
+    """Test for 'read_tours_parquet' and 'write_tours_parquet' functions."""
+
+    def test_to_from_parquet(self, example_tours, tmp_path):
+        """Test if the list column is read as list."""
+        file = tmp_path / "tours.parquet"
+        example_tours.to_parquet(file)
+        tours_read = ti.read_tours_parquet(file)
+        assert isinstance(tours_read, ti.Tours)
+        assert_frame_equal(example_tours, tours_read)
+        assert tours_read["trips"].iloc[0] == [0, 1, 2]
+
+    def test_filters(self, example_tours, tmp_path):
+        """Test the user_id and start filter."""
+        file = tmp_path / "tours.parquet"
+        example_tours.to_parquet(file)
+        tours_read = ti.read_tours_parquet(file, user_id=0, start="1971-01-01 00:30:00")
+        assert_frame_equal(example_tours.iloc[:2], tours_read)
+        tours_read = ti.read_tours_parquet(file, start="1971-01-01 01:30:00")
+        assert_frame_equal(example_tours.iloc[1:], tours_read)
@@ -0,0 +1,141 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from geopandas.testing import assert_geodataframe_equal
+from pandas.testing import assert_frame_equal
+
+import trackintel as ti
+from trackintel.io import PartitionedDataset
+
+
+@pytest.fixture
+def geolife_pfs():
+    """Positionfixes of the two users of geolife_long split into four users."""
+    pfs, _ = ti.io.read_geolife(os.path.join("tests", "data", "geolife_long"))
+    pfs["user_id"] = pfs["user_id"] * 2 + (pfs["tracked_at"].dt.day % 2)
+    return pfs
+
+
+class TestPartitionedDataset:
+    """Tests for the PartitionedDataset class."""
+
+    def test_write_read(self, geolife_pfs, tmp_path):
+        """Test if a table written in chunks is read completely and every user is in a single partition."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path, n_partitions=3)
+        ds.write("positionfixes", pfs.iloc[:2000])
+        ds.write("positionfixes", pfs.iloc[2000:])
+
+        assert_geodataframe_equal(ds.read("positionfixes").sort_index(), pfs)
+        users = set()
+        for pfs_part in ds.iter_partitions("positionfixes"):
+            assert isinstance(pfs_part, ti.Positionfixes)
+            assert users.isdisjoint(pfs_part["user_id"])
+            users.update(pfs_part["user_id"])
+            assert_geodataframe_equal(pfs_part.sort_index(), pfs[pfs["user_id"].isin(pfs_part["user_id"])])
+        assert users == set(pfs["user_id"])
+
+    def test_read_kwargs(self, geolife_pfs, tmp_path):
+        """Test if keyword arguments are passed to the parquet reader."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path, n_partitions=2)
+        ds.write("positionfixes", pfs)
+        pfs_read = ds.read("positionfixes", user_id=1, columns=[])
+        assert_geodataframe_equal(pfs_read.sort_index(), pfs.loc[pfs["user_id"] == 1, pfs_read.columns])
+
+    def test_range(self, geolife_pfs, tmp_path):
+        """Test range partitioning with given and derived bounds."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path / "given", partitioning="range", bounds=[2, 0])
+        assert ds.n_partitions == 2
+        ds.write("positionfixes", pfs)
+        assert_partition_users(ds, [[0, 1], [2, 3]])
+
+        ds = PartitionedDataset(tmp_path / "derived", n_partitions=4, partitioning="range")
+        ds.write("positionfixes", pfs)
+        assert_partition_users(ds, [[0], [1], [2], [3]])
+
+    def test_range_string_ids(self, geolife_pfs, tmp_path):
+        """Test range partitioning with derived bounds of string user_ids."""
+        pfs = geolife_pfs
+        pfs["user_id"] = "user_" + pfs["user_id"].astype(str)
+        ds = PartitionedDataset(tmp_path, n_partitions=2, partitioning="range")
+        ds.write("positionfixes", pfs)
+        assert_partition_users(ds, [["user_0", "user_1"], ["user_2", "user_3"]])
+
+        # reopened with the stored partitioning and bounds
+        ds = PartitionedDataset(tmp_path)
+        assert ds.partitioning == "range"
+        ds.write("positionfixes", pfs.iloc[:10].set_axis(pfs.index[:10] + len(pfs)))
+        assert len(ds.read("positionfixes")) == len(pfs) + 10
+
+    def test_reopen(self, geolife_pfs, tmp_path):
+        """Test if an existing dataset is opened with its partitioning."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path, n_partitions=3)
+        ds.write("positionfixes", pfs)
+
+        ds = PartitionedDataset(tmp_path)
+        assert ds.n_partitions == 3
+        assert ds.tables == {"positionfixes": "positionfixes"}
+        ds.write("positionfixes", pfs.iloc[:10].set_axis(pfs.index[:10] + len(pfs)))
+        assert len(ds.read("positionfixes")) == len(pfs) + 10
+
+        with pytest.raises(ValueError, match="has 3 partitions, not 4"):
+            PartitionedDataset(tmp_path, n_partitions=4)
+        with pytest.raises(ValueError, match="uses hash partitioning, not range"):
+            PartitionedDataset(tmp_path, partitioning="range")
+
+    def test_process_partitions(self, geolife_pfs, tmp_path):
+        """Test if processing per partition leads to the same staypoints as processing all at once."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path, n_partitions=3)
+        ds.write("positionfixes", pfs)
+        for pfs_part in ds.iter_partitions("positionfixes"):
+            pfs_part, sp = pfs_part.generate_staypoints()
+            ds.write("staypoints", sp)
+        # tables without rows in a partition are None
+        for pfs_part, sp in ds.iter_partitions("positionfixes", "staypoints"):
+            assert sp is None or set(sp["user_id"]) <= set(pfs_part["user_id"])
+
+        _, sp = pfs.generate_staypoints()
+        sp_read = ds.read("staypoints")
+        columns = ["user_id", "started_at", "finished_at"]
+        assert_frame_equal(
+            sp_read[columns].sort_values(columns).reset_index(drop=True),
+            sp[columns].sort_values(columns).reset_index(drop=True),
+        )
+
+    def test_missing_partition(self, geolife_pfs, tmp_path):
+        """Test if None is returned for partitions without rows."""
+        pfs = geolife_pfs
+        ds = PartitionedDataset(tmp_path, partitioning="range", bounds=[0, 100])
+        ds.write("positionfixes", pfs)
+        assert ds.read("positionfixes", partition=1) is None
+        assert len(list(ds.iter_partitions("positionfixes"))) == 1
+
+    def test_errors(self, geolife_pfs, tmp_path):
+        """Test the errors for unknown partitionings, tables and models."""
+        pfs = geolife_pfs
+        with pytest.raises(ValueError, match="partitioning unknown"):
+            PartitionedDataset(tmp_path, partitioning="list")
+        with pytest.raises(ValueError, match="bounds requires 'range' partitioning"):
+            PartitionedDataset(tmp_path, bounds=[0, 1])
+        ds = PartitionedDataset(tmp_path)
+        ds.write("positionfixes", pfs)
+        with pytest.raises(KeyError, match="Table 'staypoints' not found"):
+            ds.read("staypoints")
+        with pytest.raises(TypeError, match="Only trackintel models"):
+            ds.write("positionfixes", gpd.GeoDataFrame(pfs))
+        _, sp = pfs.generate_staypoints()
+        with pytest.raises(ValueError, match="Table 'positionfixes' contains positionfixes and not staypoints"):
+            ds.write("positionfixes", sp)
+
+
+def assert_partition_users(ds, users):
+    """Assert the users of every partition of the positionfixes."""
+    for partition, expected in enumerate(users):
+        pfs = ds.read("positionfixes", partition=partition)
+        assert np.array_equal(np.unique(pfs["user_id"]), expected)
@@ -2,6 +2,7 @@ import os
 import pytest
 
 import geopandas as gpd
+import numpy as np
 from shapely.geometry import LineString
 
 import trackintel as ti
@@ -48,3 +49,11 @@ class TestStaypoints:
         """Check if sp has center method and returns (lat, lon) pairs as geometry."""
         sp = testdata_sp.copy()
         assert len(sp.as_staypoints.center) == 2
+
+    def test_distance_matrix(self, testdata_sp):
+        """Check the calculate_distance_matrix function called through accessor runs as expected."""
+        sp = testdata_sp.set_crs(4326)
+
+        accessor_result = sp.as_staypoints.calculate_distance_matrix(dist_metric="haversine", max_distance=1000)
+        function_result = ti.geogr.calculate_distance_matrix(sp, dist_metric="haversine", max_distance=1000)
+        assert np.allclose(accessor_result.toarray(), function_result.toarray())
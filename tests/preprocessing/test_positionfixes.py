@@ -8,9 +8,10 @@ import pandas as pd
 import pytest
 from geopandas.testing import assert_geodataframe_equal
 from pandas import Timestamp
-from shapely.geometry import Point
+from shapely.geometry import LineString, Point
 
 import trackintel as ti
+from trackintel.preprocessing.positionfixes import _create_linestrings, _sliding_staypoints_kernel
 
 
 @pytest.fixture
@@ -81,6 +82,45 @@ def example_positionfixes_isolated():
     return pfs
 
 
+class TestDrop_duplicate_fixes:
+    """Tests for drop_duplicate_fixes() method."""
+
+    def test_default_keys(self, example_positionfixes):
+        """Positionfixes with same user, time and location are duplicates, other columns are ignored."""
+        pfs = example_positionfixes
+        pfs["accuracy"] = [1.0, 2.0, 3.0]
+        pfs.loc[1, ["tracked_at", "geometry"]] = pfs.loc[0, ["tracked_at", "geometry"]]
+
+        pfs_out, nb_dropped = pfs.drop_duplicate_fixes()
+        assert nb_dropped == 1
+        assert_geodataframe_equal(pfs_out, pfs.iloc[[0, 2]])
+
+        pfs_out, nb_dropped = pfs.drop_duplicate_fixes(keep="last")
+        assert_geodataframe_equal(pfs_out, pfs.iloc[[1, 2]])
+
+    def test_no_duplicates(self, example_positionfixes):
+        """Location or time alone do not make a duplicate."""
+        pfs = example_positionfixes
+        pfs.loc[1, "geometry"] = pfs.loc[0, "geometry"]
+        pfs_out, nb_dropped = pfs.drop_duplicate_fixes()
+        assert nb_dropped == 0
+        assert_geodataframe_equal(pfs_out, pfs)
+
+    def test_subset(self, example_positionfixes):
+        """Key columns can be chosen."""
+        pfs = example_positionfixes
+        pfs.loc[2, "tracked_at"] = pfs.loc[1, "tracked_at"]
+        _, nb_dropped = ti.preprocessing.drop_duplicate_fixes(pfs, subset=["tracked_at"])
+        assert nb_dropped == 1
+        _, nb_dropped = ti.preprocessing.drop_duplicate_fixes(pfs, subset=["user_id", "tracked_at"])
+        assert nb_dropped == 0
+
+    def test_missing_subset_column(self, example_positionfixes):
+        """Unknown key columns raise a KeyError."""
+        with pytest.raises(KeyError, match="not in positionfixes"):
+            example_positionfixes.drop_duplicate_fixes(subset=["accuracy"])
+
+
 class TestGenerate_staypoints:
     """Tests for generate_staypoints() method."""
 
@@ -295,6 +335,120 @@ class TestGenerate_staypoints:
         _, sp = pfs.generate_staypoints()
         assert isinstance(sp, ti.Staypoints)
 
+    def test_engine(self):
+        """The numpy engine should yield the same result as the python engine."""
+        pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+        for kwargs in [{}, {"include_last": True}, {"dist_threshold": 0, "time_threshold": 0, "include_last": True}]:
+            pfs_python, sp_python = pfs.generate_staypoints(engine="python", **kwargs)
+            pfs_numpy, sp_numpy = pfs.generate_staypoints(engine="numpy", **kwargs)
+            assert_geodataframe_equal(pfs_python, pfs_numpy)
+            assert_geodataframe_equal(sp_python, sp_numpy)
+
+    def test_unknown_engine(self, example_positionfixes):
+        """Test if the engine is unknown, an ValueError will be raised."""
+        with pytest.raises(ValueError, match="engine unknown"):
+            example_positionfixes.generate_staypoints(engine="unknown")
+
+
+class TestSliding_staypoints_kernel:
+    """Test for _sliding_staypoints_kernel."""
+
+    def test_start_end(self):
+        """Test that staypoints are emitted as [start, end) pairs."""
+        minute = pd.Timedelta(minutes=1).value
+        t = np.arange(6) * minute
+        x = np.array([8.5, 8.5, 8.5, 8.6, 8.6, 8.6])
+        y = np.full(6, 47.4)
+        kwargs = {"dist_threshold": 100, "time_threshold": 2 * minute, "gap_threshold": 15 * minute}
+        starts, ends, open_start = _sliding_staypoints_kernel(t, x, y, **kwargs)
+        assert starts.tolist() == [0] and ends.tolist() == [3] and open_start == 3
+        starts, ends, _ = _sliding_staypoints_kernel(t, x, y, include_last=True, **kwargs)
+        assert starts.tolist() == [0, 3] and ends.tolist() == [3, 6]
+
+    def test_gap(self):
+        """Test that a temporal gap restarts the window."""
+        minute = pd.Timedelta(minutes=1).value
+        t = np.array([0, 1, 2, 30, 31, 32]) * minute
+        x = np.full(6, 8.5)
+        y = np.full(6, 47.4)
+        kwargs = {"dist_threshold": 100, "time_threshold": 2 * minute, "gap_threshold": 15 * minute}
+        starts, ends, open_start = _sliding_staypoints_kernel(t, x, y, include_last=True, **kwargs)
+        assert starts.tolist() == [3] and ends.tolist() == [6] and open_start == 3
+
+    def test_empty(self):
+        """Test that empty input returns no staypoints."""
+        empty = np.array([], dtype=np.int64)
+        starts, ends, _ = _sliding_staypoints_kernel(empty, empty, empty, 100, 0, 0, include_last=True)
+        assert len(starts) == 0 and len(ends) == 0
+
+
+class TestStaypointDetector:
+    """Tests for the streaming StaypointDetector."""
+
+    def test_chunks_equal_batch(self):
+        """Processing pfs in chunks should yield the same result as generate_staypoints with include_last."""
+        pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+        pfs_batch, sp_batch = pfs.generate_staypoints(include_last=True)
+
+        detector = ti.preprocessing.StaypointDetector()
+        bins = pd.cut(pfs["tracked_at"], pd.date_range("2008-10-22", "2008-11-04", freq="6h", tz="utc"))
+        results = [detector.update(chunk) for _, chunk in pfs.groupby(bins, observed=True)]
+        results.append(detector.flush())
+
+        sp = ti.Staypoints(pd.concat([sp for _, sp in results]))
+        pfs_stream = pd.concat([pfs for pfs, _ in results]).sort_index()
+        # staypoint ids are assigned in order of detection -> compare linkage via started_at
+        linked = pfs_stream["staypoint_id"].map(sp["started_at"])
+        linked_batch = pfs_batch["staypoint_id"].map(sp_batch["started_at"])
+        pd.testing.assert_series_equal(linked, linked_batch)
+
+        sp = sp.sort_values(["user_id", "started_at"]).reset_index(drop=True)
+        sp.index.name = "id"
+        assert_geodataframe_equal(sp, sp_batch, check_less_precise=True)
+
+    def test_duplicates(self):
+        """Duplicate positionfixes should be dropped as in generate_staypoints."""
+        pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+        duplicates = pfs.iloc[::50].set_axis(pfs.index[::50] + len(pfs))
+        pfs = ti.Positionfixes(pd.concat([pfs, duplicates]).sort_values(["user_id", "tracked_at"]))
+        with pytest.warns(UserWarning, match="duplicates were dropped"):
+            pfs_batch, sp_batch = pfs.generate_staypoints(include_last=True)
+
+        detector = ti.preprocessing.StaypointDetector()
+        bins = pd.cut(pfs["tracked_at"], pd.date_range("2008-10-22", "2008-11-04", freq="6h", tz="utc"))
+        with pytest.warns(UserWarning, match="duplicates were dropped"):
+            results = [detector.update(chunk) for _, chunk in pfs.groupby(bins, observed=True)]
+        results.append(detector.flush())
+
+        pfs_stream = pd.concat([pfs for pfs, _ in results])
+        pd.testing.assert_index_equal(pfs_stream.index.sort_values(), pfs_batch.index.sort_values())
+        sp = pd.concat([sp for _, sp in results]).sort_values(["user_id", "started_at"]).reset_index(drop=True)
+        sp.index.name = "id"
+        assert_geodataframe_equal(ti.Staypoints(sp), sp_batch, check_less_precise=True)
+
+        detector = ti.preprocessing.StaypointDetector(exclude_duplicate_pfs=False)
+        pfs_out, _ = detector.update(pfs)
+        assert len(pfs_out) + len(detector.flush()[0]) == len(pfs)
+
+    def test_open_window(self, example_positionfixes):
+        """A staypoint is only emitted after the user left it."""
+        pfs = example_positionfixes
+        detector = ti.preprocessing.StaypointDetector(dist_threshold=5000, time_threshold=60, gap_threshold=600)
+        pfs_out, sp = detector.update(pfs[pfs["user_id"] == 0].iloc[:1])
+        assert len(pfs_out) == 0 and len(sp) == 0
+        pfs_out, sp = detector.update(pfs[pfs["user_id"] == 0].iloc[1:])
+        assert len(pfs_out) == 1 and len(sp) == 1
+        assert pfs_out["staypoint_id"].iloc[0] == sp.index[0]
+        pfs_out, sp = detector.update(pfs[pfs["user_id"] == 1])
+        assert len(pfs_out) == 0 and len(sp) == 0
+        pfs_out, sp = detector.flush()
+        assert len(pfs_out) == 2 and len(sp) == 0
+
+    def test_flush_without_update(self):
+        """Flush without any processed chunk should raise an error."""
+        with pytest.raises(RuntimeError, match="No open sliding windows"):
+            ti.preprocessing.StaypointDetector().flush()
+
 
 class TestGenerate_staypoints_sliding_user:
     """Test for _generate_staypoints_sliding_user."""
@@ -424,6 +578,22 @@ class TestGenerate_triplegs_between_staypoints:
 
         assert_geodataframe_equal(tpls_case1, tpls_case2)
 
+    def test_pfs_end_within_sp(self, geolife_pfs_sp_long):
+        """Check case 2 if the last staypoint has no following pfs and sp are in a different timezone."""
+        pfs, sp = geolife_pfs_sp_long
+        # drop all pfs after the last staypoint started
+        pfs = pfs[pfs["tracked_at"] <= sp["started_at"].max()]
+        _, tpls_case1 = pfs.generate_triplegs(sp, method="between_staypoints")
+
+        pfs = pfs.drop(columns="staypoint_id")
+        sp["started_at"] = sp["started_at"].dt.tz_convert("Europe/Zurich")
+        sp["finished_at"] = sp["finished_at"].dt.tz_convert("Europe/Zurich")
+        warn_string = "Providing positionfixes without*"
+        with pytest.warns(DeprecationWarning, match=warn_string):
+            _, tpls_case2 = pfs.generate_triplegs(sp, method="between_staypoints")
+
+        assert_geodataframe_equal(tpls_case1, tpls_case2)
+
     def test_stability(self, geolife_pfs_sp_long):
         """Checks if the results are same for different cases in tripleg_generation method."""
         pfs, sp = geolife_pfs_sp_long
@@ -629,3 +799,16 @@ class TestGenerate_triplegs_overlap_staypoints:
 
         with pytest.raises(TypeError, match="positionfixes must contain a staypoint_id column for overlap_staypoints"):
             pfs.drop(columns="staypoint_id").generate_triplegs(staypoints=sp, method="overlap_staypoints")
+
+
+class TestCreate_linestrings:
+    """Test for _create_linestrings."""
+
+    def test_linestrings(self):
+        """LineStrings follow the order of the positionfixes and skip positionfixes without tripleg."""
+        geometry = gpd.GeoSeries([Point(0, 0), Point(1, 1), Point(2, 2), Point(3, 3), Point(4, 4)])
+        tripleg_id = pd.Series([3, 3, pd.NA, 5, 5], dtype="Int64")
+        lines = _create_linestrings(tripleg_id, geometry)
+        assert lines.index.tolist() == [3, 5]
+        assert lines[3].equals(LineString([(0, 0), (1, 1)]))
+        assert lines[5].equals(LineString([(3, 3), (4, 4)]))
@@ -168,6 +168,15 @@ class TestGenerate_locations:
         # area shall be buffered -> thus larger than the circle with buffer as radius
         assert (locs.area > epsilon**2 * np.pi).all()
 
+    def test_add_extent(self, example_staypoints):
+        """Test if the extent is only added if requested and does not change the other results."""
+        sp = example_staypoints
+        sp_extent, locs_extent = sp.generate_locations(epsilon=10, num_samples=2)
+        sp_center, locs_center = sp.generate_locations(epsilon=10, num_samples=2, add_extent=False)
+        assert "extent" not in locs_center.columns
+        assert_geodataframe_equal(sp_extent, sp_center)
+        assert_geodataframe_equal(locs_extent.drop(columns="extent"), locs_center)
+
     def test_dbscan_hav_euc(self):
         """Test if using haversine and euclidean distances will generate the same location result."""
         sp_file = os.path.join("tests", "data", "geolife", "geolife_staypoints.csv")
@@ -258,6 +267,39 @@ class TestGenerate_locations:
         assert loc_dataset_num == 1
         assert loc_user_num == 2
 
+    def test_tile_size(self):
+        """Test if tiled dataset locations are equal to locations generated at once."""
+        sp_file = os.path.join("tests", "data", "geolife", "geolife_staypoints.csv")
+        sp = ti.read_staypoints_csv(sp_file, tz="utc", index_col="id", crs="epsg:4326")
+        for num_samples in [1, 3]:
+            sp_all, locs_all = sp.generate_locations(epsilon=50, num_samples=num_samples, agg_level="dataset")
+            sp_tiled, locs_tiled = sp.generate_locations(
+                epsilon=50, num_samples=num_samples, agg_level="dataset", tile_size=100, n_jobs=2
+            )
+            assert_geodataframe_equal(sp_all, sp_tiled)
+            assert_geodataframe_equal(locs_all, locs_tiled)
+
+        # planar coordinates
+        sp = sp.to_crs("epsg:32649")
+        sp_all, locs_all = sp.generate_locations(epsilon=50, agg_level="dataset", distance_metric="euclidean")
+        sp_tiled, locs_tiled = sp.generate_locations(
+            epsilon=50, agg_level="dataset", distance_metric="euclidean", tile_size=100
+        )
+        assert_geodataframe_equal(sp_all, sp_tiled)
+        assert_geodataframe_equal(locs_all, locs_tiled)
+
+        # no core points
+        with pytest.warns(UserWarning, match="No locations can be generated"):
+            sp_tiled, _ = sp.generate_locations(
+                num_samples=1000, agg_level="dataset", distance_metric="euclidean", tile_size=100
+            )
+        assert sp_tiled["location_id"].isna().all()
+
+    def test_tile_size_distance_metric_error(self, example_staypoints):
+        """Test if tile_size with an unsupported distance metric raises an error."""
+        with pytest.raises(ValueError, match="tile_size is only supported"):
+            example_staypoints.generate_locations(agg_level="dataset", distance_metric="manhattan", tile_size=100)
+
     def test_crs(self, example_staypoints):
         """Test whether the crs of the output locations is set correctly."""
         sp = example_staypoints
@@ -438,6 +480,26 @@ class TestGenerate_locations:
 
         assert sp2.loc[[2, 7], "location_id"].isnull().all()
 
+    def test_precision(self, example_staypoints):
+        """Test if staypoints with the same rounded coordinates are clustered together."""
+        sp = example_staypoints
+        # move staypoint 2 roughly 4 meters away from staypoints 1 and 15
+        sp.loc[2, "geom"] = Point(8.5067847, 47.40004)
+        sp_exact, _ = sp.generate_locations(epsilon=1, num_samples=2)
+        assert pd.isna(sp_exact.loc[2, "location_id"])
+
+        sp_rounded, _ = sp.generate_locations(epsilon=1, num_samples=2, precision=3)
+        assert (sp_rounded.loc[[2, 15], "location_id"] == sp_rounded.loc[1, "location_id"]).all()
+
+    def test_duplicates_num_samples(self, example_staypoints):
+        """Test that collapsed duplicates still count individually for num_samples."""
+        sp = example_staypoints
+        # staypoints 1 and 15 share the same coordinates
+        sp, _ = sp.generate_locations(epsilon=10, num_samples=2)
+        assert not pd.isna(sp.loc[1, "location_id"])
+        sp, _ = sp.generate_locations(epsilon=10, num_samples=3)
+        assert pd.isna(sp.loc[1, "location_id"])
+
     def test_agg_level_error(self, example_staypoints):
         """Test if unknown "agg_level" raises ValueError"""
         agg_level = "unknown"
@@ -487,6 +549,59 @@ class TestGenerate_locations:
         assert isinstance(locs, ti.Locations)
 
 
+class TestAssign_locations:
+    """Tests for assign_locations() method."""
+
+    def test_existing_locations(self, example_staypoints):
+        """Staypoints close to existing locations should be assigned to them."""
+        sp, locs = example_staypoints.generate_locations(epsilon=10, num_samples=2)
+        sp_new = example_staypoints.loc[[1, 5, 80]].copy()
+        sp_new.index = [100, 101, 102]
+        sp_new, locs_new = sp_new.assign_locations(locs, epsilon=10, num_samples=2)
+        assert sp_new["location_id"].tolist() == sp.loc[[1, 5, 80], "location_id"].tolist()
+        assert_geodataframe_equal(locs, locs_new)
+
+    def test_new_locations(self, example_staypoints):
+        """Remaining staypoints should form new locations with ids after the existing ones."""
+        sp, locs = example_staypoints.generate_locations(epsilon=10, num_samples=2)
+        # staypoints 2 and 7 are noise, add a second visit to form a location
+        sp_new = example_staypoints.loc[[2, 2, 7]].copy()
+        sp_new.index = [100, 101, 102]
+        sp_new, locs_new = sp_new.assign_locations(locs, epsilon=10, num_samples=2)
+        assert (sp_new.loc[[100, 101], "location_id"] == locs.index.max() + 1).all()
+        assert pd.isna(sp_new.loc[102, "location_id"])
+        assert len(locs_new) == len(locs) + 1
+        assert_geodataframe_equal(locs, locs_new.iloc[: len(locs)])
+        assert locs_new.loc[locs.index.max() + 1, "center"] == sp_new.loc[100, "geom"]
+
+    def test_agg_level(self, example_staypoints):
+        """Staypoints should only be assigned to locations of other users on dataset level."""
+        sp = example_staypoints
+        # user 1 visits location (1, 15) of user 0
+        sp_new = sp.loc[[1]].copy()
+        sp_new["user_id"] = 1
+        sp_new.index = [100]
+
+        _, locs = sp.generate_locations(epsilon=10, num_samples=2, agg_level="user")
+        sp_user, locs_user = sp_new.assign_locations(locs, epsilon=10, num_samples=2, agg_level="user")
+        assert pd.isna(sp_user.loc[100, "location_id"])
+        assert_geodataframe_equal(locs, locs_user)
+
+        sp, locs = sp.generate_locations(epsilon=10, num_samples=2, agg_level="dataset")
+        sp_dataset, locs_dataset = sp_new.assign_locations(locs, epsilon=10, num_samples=2, agg_level="dataset")
+        location_id = sp.loc[1, "location_id"]
+        assert sp_dataset.loc[100, "location_id"] == location_id
+        # the new user-location pair is added
+        assert len(locs_dataset) == len(locs) + 1
+        assert sorted(locs_dataset.loc[location_id, "user_id"]) == [0, 1]
+
+    def test_distance_metric_error(self, example_staypoints):
+        """Test if an unsupported distance metric raises an error."""
+        _, locs = example_staypoints.generate_locations(epsilon=10, num_samples=2)
+        with pytest.raises(ValueError, match="distance_metric 'manhattan' is unknown"):
+            example_staypoints.assign_locations(locs, distance_metric="manhattan")
+
+
 class TestMergeStaypoints:
     def test_merge_staypoints(self, example_staypoints_merge):
         """Test staypoint merging."""
@@ -510,6 +625,17 @@ class TestMergeStaypoints:
         # 15 should not be merged
         assert 15 in merged_sp_with_tpls.index
 
+    def test_merge_staypoints_empty_triplegs(self, example_triplegs_merge):
+        """Test if an empty DataFrame as triplegs merges the staypoints regardless of triplegs."""
+        sp, tpls = example_triplegs_merge
+        no_tpls = tpls.iloc[:0]
+        expected = sp.merge_staypoints(no_tpls)
+        for empty in [pd.DataFrame(), gpd.GeoDataFrame()]:
+            merged_sp = sp.merge_staypoints(empty)
+            pd.testing.assert_frame_equal(merged_sp, expected)
+        # tpls would prevent merging of staypoint 15
+        assert 15 not in expected.index
+
     def test_merge_staypoints_time(self, example_staypoints_merge):
         """Test if all merged staypoints have the correct start and end time"""
         sp, tpls = example_staypoints_merge
@@ -560,3 +686,37 @@ class TestMergeStaypoints:
             _ = sp.merge_staypoints(tpls)
 
         assert "Staypoints must contain column location_id" in str(excinfo.value)
+
+    def test_merge_staypoints_chain(self, example_staypoints_merge):
+        """Test that a long chain of staypoints at the same location is merged into one staypoint."""
+        sp, tpls = example_staypoints_merge
+        start = pd.Timestamp("1971-01-01 00:00:00", tz="utc")
+        chain = pd.DataFrame(
+            {
+                "user_id": 0,
+                "started_at": start + pd.to_timedelta(np.arange(50) * 10, unit="min"),
+                "finished_at": start + pd.to_timedelta(np.arange(50) * 10 + 5, unit="min"),
+                "location_id": 1,
+                "geom": Point(8.5067847, 47.4),
+            },
+            index=pd.Index(np.arange(50), name="id"),
+        )
+        chain = ti.Staypoints(chain, geometry="geom", crs="EPSG:4326")
+        merged_sp = chain.merge_staypoints(tpls, max_time_gap="5min")
+        assert len(merged_sp) == 1
+        assert merged_sp.index[0] == 0
+        assert merged_sp.loc[0, "finished_at"] == chain.loc[49, "finished_at"]
+        assert merged_sp["user_id"].dtype == "Int64"
+
+    def test_merge_staypoints_dtypes(self, example_staypoints_merge):
+        """Test that the merged staypoints have nullable dtypes."""
+        sp, tpls = example_staypoints_merge
+        sp["label"] = "home"
+        sp["elevation"] = 1.5
+        merged_sp = sp.merge_staypoints(tpls, agg={"geom": "first", "label": "first", "elevation": "mean"})
+        assert merged_sp.index.dtype == "int64"
+        assert merged_sp["user_id"].dtype == "Int64"
+        assert merged_sp["location_id"].dtype == "Int64"
+        assert merged_sp["label"].dtype == "string"
+        assert merged_sp["elevation"].dtype == "Float64"
+        assert merged_sp["started_at"].dtype == sp["started_at"].dtype
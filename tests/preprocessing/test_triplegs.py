@@ -8,7 +8,7 @@ import pytest
 from geopandas.testing import assert_geodataframe_equal
 from pandas.testing import assert_frame_equal, assert_series_equal, assert_index_equal
 
-from shapely.geometry import LineString, Point
+from shapely.geometry import LineString, MultiPoint, Point
 from tqdm import tqdm
 
 import trackintel as ti
@@ -122,6 +122,51 @@ class TestGenerate_trips:
 
             assert correct_dest_point == dest_point_trips
 
+    def test_trip_endpoints_unknown_staypoints(self):
+        """Test the trip geometry of trips with unknown origin or destination staypoint."""
+        start = pd.Timestamp("2021-07-11 8:00:00", tz="utc")
+        h = pd.to_timedelta("1h")
+        # user 0: trip of two triplegs without origin, trip of one tripleg without destination
+        # user 1: trip of one tripleg without origin and destination
+        sp_tpls = [
+            {"user_id": 0, "type": "tripleg", "geom": LineString([(0, 0), (1, 1)])},
+            {"user_id": 0, "type": "tripleg", "geom": LineString([(1, 1), (2, 2)])},
+            {"user_id": 0, "type": "staypoint", "geom": Point(3, 3)},
+            {"user_id": 0, "type": "tripleg", "geom": LineString([(4, 4), (5, 5)])},
+            {"user_id": 1, "type": "tripleg", "geom": LineString([(6, 6), (7, 7), (8, 8)])},
+        ]
+        for n, d in enumerate(sp_tpls):
+            d["started_at"] = start + n * h
+            d["finished_at"] = d["started_at"] + h
+            d["is_activity"] = d["type"] == "staypoint"
+        sp_tpls = gpd.GeoDataFrame(sp_tpls, geometry="geom", crs="EPSG:2056")
+        sp = ti.Staypoints(sp_tpls[sp_tpls["type"] == "staypoint"])
+        tpls = ti.Triplegs(sp_tpls[sp_tpls["type"] == "tripleg"])
+
+        _, tpls_, trips = generate_trips(sp, tpls)
+        assert trips["geom"].to_wkt().tolist() == [
+            "MULTIPOINT ((0 0), (3 3))",
+            "MULTIPOINT ((3 3), (5 5))",
+            "MULTIPOINT ((6 6), (8 8))",
+        ]
+        # compare to the row-wise construction of the previous implementation
+        tpls_on_trip = tpls_.groupby("trip_id")["geom"]
+        expected = [
+            MultiPoint(
+                [
+                    sp.loc[origin, "geom"] if pd.notna(origin) else Point(first.coords[0]),
+                    sp.loc[destination, "geom"] if pd.notna(destination) else Point(last.coords[-1]),
+                ]
+            )
+            for origin, destination, first, last in zip(
+                trips["origin_staypoint_id"],
+                trips["destination_staypoint_id"],
+                tpls_on_trip.first(),
+                tpls_on_trip.last(),
+            )
+        ]
+        assert trips["geom"].tolist() == expected
+
     def test_accessor_triplegs(self, example_triplegs):
         """Test if the accessor leads to the same results as the explicit function."""
         sp, tpls = example_triplegs
@@ -234,6 +234,16 @@ class TestGenerate_tours:
             assert gt_end == tours.loc[tour_id, "destination_staypoint_id"]
             assert gt_loc == tours.loc[tour_id, "location_id"]
 
+    def test_tours_missing_locations(self, example_trip_data):
+        """Test that staypoints without location never connect trips."""
+        trips, sp_locs = example_trip_data
+        sp_locs["location_id"] = sp_locs["location_id"].astype("Int64")
+        # staypoint 5 connects the long tour of user 0
+        sp_locs.loc[5, "location_id"] = pd.NA
+        _, tours = ti.preprocessing.trips.generate_tours(trips, staypoints=sp_locs, max_nr_gaps=0)
+        assert len(tours) == 1
+        assert tours.iloc[0]["trips"] == [1]
+
     def test_tours_crs(self, example_trip_data):
         """Test if the tours generation works with projected coordinate system"""
         trips, _ = example_trip_data
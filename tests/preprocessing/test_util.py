@@ -3,12 +3,16 @@ import datetime
 import numpy as np
 import geopandas as gpd
 from geopandas.testing import assert_geoseries_equal
-import pandas as pd
 import pytest
-from pandas.testing import assert_frame_equal
 from shapely.geometry import MultiPoint, Point
 
-from trackintel.preprocessing.util import _explode_agg, calc_temp_overlap, angle_centroid_multipoints
+from trackintel.preprocessing.util import (
+    _offset_rows,
+    _union_find,
+    angle_centroid_multipoints,
+    calc_temp_overlap,
+    grouped_centroid,
+)
 
 
 @pytest.fixture
@@ -48,52 +52,6 @@ class TestCalc_temp_overlap:
         assert ratio == 0
 
 
-class TestExplodeAgg:
-    """Test util method _explode_agg"""
-
-    def test_empty_agg(self):
-        """Test function with empty agg DataFrame"""
-        orig = [
-            {"a": 1, "b": "i", "c": np.nan},
-            {"a": 2, "b": "i", "c": np.nan},
-        ]
-        orig_df = pd.DataFrame(orig, columns=["a", "b"])
-        agg_df = pd.DataFrame({}, columns=["id", "c"])
-        returned_df = _explode_agg("id", "c", orig_df, agg_df)
-        solution_df = pd.DataFrame(orig)
-        assert_frame_equal(returned_df, solution_df, check_dtype=False)
-
-    def test_list_column(self):
-        """Test function with a column of lists."""
-        orig = [
-            {"a": 1, "c": 0},
-            {"a": 2, "c": 0},
-            {"a": 3, "c": None},
-            {"a": 4, "c": 1},
-        ]
-        agg = [
-            {"id": [0, 1], "c": 0},
-            {"id": [3], "c": 1},
-        ]
-        orig_df = pd.DataFrame(orig, columns=["a"])
-        agg_df = pd.DataFrame(agg)
-        returned_df = _explode_agg("id", "c", orig_df, agg_df)
-        solution_df = pd.DataFrame(orig)
-
-        assert_frame_equal(returned_df, solution_df)
-
-    def test_index_dtype_with_None(self):
-        """Test if dtype of index isn't changed with None values."""
-        orig = [{"a": 1, "c": 0}]
-        agg = [{"id": [0, 1], "c": 0}, {"id": [], "c": 1}]
-        orig_df = pd.DataFrame(orig, columns=["a"])
-        agg_df = pd.DataFrame(agg)
-        returned_df = _explode_agg("id", "c", orig_df, agg_df)
-        solution_df = pd.DataFrame(orig)
-
-        assert_frame_equal(returned_df, solution_df)
-
-
 class TestAngleCentroidMultipoints:
     """Test util method angle_centroid_multipoints"""
 
@@ -107,3 +65,52 @@ class TestAngleCentroidMultipoints:
     g_solution = gpd.GeoSeries([a, Point([175, 15]), Point([30, 10]), Point(0, 0), Point(-90, 0)])
     g = gpd.GeoSeries(angle_centroid_multipoints(g))
     assert_geoseries_equal(g, g_solution, check_less_precise=True)
+
+
+class TestGroupedCentroid:
+    """Test util method grouped_centroid"""
+
+    def test_wrap(self):
+        """Longitudes should be averaged as angles if not planar."""
+        x = np.array([179.0, -179.0, 20.0, 30.0, 40.0])
+        y = np.array([10.0, 20.0, 0.0, 10.0, 20.0])
+        index = np.array([0, 0, 1, 1, 1])
+        x_c, y_c = grouped_centroid(x, y, index)
+        assert np.allclose(np.abs(x_c), [180, 30]) and np.allclose(y_c, [15, 10])
+
+    def test_planar(self):
+        """Planar coordinates should be averaged arithmetically."""
+        x = np.array([179.0, -179.0, 20.0, 30.0, 40.0])
+        y = np.array([10.0, 20.0, 0.0, 10.0, 20.0])
+        index = np.array([0, 0, 1, 1, 1])
+        x_c, y_c = grouped_centroid(x, y, index, planar=True)
+        assert np.allclose(x_c, [0, 30]) and np.allclose(y_c, [15, 10])
+
+
+class TestOffsetRows:
+    """Test util method _offset_rows"""
+
+    def test_offset_rows(self):
+        """Every row between first and last (inclusive) should be assigned to its group."""
+        group, rows = _offset_rows(np.array([0, 5, 8]), np.array([2, 6, 8]))
+        assert group.tolist() == [0, 0, 0, 1, 1, 2]
+        assert rows.tolist() == [0, 1, 2, 5, 6, 8]
+
+    def test_empty(self):
+        """No groups should yield no rows."""
+        group, rows = _offset_rows(np.array([], dtype=int), np.array([], dtype=int))
+        assert len(group) == 0 and len(rows) == 0
+
+
+class TestUnionFind:
+    """Test util method _union_find"""
+
+    def test_components(self):
+        """Every node should be labeled with the smallest node of its component."""
+        parent = _union_find(7, np.array([6, 1, 5, 3]), np.array([3, 4, 4, 1]))
+        assert parent.tolist() == [0, 1, 2, 1, 1, 1, 1]
+
+    def test_no_edges(self):
+        """Without edges every node is its own component."""
+        parent = _union_find(3, np.array([], dtype=int), np.array([], dtype=int))
+        assert parent.tolist() == [0, 1, 2]
@@ -14,6 +14,13 @@ from trackintel.io.file import read_locations_csv
 from trackintel.io.file import read_trips_csv
 from trackintel.io.file import read_tours_csv
 
+from trackintel.io.parquet import read_positionfixes_parquet
+from trackintel.io.parquet import read_triplegs_parquet
+from trackintel.io.parquet import read_staypoints_parquet
+from trackintel.io.parquet import read_locations_parquet
+from trackintel.io.parquet import read_trips_parquet
+from trackintel.io.parquet import read_tours_parquet
+
 from trackintel.visualization import plot, plot_modal_split
 
 # why is this import needed?
@@ -39,6 +46,12 @@ __all__ = [
     "read_locations_csv",
     "read_trips_csv",
     "read_tours_csv",
+    "read_positionfixes_parquet",
+    "read_triplegs_parquet",
+    "read_staypoints_parquet",
+    "read_locations_parquet",
+    "read_trips_parquet",
+    "read_tours_parquet",
     "plot",
     "plot_modal_split",
     "print_version",
@@ -191,56 +191,23 @@ def freq_method(staypoints, *labels):
     sp = staypoints.copy()
     if not labels:
         labels = ("home", "work")
-    for name, group in sp.groupby("user_id"):
-        if "duration" not in group.columns:
-            group["duration"] = group["finished_at"] - group["started_at"]
-        # pandas keeps inner order of groups
-        sp.loc[sp["user_id"] == name, "purpose"] = _freq_transform(group, *labels)
-    if "purpose" not in sp.columns:  # if empty sp
-        sp["purpose"] = None
+    if "duration" in sp.columns:
+        duration = sp["duration"]
+    else:
+        duration = sp["finished_at"] - sp["started_at"]
+    groups = [sp["user_id"], sp["location_id"]]
+    # total duration per user and location
+    loc_duration = duration.groupby(groups).sum()
+    # rank the locations of every user by decreasing duration (ties keep the location order)
+    loc_duration = loc_duration.sort_values(ascending=False, kind="stable")
+    rank = loc_duration.groupby(level=0).cumcount().to_numpy()
+    purpose = np.full(len(loc_duration), fill_value=None)
+    purpose[rank < len(labels)] = np.array(labels, dtype=object)[rank[rank < len(labels)]]
+    purpose = pd.Series(purpose, index=loc_duration.index)
+    sp["purpose"] = purpose.reindex(pd.MultiIndex.from_arrays(groups)).to_numpy()
     return sp
 
 
-def _freq_transform(group, *labels):
-    """Transform function that assigns the longest (duration) visited locations the labels in order.
-
-    Parameters
-    ----------
-    group : pd.DataFrame
-        Should have columns "location_id" and "duration".
-
-    Returns
-    -------
-    pd.Series
-        dtype : object
-    """
-    group_agg = group.groupby("location_id").agg({"duration": "sum"})
-    group_agg["purpose"] = _freq_assign(group_agg["duration"], *labels)
-    group_merge = pd.merge(
-        group["location_id"], group_agg["purpose"], how="left", left_on="location_id", right_index=True
-    )
-    return group_merge["purpose"]
-
-
-def _freq_assign(duration, *labels):
-    """Assign k labels to k longest durations the rest is `None`.
-
-    Parameters
-    ----------
-    duration : pd.Series
-
-    Returns
-    -------
-    np.array
-        dtype : object
-    """
-    kth = (-duration).argsort()[: len(labels)]  # if inefficient use partial sort.
-    label_array = np.full(len(duration), fill_value=None)
-    labels = labels[: len(kth)]  # if provided with more labels than entries.
-    label_array[kth] = labels
-    return label_array
-
-
 def osna_method(staypoints):
     """Find "home" location for timeframes "rest" and "leisure" and "work" location for "work" timeframe.
 
@@ -281,7 +248,7 @@ def osna_method(staypoints):
     sp["duration"] = sp["finished_at"] - sp["started_at"]
     sp["mean_time"] = sp["started_at"] + sp["duration"] / 2
 
-    sp["label"] = sp["mean_time"].apply(_osna_label_timeframes)
+    sp["label"] = _osna_label_timeframes_series(sp["mean_time"])
     sp.loc[sp["label"] == "rest", "duration"] *= 0.739  # weight given in paper
     sp.loc[sp["label"] == "leisure", "duration"] *= 0.358  # weight given in paper
 
@@ -351,3 +318,14 @@ def _osna_label_timeframes(dt, weekend=[5, 6], start_rest=2, start_work=8, start
     if start_work <= dt.hour < start_leisure:
         return "work"
     return "leisure"
+
+
+def _osna_label_timeframes_series(dt, weekend=[5, 6], start_rest=2, start_work=8, start_leisure=19):
+    """Vectorized version of `_osna_label_timeframes` for a Series of datetimes."""
+    hour = dt.dt.hour
+    conditions = [
+        dt.dt.weekday.isin(weekend),
+        (start_rest <= hour) & (hour < start_work),
+        (start_work <= hour) & (hour < start_leisure),
+    ]
+    return np.select(conditions, ["weekend", "rest", "work"], default="leisure").astype(object)
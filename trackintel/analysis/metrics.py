@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
+import shapely
 
 from trackintel.geogr import point_haversine_dist, check_gdf_planar
 
@@ -20,7 +20,7 @@ def radius_gyration(sp, method="count", print_progress=False):
         - `duration`: assigns each Point a weight based on duration.
 
     print_progress: bool, default False
-        Show per-user progress if set to True.
+        Has no effect as all users are calculated at once. Kept for backwards compatibility.
 
     Returns
     -------
@@ -36,47 +36,28 @@ def radius_gyration(sp, method="count", print_progress=False):
     if method not in ["count", "duration"]:
         raise ValueError(f'Method unknown. Should be on of {{"count", "duration"}}. You passed "{method}"')
 
-    if print_progress:
-        tqdm.pandas(desc="User radius of gyration calculation")
-        s = sp.groupby("user_id").progress_apply(_radius_gyration_user, method=method, include_groups=False)
-    else:
-        s = sp.groupby("user_id").apply(_radius_gyration_user, method=method, include_groups=False)
-
-    s = s.rename("radius_gyration")
-    return s
-
-
-def _radius_gyration_user(sp, method):
-    """
-    User level radius of gyration calculation, see radius_gyration() for more details.
-
-    Parameters
-    ----------
-    sp : Staypoints
-    method: {"count", "duration"}
-
-    Returns
-    -------
-    float
-        The radius of gyration of the user
-    """
-    x = sp.geometry.x
-    y = sp.geometry.y
+    # center of mass and mean squared distance of all users in one pass over user codes
+    user, users = pd.factorize(sp["user_id"], sort=True)
+    valid = user >= 0  # groupby semantic: no NaN users
+    user = user[valid]
+    x = sp.geometry.x.to_numpy()[valid]
+    y = sp.geometry.y.to_numpy()[valid]
 
     if method == "duration":
         duration = sp["finished_at"] - sp["started_at"]
-        w = duration.dt.total_seconds()
-    else:  # method == count (check is done in upper level)
+        w = duration.dt.total_seconds().to_numpy()[valid]
+    else:  # method == count
         w = np.ones_like(x)
 
-    x_center = np.average(x, weights=w)
-    y_center = np.average(y, weights=w)
+    w_sum = np.bincount(user, weights=w, minlength=len(users))
+    x_center = np.bincount(user, weights=w * x, minlength=len(users)) / w_sum
+    y_center = np.bincount(user, weights=w * y, minlength=len(users)) / w_sum
     if check_gdf_planar(sp):
-        sq_dist = (x - x_center) ** 2 + (y - y_center) ** 2
+        sq_dist = (x - x_center[user]) ** 2 + (y - y_center[user]) ** 2
     else:
-        sq_dist = point_haversine_dist(x, y, x_center, y_center) ** 2
-    square_rg = np.average(sq_dist, weights=w)
-    return np.sqrt(square_rg)
+        sq_dist = point_haversine_dist(x, y, x_center[user], y_center[user]) ** 2
+    square_rg = np.bincount(user, weights=w * sq_dist, minlength=len(users)) / w_sum
+    return pd.Series(np.sqrt(square_rg), index=pd.Index(users, name="user_id"), name="radius_gyration")
 
 
 def jump_length(staypoints):
@@ -97,32 +78,15 @@ def jump_length(staypoints):
     ----------
     [1] Brockmann, D., Hufnagel, L., & Geisel, T. (2006). The scaling laws of human travel. Nature, 439(7075), 462-465.
     """
-    geom = staypoints.geometry.name
-    staypoints = staypoints.sort_values(by=["user_id", "started_at"])[["user_id", geom]]
-    # due to bug in GeoPandas 0.14.0, we cannot use transform on grouped GeoSeries,
-    # thus we stay in GeoDataFrame and convert in the end to Series (will be fixed in next release)
-    series = staypoints.groupby(by="user_id").transform(_jump_length_user)
-    series = series[geom].rename("jump_length")
-    return series
-
-
-def _jump_length_user(g):
-    """
-    Jump length for a single user.
-
-    Parameters
-    ----------
-    g : gpd.GeoSeries
-
-    Returns
-    -------
-    np.array
-    """
-    if check_gdf_planar(g):
-        dist = g.distance(g.shift(-1))
+    staypoints = staypoints.sort_values(by=["user_id", "started_at"])
+    geom = staypoints.geometry
+    dist = np.full(len(staypoints), np.nan)
+    if check_gdf_planar(staypoints):
+        dist[:-1] = shapely.distance(geom.values[:-1], geom.values[1:])
     else:
-        dist = np.zeros(len(g), dtype=np.float64)
-        dist[:-1] = point_haversine_dist(g.x[:-1], g.y[:-1], g.x[1:], g.y[1:])
-        dist[-1] = np.nan
-        dist = pd.Series(data=dist, index=g.index)
-    return dist
+        x, y = geom.x.to_numpy(), geom.y.to_numpy()
+        dist[:-1] = point_haversine_dist(x[:-1], y[:-1], x[1:], y[1:])
+    # last entry of every user has no next staypoint
+    user = staypoints["user_id"].to_numpy()
+    dist[:-1][user[:-1] != user[1:]] = np.nan
+    return pd.Series(dist, index=staypoints.index, name="jump_length")
@@ -1,7 +1,10 @@
 import warnings
 
+import numpy as np
 import pandas as pd
 
+from trackintel.preprocessing.util import _offset_rows
+
 
 def temporal_tracking_quality(source, granularity="all"):
     """
@@ -63,6 +66,10 @@ def temporal_tracking_quality(source, granularity="all"):
             "To successfully calculate the user-level tracking quality, "
             f"the source dataframe must have the columns {required_columns}, but it has [{', '.join(source.columns)}]."
         )
+    if granularity not in ["all", "day", "week", "weekday", "hour"]:
+        raise ValueError(
+            f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {granularity}"
+        )
 
     df = source.copy()
     df.reset_index(inplace=True)
@@ -76,95 +83,28 @@ def temporal_tracking_quality(source, granularity="all"):
         return None
 
     if granularity == "all":
-        quality = df.groupby("user_id", as_index=False).apply(
-            _get_tracking_quality_user, granularity, include_groups=False
-        )
+        quality = df.groupby("user_id", as_index=False).apply(_get_tracking_quality_user, include_groups=False)
         return quality
+    return _get_tracking_quality_bins(df, granularity)
 
-    # split records that span several days
-    df = _split_overlaps(df, granularity="day")
-    if granularity == "day":
-        grouper = pd.Grouper(key="started_at", freq="D")
-        column_name = "day"
-
-    elif granularity == "week":
-        grouper = pd.Grouper(key="started_at", freq="W")
-        column_name = "week_monday"
-
-    elif granularity == "weekday":
-        grouper = df["started_at"].dt.weekday
-        column_name = "weekday"
-
-    elif granularity == "hour":
-        df = _split_overlaps(df, granularity="hour")
-        grouper = df["started_at"].dt.hour
-        column_name = "hour"
-
-    else:
-        raise ValueError(
-            f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {granularity}"
-        )
-
-    start_date = df["started_at"].min().floor(freq="D")
-    # calculate per-user per-grouper tracking quality
-    quality = (
-        df.groupby(["user_id", grouper])[["started_at", "finished_at"]]
-        .apply(_get_tracking_quality_user, start_date, granularity)
-        .reset_index()
-    )
 
-    # rename and reorder
-    quality.rename(columns={"started_at": column_name}, inplace=True)
-    quality = quality[["user_id", column_name, "quality"]]
-
-    return quality
-
-
-def _get_tracking_quality_user(df, start_date, granularity="all"):
+def _get_tracking_quality_user(df):
     """
-    Tracking quality per-user per-granularity.
+    Tracking quality of one user over the entire tracking period.
 
     Parameters
     ----------
     df : Trackintel class
         The source dataframe
 
-    start_date: pd.Timestamp
-        When measurement started, used to calculate in which weekday or week the measurement lies.
-
-    granularity : {"all", "day", "weekday", "week", "hour"}, default "all"
-        Determines the extent of the tracking. "all" the entire tracking period,
-        "day" and "weekday" a whole day, "week" a whole week, and "hour" a whole hour.
-
     Returns
     -------
     pandas.Series
         A pandas.Series object containing the tracking quality
     """
     tracked_duration = (df["finished_at"] - df["started_at"]).dt.total_seconds().sum()
-    if granularity == "all":
-        # the whole tracking period
-        extent = (df["finished_at"].max() - df["started_at"].min()).total_seconds()
-    elif granularity == "day":
-        # total seconds in a day
-        extent = 60 * 60 * 24
-    elif granularity == "weekday":
-        # total seconds in an day * number of tracked weeks
-        # (entries from multiple weeks may be grouped together)
-        df["week"] = ((df["started_at"] - start_date)).dt.days // 7
-        extent = 60 * 60 * 24 * (df["week"].max() - df["week"].min() + 1)
-    elif granularity == "week":
-        # total seconds in a week
-        extent = 60 * 60 * 24 * 7
-    elif granularity == "hour":
-        # total seconds in an hour * number of tracked days
-        # (entries from multiple days may be grouped together)
-        df["day"] = (df["started_at"] - start_date).dt.days
-        extent = (60 * 60) * (df["day"].max() - df["day"].min() + 1)
-    else:
-        raise ValueError(
-            f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {granularity}"
-        )
+    # the whole tracking period
+    extent = (df["finished_at"].max() - df["started_at"].min()).total_seconds()
     return pd.Series([tracked_duration / extent], index=["quality"])
 
 
@@ -222,3 +162,274 @@ def _get_times(row, freq="D"):
     if (row["finished_at"] != result[-1]) or (len(result) == 1):  # len check for started_at == finished_at
         result.append(row["finished_at"])  # is not on border -> not included in data_range
     return result[:-1], result[1:]
+
+
+def _get_tracking_quality_bins(df, granularity):
+    """
+    Tracking quality per-user per-bin for the granularities "day", "week", "weekday" and "hour".
+
+    Records are not split at the bin borders. The tracked time in the first and the last (partial) bin of every
+    record is calculated from the bin edges, and the full bins in between are added as counts. The result matches
+    splitting the records at every day (and hour) border with `_split_overlaps` and grouping the parts, except at
+    daylight saving time changes: there the tracked time in a bin is the elapsed time, e.g., a fully tracked day
+    with a clock change has 23 or 25 hours, the skipped hour has no tracked time and the repeated hour counts twice.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Records with positive duration and the columns ``['user_id', 'started_at', 'finished_at']``.
+
+    granularity : {"day", "week", "weekday", "hour"}
+        The level of which the tracking quality is calculated.
+
+    Returns
+    -------
+    quality: DataFrame
+        A per-user per-granularity temporal tracking quality dataframe.
+    """
+    hour = 60 * 60 * 10**9
+    day = 24 * hour
+    tz = df["started_at"].dt.tz
+    started_at = df["started_at"].dt.as_unit("ns")
+    finished_at = df["finished_at"].dt.as_unit("ns")
+    user, users = pd.factorize(df["user_id"], sort=True)
+
+    if granularity == "day":
+        bins = _Bins(started_at, finished_at, day, 0, tz)
+        user, bin_ids, tracked = _accumulate_bins(user, bins)
+        column = _from_wall_time_ns(bin_ids * day, tz)
+        extent = 60 * 60 * 24
+        column_name = "day"
+
+    elif granularity == "week":
+        # weeks start on Monday (4 days after 1970-01-01) and are labeled by their last day (Sunday)
+        week, offset = 7 * day, 4 * day
+        bins = _Bins(started_at, finished_at, week, offset, tz)
+        user, bin_ids, tracked = _accumulate_bins(user, bins)
+        column = _from_wall_time_ns(bin_ids * week + offset + 6 * day, tz)
+        extent = 60 * 60 * 24 * 7
+        column_name = "week_monday"
+
+    elif granularity == "weekday":
+        bins = _Bins(started_at, finished_at, day, 0, tz)
+        # day of the earliest record, used to number the tracked weeks
+        start_day = bins.first.min()
+        # 1970-01-01 is a Thursday (weekday 3)
+        tracked, first_bin, last_bin = _accumulate_phases(user, len(users), bins, period=7, phase_offset=3)
+        # total seconds in an day * number of tracked weeks
+        extent = 60 * 60 * 24 * ((last_bin - start_day) // 7 - (first_bin - start_day) // 7 + 1)
+        column_name = "weekday"
+
+    else:
+        bins = _Bins(started_at, finished_at, hour, 0, tz)
+        tracked, first_bin, last_bin = _accumulate_phases(user, len(users), bins, period=24, phase_offset=0)
+        # total seconds in an hour * number of tracked days
+        extent = (60 * 60) * (last_bin // 24 - first_bin // 24 + 1)
+        column_name = "hour"
+
+    if granularity in ["weekday", "hour"]:
+        # keep only the combinations of user and weekday/hour that contain any record
+        user, column = np.nonzero(first_bin <= last_bin)
+        tracked, extent = tracked[user, column], extent[user, column]
+        column = column.astype(np.int32)
+
+    # exact conversion of nanoseconds to seconds
+    tracked = tracked // 10**9 + (tracked % 10**9) / 10**9
+    quality = pd.DataFrame({"user_id": users[user], column_name: column, "quality": tracked / extent})
+    return quality
+
+
+def _wall_time_ns(times):
+    """Return the local (wall) time of a datetime Series as nanoseconds since 1970-01-01."""
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    return times.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def _utc_time_ns(times):
+    """Return the elapsed time of a datetime Series as nanoseconds since 1970-01-01 UTC."""
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    return times.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def _from_wall_time_ns(times, tz):
+    """
+    Convert nanoseconds since 1970-01-01 in local (wall) time back to datetimes in timezone tz.
+
+    Ambiguous times are resolved to their first occurrence, nonexistent times are shifted to the next existing time.
+    """
+    times = pd.to_datetime(times)
+    if tz is not None:
+        times = times.tz_localize(tz, ambiguous=np.ones(len(times), dtype=bool), nonexistent="shift_forward")
+    return times
+
+
+class _Bins:
+    """
+    The first and last bin of every record and the time tracked in them.
+
+    Bins are defined in local (wall) time, e.g., a day bin always starts at local midnight. The time tracked in a
+    bin is measured as elapsed time between the bin edges in UTC, such that a day with a daylight saving time
+    change has 23 or 25 hours.
+
+    Parameters
+    ----------
+    started_at, finished_at : pd.Series
+        Start and end times with nanosecond resolution, finished_at must be after started_at.
+
+    size : int
+        Size of the bins in nanoseconds (local time).
+
+    offset : int
+        Start of bin 0 in nanoseconds (local time).
+
+    tz : tzinfo or None
+        Timezone of the times.
+
+    Attributes
+    ----------
+    first, last : np.ndarray
+        First and last (inclusive) bin of every record.
+
+    first_amount, last_amount : np.ndarray
+        Time tracked in the first and the last bin. last_amount is 0 if the record lies in a single bin.
+
+    size : int
+        Nominal size of a bin in nanoseconds.
+    """
+
+    def __init__(self, started_at, finished_at, size, offset, tz):
+        self.size = size
+        self._offset = offset
+        self._tz = tz
+        self.first = (_wall_time_ns(started_at) - offset) // size
+        # the bin the last instant before finished_at lies in
+        self.last = (_wall_time_ns(finished_at - pd.Timedelta(1, "ns")) - offset) // size
+        # UTC edges of all bins between the earliest and the latest record
+        self._base = self.first.min()
+        self._edges = self._utc_edges(np.arange(self._base, self.last.max() + 2))
+
+        started_at, finished_at = _utc_time_ns(started_at), _utc_time_ns(finished_at)
+        self.first_amount = np.minimum(self.edge(self.first + 1), finished_at) - started_at
+        self.last_amount = np.where(self.last > self.first, finished_at - self.edge(self.last), 0)
+
+    def _utc_edges(self, bins):
+        """Convert the local start of the bins to UTC nanoseconds."""
+        edges = bins * self.size + self._offset
+        if self._tz is None:
+            return edges
+        return _from_wall_time_ns(edges, self._tz).as_unit("ns").asi8
+
+    def edge(self, bins):
+        """UTC nanoseconds of the start of the bins."""
+        return self._edges[bins - self._base]
+
+    def length(self, bins):
+        """Elapsed time of the bins in nanoseconds."""
+        return self.edge(bins + 1) - self.edge(bins)
+
+    def irregular(self):
+        """Bins whose elapsed time differs from the nominal size, e.g., because of a daylight saving time change."""
+        bins = np.arange(self._base, self._base + len(self._edges) - 1)
+        return bins[np.diff(self._edges) != self.size]
+
+
+def _accumulate_bins(user, bins):
+    """
+    Sum up the tracked time per user and bin for every bin covered by a record.
+
+    Parameters
+    ----------
+    user : np.ndarray
+        User code of every record.
+
+    bins : _Bins
+        The bins covered by every record.
+
+    Returns
+    -------
+    user, bin_ids, tracked : np.ndarray
+        Tracked time per user and bin, sorted by user and bin.
+    """
+    order = np.lexsort((bins.first, user))
+    user, first, last = user[order], bins.first[order], bins.last[order]
+    first_amount, last_amount = bins.first_amount[order], bins.last_amount[order]
+
+    # merge the overlapping bin ranges of a user to enumerate every covered bin once
+    reach = pd.Series(last).groupby(user).cummax().to_numpy()
+    new_range = np.ones(len(user), dtype=bool)
+    new_range[1:] = (user[1:] != user[:-1]) | (first[1:] > reach[:-1])
+    range_start = np.flatnonzero(new_range)
+    range_first, range_last = first[range_start], np.maximum.reduceat(last, range_start)
+    range_id, bin_ids = _offset_rows(range_first, range_last)
+
+    # position of the first and last bin of every record within bin_ids
+    range_offset = np.cumsum(range_last - range_first + 1) - (range_last - range_first + 1)
+    range_of_record = np.cumsum(new_range) - 1
+    row_first = range_offset[range_of_record] + first - range_first[range_of_record]
+    row_last = row_first + last - first
+
+    tracked = np.zeros(len(bin_ids) + 1, dtype=np.int64)
+    np.add.at(tracked, row_first, first_amount)
+    np.add.at(tracked, row_last, last_amount)
+    # full bins in between are counted as difference at the range borders
+    full = last - first > 1
+    n_full = np.zeros(len(bin_ids) + 1, dtype=np.int64)
+    np.add.at(n_full, row_first[full] + 1, 1)
+    np.add.at(n_full, row_last[full], -1)
+    tracked = tracked[:-1] + np.cumsum(n_full)[:-1] * bins.length(bin_ids)
+    return user[range_start][range_id], bin_ids, tracked
+
+
+def _accumulate_phases(user, n_users, bins, period, phase_offset):
+    """
+    Sum up the tracked time per user and phase of periodic bins (e.g., the hour of day).
+
+    Parameters
+    ----------
+    user : np.ndarray
+        User code of every record.
+
+    n_users : int
+        Number of users.
+
+    bins : _Bins
+        The bins covered by every record.
+
+    period : int
+        Number of bins per period (e.g., 24 hours per day).
+
+    phase_offset : int
+        Phase of bin 0.
+
+    Returns
+    -------
+    tracked : np.ndarray
+        Tracked time per user (rows) and phase (columns).
+
+    first_bin, last_bin : np.ndarray
+        First and last covered bin per user and phase, first_bin > last_bin if the phase is not covered.
+    """
+    first, last = bins.first, bins.last
+    tracked = np.zeros((n_users, period), dtype=np.int64)
+    first_bin = np.full((n_users, period), np.iinfo(np.int64).max)
+    last_bin = np.full((n_users, period), np.iinfo(np.int64).min)
+    first_phase, last_phase = first + phase_offset, last + phase_offset
+    np.add.at(tracked, (user, first_phase % period), bins.first_amount)
+    np.add.at(tracked, (user, last_phase % period), bins.last_amount)
+    for phase in range(period):
+        # number of full bins (first, last) with this phase
+        n_full = np.maximum((last_phase - 1 - phase) // period - (first_phase - phase) // period, 0)
+        np.add.at(tracked[:, phase], user, n_full * bins.size)
+        # first and last bin with this phase
+        phase_first = first + (phase - first_phase) % period
+        phase_last = last - (last_phase - phase) % period
+        covered = phase_first <= last
+        np.minimum.at(first_bin[:, phase], user[covered], phase_first[covered])
+        np.maximum.at(last_bin[:, phase], user[covered], phase_last[covered])
+    # correct the full bins that are shorter or longer than the nominal size (daylight saving time changes)
+    for irregular in bins.irregular():
+        full = (first < irregular) & (irregular < last)
+        np.add.at(tracked[:, (irregular + phase_offset) % period], user[full], bins.length(irregular) - bins.size)
+    return tracked, first_bin, last_bin
@@ -1,13 +1,14 @@
-import itertools
 import math
 import warnings
-from math import cos, pi
 
 import numpy as np
 import pandas as pd
 import shapely
 import similaritymeasures
-from sklearn.metrics import pairwise_distances
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import sparse
+from sklearn.metrics import pairwise_distances_chunked
+from sklearn.neighbors import BallTree, KDTree
 
 from trackintel import Triplegs
 
@@ -86,7 +87,17 @@ def point_haversine_dist(lon_1, lat_1, lon_2, lat_2, r=6371000, float_flag=False
     return r * np.arccos(cos_lat_d - cos_lat1 * cos_lat2 * (1 - cos_lon_d))
 
 
-def calculate_distance_matrix(X, Y=None, dist_metric="haversine", n_jobs=None, **kwds):
+def calculate_distance_matrix(
+    X,
+    Y=None,
+    dist_metric="haversine",
+    n_jobs=None,
+    block_size=None,
+    dtype="float64",
+    out=None,
+    max_distance=None,
+    **kwds,
+):
     """
     Compute the distance matrix from a vector array X and optional Y.
 
@@ -105,7 +116,7 @@ def calculate_distance_matrix(X, Y=None, dist_metric="haversine", n_jobs=None, *
         The distance metric to be used for calculating the matrix. By default 'haversine.
 
         For Point geometries we provide the 'haversine' metric.
-        This function then wraps `sklearn.metrics.pairwise_distances`.
+        For all other metrics this function wraps `sklearn.metrics.pairwise_distances_chunked`.
         Therefore the following metrics are also accepted:
 
         - via ``scikit-learn``: `['cityblock', 'cosine', 'euclidean', 'l1', 'l2', 'manhattan']`
@@ -117,22 +128,51 @@ def calculate_distance_matrix(X, Y=None, dist_metric="haversine", n_jobs=None, *
         For LineStrings, we provide the metrics {'dtw', 'frechet'} via the implementation from similaritymeasures.
 
     n_jobs: int, optional
-        The number of jobs to use for the computation. Ignored for LineStrings.
-        None means 1 unless in a joblib.parallel_backend context. -1 means using all processors.
+        The number of jobs to use for the computation. Points use threads and LineStrings processes.
+        None (or 0) means 1 unless in a joblib.parallel_backend context. -1 means using all processors.
         See `sklearn.metrics.pairwise_distances` for more informations.
 
+    block_size: int, optional
+        Number of rows of the matrix that are calculated at once. Bounds the working memory to
+        ``block_size * len(Y)`` distances. Per default chosen such that a block of Points contains about 4 million
+        distances, and LineStrings are split into about 4 blocks per job.
+
+    dtype: str or np.dtype, default "float64"
+        The dtype of the returned matrix, e.g., "float32" to halve the memory. Ignored if `out` is given.
+
+    out: np.ndarray, optional
+        Array of shape (len(X), len(Y)) the distances are written into. Pass a `np.memmap` to calculate
+        distance matrices larger than the memory.
+
+    max_distance: float, optional
+        Only calculate the distances of pairs that are at most max_distance apart (in meters for 'haversine',
+        otherwise in the unit of the coordinates) and return a sparse matrix, such that the memory scales with
+        the number of neighbouring pairs. Not supported together with `out`.
+
+        For Points, the pairs are found with a BallTree ('haversine') or a KDTree ('euclidean'). Other metrics
+        are not supported.
+        For LineStrings, pairs are skipped without calculating the full distance if a lower bound (distance of the
+        endpoints, of the bounding boxes, or of every point to the bounding box of the other LineString) exceeds
+        max_distance. The bounds are only used for the default euclidean ground distance of 'dtw' and 'frechet'.
+
     **kwds:
         Optional keywords passed to the distance functions.
 
     Returns
     -------
-    D: np.array
+    D: np.array or scipy.sparse.csr_matrix
         matrix of shape (len(X), len(X)) or of shape (len(X), len(Y)) if Y is provided.
+        If `out` is given, `out` is returned.
+        If `max_distance` is given, a sparse matrix where all pairs within max_distance are stored explicitly
+        (also if their distance is 0). Missing entries are farther apart than max_distance.
 
     Examples
     --------
     >>> calculate_distance_matrix(staypoints, dist_metric="haversine")
     >>> calculate_distance_matrix(triplegs_1, triplegs_2, dist_metric="dtw")
+    >>> D = np.memmap("distances.dat", dtype="float32", mode="w+", shape=(len(staypoints), len(staypoints)))
+    >>> calculate_distance_matrix(staypoints, dist_metric="haversine", out=D)
+    >>> calculate_distance_matrix(staypoints, dist_metric="haversine", max_distance=200)
     >>> pfs.calculate_distance_matrix(dist_metric="haversine")
     """
     geom_type = X.geometry.iat[0].geom_type
@@ -141,73 +181,305 @@ def calculate_distance_matrix(X, Y=None, dist_metric="haversine", n_jobs=None, *
     if geom_type not in ["Point", "LineString"]:
         raise ValueError(f"We only support 'Point' and 'LineString'. Your geometry is {geom_type}")
 
-    if geom_type == "Point":
-        if dist_metric == "haversine":
-            # curry our haversine distance
-            def haversine_curry(a, b, **_):
-                return point_haversine_dist(*a, *b, float_flag=True)
+    if max_distance is not None and geom_type == "Point" and dist_metric not in ["haversine", "euclidean"]:
+        raise ValueError("max_distance is only supported for Points with the metrics ['haversine', 'euclidean'].")
+    if max_distance is not None and out is not None:
+        raise ValueError("out cannot be used together with max_distance.")
+    if n_jobs == 0:
+        n_jobs = None  # default of the accessors
 
-            dist_metric = haversine_curry
+    if geom_type == "Point":
         X = shapely.get_coordinates(X.geometry)
         Y = shapely.get_coordinates(Y.geometry) if Y is not None else X
-        return pairwise_distances(X, Y, metric=dist_metric, n_jobs=n_jobs, **kwds)
+        if max_distance is not None:
+            return _sparse_distance_matrix(X, Y, dist_metric, max_distance, dtype)
+        out = _distance_matrix_out(out, (len(X), len(Y)), dtype)
+        if block_size is None:
+            block_size = max(1, 2**22 // max(len(Y), 1))
+        if dist_metric == "haversine":
+            # numpy kernel evaluated on blocks of rows, numpy releases the GIL -> threads suffice
+            blocks = range(0, len(X), block_size)
+            Parallel(n_jobs=n_jobs, prefer="threads")(
+                delayed(_haversine_block)(X, Y, out, start, start + block_size) for start in blocks
+            )
+            return out
+        # sklearn chooses the number of rows per chunk from the working memory (in MiB)
+        working_memory = block_size * len(Y) * 8 / 2**20
+        start = 0
+        for block in pairwise_distances_chunked(
+            X, Y, metric=dist_metric, n_jobs=n_jobs, working_memory=working_memory, **kwds
+        ):
+            out[start : start + len(block)] = block
+            start += len(block)
+        return out
 
     # geom_type == "LineString"
     # for LineStrings we cannot use pairwise_distance because it enforces float in its array
-    if dist_metric == "dtw":
-
-        def dtw(a, b, **kwds):
-            return similaritymeasures.dtw(a, b, **kwds)[0]
-
-        dist_metric = dtw
-    elif dist_metric == "frechet":
-        dist_metric = similaritymeasures.frechet_dist
-    else:
+    if dist_metric not in ["dtw", "frechet"]:
         raise ValueError(f"Metric '{dist_metric}' unknown. We only support ['dtw', 'frechet'] for LineStrings")
-    X = X.geometry.values
-    Y = Y.geometry.values if Y is not None else X
+    symmetric = Y is None
+    # coordinates of all LineStrings in one array -> cheap to send to the worker processes
+    X, X_offsets = _linestring_coordinates(X.geometry)
+    Y, Y_offsets = (X, X_offsets) if symmetric else _linestring_coordinates(Y.geometry)
+    n_X, n_Y = len(X_offsets) - 1, len(Y_offsets) - 1
+    # the lower bounds are only valid for the euclidean ground distance
+    prune = max_distance is not None and kwds.get("metric", "euclidean") == "euclidean" and kwds.get("p", 2) == 2
+    if block_size is None:
+        block_size = max(1, min(2**22 // max(n_Y, 1), -(-n_X // (4 * effective_n_jobs(n_jobs)))))
+
+    if max_distance is None:
+        out = _distance_matrix_out(out, (n_X, n_Y), dtype)
+        dtype = out.dtype
 
     # the following code is adapted from scikit-learn pairwise_distance
     # https://github.com/scikit-learn/scikit-learn/blob/3f89022fa04d293152f1d32fbc2a5bdaaf2df364/sklearn/metrics/pairwise.py#L1784
-    out = np.zeros((len(X), len(Y)), dtype="float")
-    if X is Y:
-        # Only calculate metric for upper triangle
-        iterator = itertools.combinations(range(len(X)), 2)
-        for i, j in iterator:
-            out[i, j] = dist_metric(X[i].coords, Y[j].coords, **kwds)
-        # Make symmetric
-        out = out + out.T
+    # blocks of rows (only the upper triangle if symmetric) are processed in parallel
+    starts = range(0, n_X, block_size)
+    blocks = Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_linestring_block)(
+            X,
+            X_offsets,
+            Y,
+            Y_offsets,
+            start,
+            min(start + block_size, n_X),
+            symmetric,
+            dist_metric,
+            max_distance,
+            prune,
+            dtype,
+            kwds,
+        )
+        for start in starts
+    )
+
+    if max_distance is None:
+        # dense blocks are written into out as they arrive
+        for start, block in zip(starts, blocks):
+            out[start : start + len(block)] = block
+        if symmetric:
+            _mirror_upper_triangle(out, block_size)
+        return out
+
+    blocks = list(blocks)
+    row, col, dist = (np.concatenate(b) for b in zip(*blocks)) if blocks else (np.zeros(0, dtype=int),) * 3
+    if symmetric:
+        # make symmetric and add the diagonal
+        diag = np.arange(n_X)
+        row, col = np.concatenate([row, col, diag]), np.concatenate([col, row, diag])
+        dist = np.concatenate([dist, dist, np.zeros(n_X)])
+    D = sparse.csr_matrix((dist.astype(dtype), (row, col)), shape=(n_X, n_Y))
+    D.sort_indices()
+    return D
+
+
+def _linestring_coordinates(geometry):
+    """Return the coordinates of all LineStrings and the offset of the first coordinate of every LineString."""
+    coords, index = shapely.get_coordinates(geometry, return_index=True)
+    offsets = np.zeros(len(geometry) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(index, minlength=len(geometry)))
+    return coords, offsets
+
+
+def _linestring_block(
+    X, X_offsets, Y, Y_offsets, start, stop, symmetric, dist_metric, max_distance, prune, dtype, kwds
+):
+    """
+    Calculate the distances between the LineStrings [start, stop) of X and the LineStrings of Y.
+
+    Parameters
+    ----------
+    X, Y : np.ndarray
+        Coordinates of all LineStrings.
+
+    X_offsets, Y_offsets : np.ndarray
+        Offset of the first coordinate of every LineString (and the total number of coordinates).
+
+    start, stop : int
+        Rows of the block.
+
+    symmetric : bool
+        If True, X and Y are the same and only the upper triangle is calculated.
+
+    dist_metric : {'dtw', 'frechet'}
+
+    max_distance : float or None
+        Only return pairs within max_distance. If None, the block is returned as dense array.
+
+    prune : bool
+        Skip pairs with lower bounds above max_distance.
+
+    dtype : np.dtype
+        The dtype of the dense block.
+
+    kwds : dict
+        Keywords passed to the distance function.
+
+    Returns
+    -------
+    block : np.ndarray
+        If max_distance is None, the distances of shape (stop - start, len(Y)). The lower triangle
+        (including the diagonal) is 0 if symmetric.
+
+    row, col, dist : np.ndarray
+        Otherwise, position in the distance matrix and distance of the pairs within max_distance.
+    """
+    rows = np.arange(start, stop)
+    cols = np.arange(len(Y_offsets) - 1)
+    if symmetric:
+        row, col = np.nonzero(rows[:, None] < cols[None, :])
     else:
-        # Calculate all cells
-        iterator = itertools.product(range(len(X)), range(len(Y)))
-        for i, j in iterator:
-            out[i, j] = dist_metric(X[i].coords, Y[j].coords, **kwds)
+        row, col = np.nonzero(np.ones((len(rows), len(cols)), dtype=bool))
+    row += start
+    if prune:
+        keep = _linestring_lower_bound(X, X_offsets, Y, Y_offsets, row, col, dist_metric) <= max_distance
+        row, col = row[keep], col[keep]
+
+    dist = np.full(len(row), np.inf)
+    for k, (i, j) in enumerate(zip(row, col)):
+        a = X[X_offsets[i] : X_offsets[i + 1]]
+        b = Y[Y_offsets[j] : Y_offsets[j + 1]]
+        if prune and _envelope_lower_bound(a, b, dist_metric) > max_distance:
+            continue
+        if dist_metric == "dtw":
+            dist[k] = similaritymeasures.dtw(a, b, **kwds)[0]
+        else:
+            dist[k] = similaritymeasures.frechet_dist(a, b, **kwds)
+    if max_distance is None:
+        block = np.zeros((stop - start, len(cols)), dtype=dtype)
+        block[row - start, col] = dist
+        return block
+    keep = dist <= max_distance
+    return row[keep], col[keep], dist[keep]
+
+
+def _linestring_lower_bound(X, X_offsets, Y, Y_offsets, row, col, dist_metric):
+    """
+    Lower bound of the 'dtw' or 'frechet' distance of the pairs (row, col) of LineStrings of X and Y.
+
+    Both distances match the first and the last points, and every point lies at least the distance
+    between the bounding boxes away from the points of the other LineString.
+    A DTW path contains at least max(len(a), len(b)) matched pairs.
+    """
+    X_first, X_last = X[X_offsets[:-1]], X[X_offsets[1:] - 1]
+    Y_first, Y_last = Y[Y_offsets[:-1]], Y[Y_offsets[1:] - 1]
+    d_first = np.linalg.norm(X_first[row] - Y_first[col], axis=1)
+    d_last = np.linalg.norm(X_last[row] - Y_last[col], axis=1)
+
+    X_min, X_max = np.minimum.reduceat(X, X_offsets[:-1]), np.maximum.reduceat(X, X_offsets[:-1])
+    Y_min, Y_max = np.minimum.reduceat(Y, Y_offsets[:-1]), np.maximum.reduceat(Y, Y_offsets[:-1])
+    gap = np.maximum(np.maximum(X_min[row] - Y_max[col], Y_min[col] - X_max[row]), 0)
+    d_box = np.linalg.norm(gap, axis=1)
+
+    if dist_metric == "dtw":
+        n_matches = np.maximum(np.diff(X_offsets)[row], np.diff(Y_offsets)[col])
+        return np.maximum(d_first + d_last, n_matches * d_box)
+    return np.maximum.reduce([d_first, d_last, d_box])
+
+
+def _envelope_lower_bound(a, b, dist_metric):
+    """
+    LB_Keogh-style lower bound of the 'dtw' or 'frechet' distance between the LineStrings a and b.
+
+    Every point is matched to at least one point of the other LineString and therefore lies at least
+    its distance to the bounding box (the envelope of an unconstrained warping window) away.
+    """
+    d_a = np.linalg.norm(np.maximum(np.maximum(b.min(axis=0) - a, a - b.max(axis=0)), 0), axis=1)
+    d_b = np.linalg.norm(np.maximum(np.maximum(a.min(axis=0) - b, b - a.max(axis=0)), 0), axis=1)
+    if dist_metric == "dtw":
+        return max(d_a.sum(), d_b.sum())
+    return max(d_a.max(), d_b.max())
+
+
+def _distance_matrix_out(out, shape, dtype):
+    """Check the shape of the provided output array or create a new one."""
+    if out is None:
+        return np.zeros(shape, dtype=dtype)
+    if out.shape != shape:
+        raise ValueError(f"out must have the shape {shape} of the distance matrix, but has shape {out.shape}.")
     return out
 
 
+def _mirror_upper_triangle(out, block_size):
+    """Copy the upper triangle of the square matrix out into its lower triangle, block_size rows at a time."""
+    for start in range(0, len(out), block_size):
+        stop = min(start + block_size, len(out))
+        out[start:stop, :start] = out[:start, start:stop].T
+        upper = np.triu(out[start:stop, start:stop], 1)
+        out[start:stop, start:stop] = upper + upper.T
+
+
+def _sparse_distance_matrix(X, Y, dist_metric, max_distance, dtype):
+    """
+    Distances between all pairs of X and Y that are at most max_distance apart.
+
+    Parameters
+    ----------
+    X, Y : np.ndarray
+        Coordinates of shape (n, 2).
+
+    dist_metric : {"haversine", "euclidean"}
+
+    max_distance : float
+        Maximal distance (in meters for "haversine").
+
+    dtype : str or np.dtype
+        The dtype of the distances.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Matrix of shape (len(X), len(Y)) with the distances of all pairs within max_distance.
+    """
+    if dist_metric == "haversine":
+        # the tree needs (lat, lon) in radians, slightly increase the radius to not miss pairs due to rounding
+        tree = BallTree(np.deg2rad(Y[:, ::-1]), metric="haversine")
+        ind = tree.query_radius(np.deg2rad(X[:, ::-1]), r=max_distance / 6371000 * (1 + 1e-6))
+    else:
+        tree = KDTree(Y)
+        ind = tree.query_radius(X, r=max_distance)
+    row = np.repeat(np.arange(len(X)), [len(i) for i in ind])
+    col = np.concatenate(ind) if len(ind) else np.zeros(0, dtype=np.intp)
+    # calculate the distances with the same functions as the dense matrix
+    if dist_metric == "haversine":
+        dist = point_haversine_dist(X[row, 0], X[row, 1], Y[col, 0], Y[col, 1])
+    else:
+        dist = np.sqrt(np.sum((X[row] - Y[col]) ** 2, axis=1))
+    within = dist <= max_distance
+    D = sparse.csr_matrix((dist[within].astype(dtype), (row[within], col[within])), shape=(len(X), len(Y)))
+    D.sort_indices()
+    return D
+
+
+def _haversine_block(X, Y, out, start, stop):
+    """Write the haversine distances between the rows [start, stop) of X and all of Y into out."""
+    block = X[start:stop]
+    out[start:stop] = point_haversine_dist(block[:, 0, None], block[:, 1, None], Y[:, 0], Y[:, 1])
+
+
 def meters_to_decimal_degrees(meters, latitude):
     """
     Convert meters to decimal degrees (approximately).
 
     Parameters
     ----------
-    meters : float
+    meters : float or np.ndarray
         The meters to convert to degrees.
 
-    latitude : float
+    latitude : float or np.ndarray
         As the conversion is dependent (approximatively) on the latitude where
         the conversion happens, this needs to be specified. Use 0 for the equator.
 
     Returns
     -------
-    float
+    float or np.ndarray
         An approximation of a distance (given in meters) in degrees.
 
     Examples
     --------
     >>> meters_to_decimal_degrees(500.0, 47.410)
     """
-    return meters / (111.32 * 1000.0 * cos(latitude * (pi / 180.0)))
+    return meters / (111.32 * 1000.0 * np.cos(latitude * (np.pi / 180.0)))
 
 
 def check_gdf_planar(gdf, transform=False):
@@ -296,24 +568,38 @@ def get_speed_positionfixes(positionfixes):
     For the first positionfix, the speed is set to the same value as for the second one.
     """
     pfs = positionfixes.copy()
-    is_planar_crs = check_gdf_planar(pfs)
+    speed = _speed_from_previous(pfs)
+    speed[0] = speed[1]  # The first point speed is imputed
+    pfs["speed"] = speed
+    return pfs
 
-    g = pfs.geometry
+
+def _speed_from_previous(positionfixes):
+    """
+    Compute the speed (in m/s) from the previous positionfix in the given order.
+
+    Parameters
+    ----------
+    positionfixes : Positionfixes
+
+    Returns
+    -------
+    np.ndarray
+        Speed per positionfix, NaN for the first positionfix.
+    """
+    g = positionfixes.geometry
     # get distance and time difference
-    if is_planar_crs:
-        dist = g.distance(g.shift(1)).to_numpy()
+    dist = np.full(len(positionfixes), np.nan)
+    if check_gdf_planar(positionfixes):
+        dist[1:] = shapely.distance(g.values[:-1], g.values[1:])
     else:
         x = g.x.to_numpy()
         y = g.y.to_numpy()
-        dist = np.zeros(len(pfs), dtype=np.float64)
         dist[1:] = point_haversine_dist(x[:-1], y[:-1], x[1:], y[1:])
 
-    time_delta = (pfs["tracked_at"] - pfs["tracked_at"].shift(1)).dt.total_seconds().to_numpy()
+    time_delta = positionfixes["tracked_at"].diff().dt.total_seconds().to_numpy()
     # compute speed (in m/s)
-    speed = dist / time_delta
-    speed[0] = speed[1]  # The first point speed is imputed
-    pfs["speed"] = speed
-    return pfs
+    return dist / time_delta
 
 
 def get_speed_triplegs(triplegs, positionfixes=None, method="tpls_speed"):
@@ -357,8 +643,25 @@ def get_speed_triplegs(triplegs, positionfixes=None, method="tpls_speed"):
             raise ValueError('Method "pfs_mean_speed" requires positionfixes as input.')
         if "tripleg_id" not in positionfixes:
             raise AttributeError('Positionfixes must include column "tripleg_id".')
-        # group positionfixes by triplegs and compute average speed for each collection of positionfixes
-        grouped_pfs = positionfixes.groupby("tripleg_id").apply(_single_tripleg_mean_speed, include_groups=False)
+        # compute the speed of all positionfixes at once, sorted by tripleg and time
+        pfs = positionfixes.loc[
+            positionfixes["tripleg_id"].notna(), ["tripleg_id", "tracked_at", positionfixes.geometry.name]
+        ]
+        pfs = pfs.sort_values(by=["tripleg_id", "tracked_at"])
+        speed = _speed_from_previous(pfs)
+        tripleg_id = pfs["tripleg_id"].to_numpy()
+        # the first positionfix of a tripleg has no previous positionfix within the tripleg
+        first = np.ones(len(pfs), dtype=bool)
+        first[1:] = tripleg_id[1:] != tripleg_id[:-1]
+        start = np.flatnonzero(first)
+        count = np.diff(start, append=len(pfs)) - 1
+        # average speed per tripleg as sum over the contiguous speeds of the tripleg
+        mean_speed = np.full(len(start), np.nan)
+        has_speed = count > 0
+        speed_start = (start - np.arange(len(start)))[has_speed]
+        if has_speed.any():
+            mean_speed[has_speed] = np.add.reduceat(speed[~first], speed_start) / count[has_speed]
+        grouped_pfs = pd.Series(mean_speed, index=tripleg_id[first])
         # add the speed values to the triplegs column
         tpls = pd.merge(triplegs, grouped_pfs.rename("speed"), how="left", left_index=True, right_index=True)
         tpls.index = tpls.index.astype("int64")
@@ -366,9 +669,3 @@ def get_speed_triplegs(triplegs, positionfixes=None, method="tpls_speed"):
 
     else:
         raise ValueError(f"Method {method} not known for speed computation.")
-
-
-def _single_tripleg_mean_speed(positionfixes):
-    pfs_sorted = positionfixes.sort_values(by="tracked_at")
-    pfs_speed = get_speed_positionfixes(pfs_sorted)
-    return np.mean(pfs_speed["speed"].values[1:])
@@ -1,4 +1,7 @@
-def spatial_filter(source, areas, method="within", re_project=False):
+import numpy as np
+
+
+def spatial_filter(source, areas, method="within", re_project=False, area_id=None):
     """
     Filter a GeoDataFrame on a geo extent. Using spatial indexing for improved performance.
 
@@ -9,7 +12,8 @@ def spatial_filter(source, areas, method="within", re_project=False):
 
     areas : GeoDataFrame
         The areas used to perform the spatial filtering. Note, you can have multiple Polygons
-        and it will return all the features intersect with ANY of those geometries.
+        and it will return all the features that fulfil 'method' with ANY of those geometries.
+        The geometries are not unioned, i.e., a feature has to fulfil 'method' with a single area.
 
     method : {'within', 'intersects', 'crosses'}, optional
         The method to filter the 'source' GeoDataFrame, by default 'within'
@@ -26,6 +30,10 @@ def spatial_filter(source, areas, method="within", re_project=False):
     re_project : bool, default False
         If this is set to True, the 'source' will be projected to the coordinate reference system of 'areas'
 
+    area_id : str, optional
+        Column of 'areas' that is added to the result to identify the matched area. A feature that matches
+        several areas is returned once per area. Per default, every feature is returned at most once.
+
     Returns
     -------
     GeoDataFrame
@@ -34,34 +42,25 @@ def spatial_filter(source, areas, method="within", re_project=False):
     Examples
     --------
     >>> sp.spatial_filter(areas, method="within", re_project=False)
+    >>> sp.spatial_filter(municipalities, method="within", area_id="municipality_id")
     """
-    gdf = source.copy()
+    if method not in ["within", "intersects", "crosses"]:
+        raise ValueError("method unknown. We only support ['within', 'intersects', 'crosses']. " f"You passed {method}")
+
+    gdf = source  # iloc and to_crs return new objects
 
     if re_project:
         init_crs = gdf.crs
         gdf = gdf.to_crs(areas.crs)
 
-    # build spatial index for pre filtering
-    source_sindex = gdf.sindex
-    possible_matches_index = []
-    for other in areas.itertuples():
-        bounds = other.geometry.bounds
-        c = list(source_sindex.intersection(bounds))
-        possible_matches_index += c
-
-    # Get unique candidates
-    unique_candidate_matches = list(set(possible_matches_index))
-    possible_matches = gdf.iloc[unique_candidate_matches]
+    # bulk query of all features against the spatial index of the areas, the predicate is evaluated in the tree
+    # -> [position in gdf, position in areas] of every matching pair, sorted by position in gdf
+    source_idx, area_idx = areas.sindex.query(gdf.geometry, predicate=method, sort=True)
 
-    # get final result
-    if method == "within":
-        ret_gdf = possible_matches.loc[possible_matches.within(areas.union_all())]
-    elif method == "intersects":
-        ret_gdf = possible_matches.loc[possible_matches.intersects(areas.union_all())]
-    elif method == "crosses":
-        ret_gdf = possible_matches.loc[possible_matches.crosses(areas.union_all())]
+    if area_id is None:
+        ret_gdf = gdf.iloc[np.unique(source_idx)]
     else:
-        raise ValueError("method unknown. We only support ['within', 'intersects', 'crosses']. " f"You passed {method}")
+        ret_gdf = gdf.iloc[source_idx].assign(**{area_id: areas[area_id].to_numpy()[area_idx]})
 
     if re_project:
         return ret_gdf.to_crs(init_crs)
@@ -2,6 +2,8 @@ import ast
 
 import geopandas as gpd
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from geopandas.geodataframe import GeoDataFrame
 from trackintel.io.from_geopandas import (
     read_locations_gpd,
@@ -16,12 +18,23 @@ from trackintel.model.util import doc, _shared_docs
 
 
 @_index_warning_default_none
-def read_positionfixes_csv(*args, columns=None, tz=None, index_col=None, geom_col="geom", crs=None, **kwargs):
+def read_positionfixes_csv(
+    *args,
+    columns=None,
+    tz=None,
+    index_col=None,
+    geom_col="geom",
+    crs=None,
+    datetime_format=None,
+    chunksize=None,
+    **kwargs,
+):
     """
     Read positionfixes from csv file.
 
     Wraps the pandas read_csv function, extracts longitude and latitude and
     builds a POINT GeoSeries, extracts datetime from column `tracked_at`.
+    Large files can be read in chunks of validated positionfixes.
 
     Parameters
     ----------
@@ -48,12 +61,27 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=None, geom_co
         by pyproj.CRS.from_user_input(), such as an authority string
         (eg 'EPSG:4326') or a WKT string.
 
+    datetime_format : str, optional
+        strftime format of `tracked_at`, e.g., "%Y-%m-%d %H:%M:%S" or "ISO8601". Parsing with a known
+        format is faster than inferring it. If None, the format is inferred.
+
+    chunksize : int, optional
+        If given, an iterator is returned that reads the file in chunks of `chunksize` rows and
+        yields a Positionfixes per chunk. Memory is then bounded by the chunk size instead of the file size.
+
     kwargs
-        Additional keyword arguments passed to pd.read_csv().
+        Additional keyword arguments passed to pd.read_csv(). With `engine="pyarrow"` the file is
+        parsed by pyarrow.
+
+        With `engine="pyarrow"` and `chunksize` the file is streamed by pyarrow instead of pd.read_csv(),
+        thus the usual pd.read_csv() options are not available. Only `sep` and `dtype` (a dict of column
+        names and dtypes) are supported, all other arguments raise a ValueError. Columns that are empty in the
+        first block of the file are read as float, pass their `dtype` if they contain other values.
 
     Returns
     -------
-    pfs : Positionfixes
+    pfs : Positionfixes or iterator of Positionfixes
+        Iterator if `chunksize` is given.
 
     Notes
     -----
@@ -73,13 +101,129 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=None, geom_co
     2     2008-10-23 02:53:15+00:00        0  POINT (116.31842 39.98469)
     3     2008-10-23 02:53:20+00:00        0  POINT (116.31839 39.98469)
     4     2008-10-23 02:53:25+00:00        0  POINT (116.31826 39.98465)
+    >>> for pfs in trackintel.read_positionfixes_csv('data.csv', chunksize=10**6, datetime_format="ISO8601"):
+    ...     pfs.to_parquet(...)
     """
     columns = {} if columns is None else columns
-
+    if chunksize is not None:
+        if kwargs.get("engine") == "pyarrow":
+            _check_pyarrow_chunks_kwargs(kwargs)
+        return _read_positionfixes_csv_chunks(
+            *args,
+            columns=columns,
+            tz=tz,
+            index_col=index_col,
+            geom_col=geom_col,
+            crs=crs,
+            datetime_format=datetime_format,
+            chunksize=chunksize,
+            **kwargs,
+        )
     df = pd.read_csv(*args, index_col=index_col, **kwargs)
+    return _positionfixes_from_csv(df, columns, tz, geom_col, crs, datetime_format)
+
+
+def _read_positionfixes_csv_chunks(*args, columns, tz, index_col, geom_col, crs, datetime_format, chunksize, **kwargs):
+    """Yield the Positionfixes of every chunk of a csv file, see read_positionfixes_csv."""
+    if kwargs.get("engine") == "pyarrow":
+        # pandas does not support chunks with the pyarrow engine -> use the streaming reader of pyarrow
+        kwargs.pop("engine")
+        for df in _read_csv_pyarrow_chunks(*args, columns=columns, index_col=index_col, chunksize=chunksize, **kwargs):
+            yield _positionfixes_from_csv(df, columns, tz, geom_col, crs, datetime_format)
+        return
+    with pd.read_csv(*args, index_col=index_col, chunksize=chunksize, **kwargs) as reader:
+        for df in reader:
+            yield _positionfixes_from_csv(df, columns, tz, geom_col, crs, datetime_format)
+
+
+def _check_pyarrow_chunks_kwargs(kwargs):
+    """Raise a ValueError for keyword arguments that are not supported by the streaming pyarrow reader."""
+    unsupported = [key for key in kwargs if key not in ["engine", "sep", "dtype"]]
+    if unsupported:
+        raise ValueError(f"The arguments {unsupported} are not supported with engine='pyarrow' and chunksize.")
+    if not isinstance(kwargs.get("dtype", {}), dict):
+        raise ValueError("dtype must be a dict of column names and dtypes with engine='pyarrow' and chunksize.")
+
+
+def _read_csv_pyarrow_chunks(filepath, columns, index_col, chunksize, sep=",", dtype=None):
+    """
+    Read a csv file with the streaming reader of pyarrow and yield DataFrames with chunksize rows.
+
+    Parameters
+    ----------
+    filepath : str or file-like object
+
+    columns : dict
+        The column names to rename, used to find the columns of the positionfixes.
+
+    index_col : str, optional
+        Column to use as index. If None, the rows are numbered continuously over all chunks.
+
+    chunksize : int
+        Number of rows per DataFrame.
+
+    sep : str, default ","
+        Delimiter of the csv file.
+
+    dtype : dict, optional
+        Dtypes of columns.
+
+    Returns
+    -------
+    iterator of pd.DataFrame
+    """
+    parse_options = pa_csv.ParseOptions(delimiter=sep)
+    # pyarrow infers the column types from the first block only and fails on later values of another type
+    # -> fix the types of the positionfixes columns and of columns that are empty in the first block
+    position = filepath.tell() if hasattr(filepath, "tell") else None
+    schema = pa_csv.open_csv(filepath, parse_options=parse_options).schema
+    if position is not None:
+        filepath.seek(position)
+    column_types = {field.name: pa.float64() for field in schema if pa.types.is_null(field.type)}
+    original = {new: old for old, new in columns.items()}
+    column_types[original.get("tracked_at", "tracked_at")] = pa.string()
+    column_types[original.get("longitude", "longitude")] = pa.float64()
+    column_types[original.get("latitude", "latitude")] = pa.float64()
+    for column, column_dtype in ({} if dtype is None else dtype).items():
+        column_dtype = pd.api.types.pandas_dtype(column_dtype)
+        if pd.api.types.is_string_dtype(column_dtype):
+            column_types[column] = pa.string()
+        else:
+            column_types[column] = pa.from_numpy_dtype(getattr(column_dtype, "numpy_dtype", column_dtype))
+
+    convert_options = pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    reader = pa_csv.open_csv(filepath, parse_options=parse_options, convert_options=convert_options)
+    start = 0
+    for table in _rechunk(reader, chunksize):
+        df = table.to_pandas()
+        if dtype is not None:
+            df = df.astype(dtype)
+        if index_col is not None:
+            df = df.set_index(index_col)
+        else:
+            df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        yield df
+
+
+def _rechunk(reader, chunksize):
+    """Collect the record batches of reader into tables with chunksize rows (the last one can be smaller)."""
+    table = pa.Table.from_batches([], schema=reader.schema)
+    for batch in reader:
+        table = pa.concat_tables([table, pa.Table.from_batches([batch])])
+        while table.num_rows >= chunksize:
+            yield table.slice(0, chunksize)
+            table = table.slice(chunksize)
+    if table.num_rows > 0:
+        yield table
+
+
+def _positionfixes_from_csv(df, columns, tz, geom_col, crs, datetime_format):
+    """Turn a DataFrame read from csv into Positionfixes, see read_positionfixes_csv."""
     df.rename(columns=columns, inplace=True)
 
-    df["tracked_at"] = pd.to_datetime(df["tracked_at"])
+    # pyarrow parses timestamps with the resolution of the data
+    df["tracked_at"] = pd.to_datetime(df["tracked_at"], format=datetime_format).dt.as_unit("ns")
     df[geom_col] = gpd.points_from_xy(df["longitude"], df["latitude"])
     df.drop(columns=["longitude", "latitude"], inplace=True)
     return read_positionfixes_gpd(df, geom_col=geom_col, crs=crs, tz=tz)
@@ -0,0 +1,215 @@
+import json
+import operator
+from functools import reduce
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from geopandas.geodataframe import GeoDataFrame
+
+from trackintel.io.from_geopandas import (
+    read_locations_gpd,
+    read_positionfixes_gpd,
+    read_staypoints_gpd,
+    read_tours_gpd,
+    read_triplegs_gpd,
+    read_trips_gpd,
+)
+from trackintel.model.util import doc, _shared_docs
+
+_point_in_time = """
+start : datetime-like, optional
+    Only read positionfixes with tracked_at >= start. Timestamps without timezone are interpreted as UTC.
+
+end : datetime-like, optional
+    Only read positionfixes with tracked_at < end. Timestamps without timezone are interpreted as UTC.
+"""
+
+_time_span = """
+start : datetime-like, optional
+    Only read {long} with finished_at >= start. Timestamps without timezone are interpreted as UTC.
+
+end : datetime-like, optional
+    Only read {long} with started_at < end. Timestamps without timezone are interpreted as UTC.
+"""
+
+
+@doc(
+    _shared_docs["read_parquet"],
+    long="positionfixes",
+    short="pfs",
+    model="Positionfixes",
+    time_filter=_point_in_time,
+)
+def read_positionfixes_parquet(path, columns=None, user_id=None, start=None, end=None, filters=None, **kwargs):
+    required_columns = ["user_id", "tracked_at"]
+    time_columns = ("tracked_at", "tracked_at")
+    df = _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs)
+    return read_positionfixes_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\npositionfixes : Positionfixes\n", long="positionfixes", short="pfs")
+def write_positionfixes_parquet(positionfixes, path, **kwargs):
+    GeoDataFrame.to_parquet(positionfixes, path, index=True, **kwargs)
+
+
+@doc(
+    _shared_docs["read_parquet"],
+    long="triplegs",
+    short="tpls",
+    model="Triplegs",
+    time_filter=_time_span.format(long="triplegs"),
+)
+def read_triplegs_parquet(path, columns=None, user_id=None, start=None, end=None, filters=None, **kwargs):
+    required_columns = ["user_id", "started_at", "finished_at"]
+    time_columns = ("started_at", "finished_at")
+    df = _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs)
+    return read_triplegs_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\ntriplegs : Triplegs\n", long="triplegs", short="tpls")
+def write_triplegs_parquet(triplegs, path, **kwargs):
+    GeoDataFrame.to_parquet(triplegs, path, index=True, **kwargs)
+
+
+@doc(
+    _shared_docs["read_parquet"],
+    long="staypoints",
+    short="sp",
+    model="Staypoints",
+    time_filter=_time_span.format(long="staypoints"),
+)
+def read_staypoints_parquet(path, columns=None, user_id=None, start=None, end=None, filters=None, **kwargs):
+    required_columns = ["user_id", "started_at", "finished_at"]
+    time_columns = ("started_at", "finished_at")
+    df = _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs)
+    return read_staypoints_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\nstaypoints : Staypoints\n", long="staypoints", short="sp")
+def write_staypoints_parquet(staypoints, path, **kwargs):
+    GeoDataFrame.to_parquet(staypoints, path, index=True, **kwargs)
+
+
+@doc(_shared_docs["read_parquet"], long="locations", short="locs", model="Locations", time_filter="")
+def read_locations_parquet(path, columns=None, user_id=None, filters=None, **kwargs):
+    required_columns = ["user_id", "center"]
+    df = _read_parquet(path, columns, required_columns, None, user_id, None, None, filters, **kwargs)
+    return read_locations_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\nlocations : Locations\n", long="locations", short="locs")
+def write_locations_parquet(locations, path, **kwargs):
+    GeoDataFrame.to_parquet(locations, path, index=True, **kwargs)
+
+
+@doc(
+    _shared_docs["read_parquet"],
+    long="trips",
+    short="trips",
+    model="Trips",
+    time_filter=_time_span.format(long="trips"),
+)
+def read_trips_parquet(path, columns=None, user_id=None, start=None, end=None, filters=None, **kwargs):
+    required_columns = ["user_id", "started_at", "finished_at", "origin_staypoint_id", "destination_staypoint_id"]
+    time_columns = ("started_at", "finished_at")
+    df = _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs)
+    return read_trips_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\ntrips : Trips\n", long="trips", short="trips")
+def write_trips_parquet(trips, path, **kwargs):
+    # static call necessary as Trips have a to_parquet method as well.
+    if isinstance(trips, GeoDataFrame):
+        GeoDataFrame.to_parquet(trips, path, index=True, **kwargs)
+    else:
+        pd.DataFrame.to_parquet(trips, path, index=True, **kwargs)
+
+
+@doc(
+    _shared_docs["read_parquet"],
+    long="tours",
+    short="tours",
+    model="Tours",
+    time_filter=_time_span.format(long="tours"),
+)
+def read_tours_parquet(path, columns=None, user_id=None, start=None, end=None, filters=None, **kwargs):
+    required_columns = ["user_id", "started_at", "finished_at"]
+    time_columns = ("started_at", "finished_at")
+    df = _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs)
+    return read_tours_gpd(df)
+
+
+@doc(_shared_docs["write_parquet"], first_arg="\ntours : Tours\n", long="tours", short="tours")
+def write_tours_parquet(tours, path, **kwargs):
+    pd.DataFrame.to_parquet(tours, path, index=True, **kwargs)
+
+
+def _read_parquet(path, columns, required_columns, time_columns, user_id, start, end, filters, **kwargs):
+    """
+    Read a (Geo)DataFrame from parquet with the required columns and the row filters applied while reading.
+
+    Parameters
+    ----------
+    path : str
+        Path to a Parquet file or a directory of Parquet files.
+
+    columns : list or None
+        Columns to read, the required columns and the geometry are added.
+
+    required_columns : list
+        Columns required by the trackintel model.
+
+    time_columns : tuple or None
+        Name of the start and end time column.
+
+    user_id, start, end, filters
+        Row filters, see the read_xyz_parquet functions.
+
+    kwargs
+        Passed to (Geo)Pandas read_parquet().
+
+    Returns
+    -------
+    DataFrame or GeoDataFrame
+        GeoDataFrame if the file contains GeoParquet metadata.
+    """
+    schema = pq.ParquetDataset(path, filesystem=kwargs.get("filesystem")).schema
+    metadata = schema.metadata or {}
+    geo_metadata = json.loads(metadata[b"geo"]) if b"geo" in metadata else None
+
+    if columns is not None:
+        if geo_metadata is not None:
+            required_columns = required_columns + [geo_metadata["primary_column"]]
+        columns = list(columns) + [c for c in dict.fromkeys(required_columns) if c not in columns]
+
+    expressions = []
+    if filters is not None:
+        expressions.append(filters if isinstance(filters, pc.Expression) else pq.filters_to_expression(filters))
+    if user_id is not None:
+        user_id = list(user_id) if pd.api.types.is_list_like(user_id) else [user_id]
+        expressions.append(pc.field("user_id").isin(user_id))
+    if start is not None:
+        expressions.append(pc.field(time_columns[1]) >= _timestamp_scalar(start, schema.field(time_columns[1]).type))
+    if end is not None:
+        expressions.append(pc.field(time_columns[0]) < _timestamp_scalar(end, schema.field(time_columns[0]).type))
+    filters = reduce(operator.and_, expressions) if expressions else None
+
+    read_parquet = gpd.read_parquet if geo_metadata is not None else pd.read_parquet
+    df = read_parquet(path, columns=columns, filters=filters, **kwargs)
+
+    # pyarrow returns list columns as numpy arrays
+    for field in schema:
+        if field.name in df.columns and (pa.types.is_list(field.type) or pa.types.is_large_list(field.type)):
+            df[field.name] = [x.tolist() if x is not None else None for x in df[field.name]]
+    return df
+
+
+def _timestamp_scalar(value, pa_type):
+    """Convert value into a pyarrow timestamp scalar with the type of the column to compare with."""
+    value = pd.Timestamp(value)
+    if value.tz is None:
+        value = value.tz_localize("UTC")
+    return pa.scalar(value, type=pa_type)
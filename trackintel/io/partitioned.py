@@ -0,0 +1,241 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from trackintel import Locations, Positionfixes, Staypoints, Tours, Triplegs, TripsDataFrame
+from trackintel.io.parquet import (
+    read_locations_parquet,
+    read_positionfixes_parquet,
+    read_staypoints_parquet,
+    read_tours_parquet,
+    read_triplegs_parquet,
+    read_trips_parquet,
+    write_locations_parquet,
+    write_positionfixes_parquet,
+    write_staypoints_parquet,
+    write_tours_parquet,
+    write_triplegs_parquet,
+    write_trips_parquet,
+)
+
+# TripsGeoDataFrame is a subclass of TripsDataFrame
+_models = {
+    "positionfixes": (Positionfixes, read_positionfixes_parquet, write_positionfixes_parquet),
+    "staypoints": (Staypoints, read_staypoints_parquet, write_staypoints_parquet),
+    "triplegs": (Triplegs, read_triplegs_parquet, write_triplegs_parquet),
+    "locations": (Locations, read_locations_parquet, write_locations_parquet),
+    "trips": (TripsDataFrame, read_trips_parquet, write_trips_parquet),
+    "tours": (Tours, read_tours_parquet, write_tours_parquet),
+}
+
+_metadata_file = "_dataset.json"  # files starting with "_" are ignored by the parquet reader
+
+
+class PartitionedDataset:
+    """
+    On-disk store of trackintel tables that are partitioned by `user_id` into directories of Parquet files.
+
+    All tables of a dataset share the same assignment of users to partitions, such that the positionfixes,
+    staypoints, triplegs, etc. of a batch of users can be loaded and processed together. Memory is then
+    bounded by the largest partition instead of the full dataset.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the dataset. An existing dataset is opened, otherwise a new one is created on the first write.
+
+    n_partitions : int, optional
+        Number of partitions of a new dataset, by default 16. Must match for an existing dataset.
+
+    partitioning : {'hash', 'range'}, optional
+        How users are assigned to partitions. If None, 'hash' for a new dataset and the stored partitioning
+        for an existing dataset.
+
+        - 'hash': by a hash of the user_id.
+        - 'range': by ranges of the sorted user_ids, such that every partition contains about the same number
+          of users of the first written table.
+
+    bounds : list, optional
+        First user_id of every partition for 'range' partitioning of a new dataset. If None, the bounds are
+        determined from the users of the first written table.
+
+    Notes
+    -----
+    Every table is stored as ``path/<table>/<partition>/<chunk>.parquet``. A write only adds files, thus a table
+    can be written in several chunks (e.g., while reading a large csv file), but writing the same rows twice
+    duplicates them. The user_id must have the same dtype in all tables for 'hash' partitioning.
+
+    Ids generated per partition (e.g., by ``generate_staypoints``) are only unique within the partition.
+
+    Examples
+    --------
+    >>> ds = ti.io.PartitionedDataset("data/geolife", n_partitions=8)
+    >>> ds.write("positionfixes", pfs)
+    >>> for pfs in ds.iter_partitions("positionfixes"):
+    ...     pfs, sp = pfs.generate_staypoints()
+    ...     ds.write("staypoints", sp)
+    ...     ds.write("positionfixes_sp", pfs)
+    >>> for pfs, sp in ds.iter_partitions("positionfixes_sp", "staypoints"):
+    ...     pfs, tpls = pfs.generate_triplegs(sp)
+    """
+
+    def __init__(self, path, n_partitions=None, partitioning=None, bounds=None):
+        if partitioning not in [None, "hash", "range"]:
+            raise ValueError(f"partitioning unknown. We only support ['hash', 'range']. You passed {partitioning}")
+        self.path = path
+        metadata_file = os.path.join(path, _metadata_file)
+        if os.path.exists(metadata_file):
+            with open(metadata_file) as f:
+                self._metadata = json.load(f)
+            if n_partitions is not None and n_partitions != self.n_partitions:
+                raise ValueError(f"The dataset at '{path}' has {self.n_partitions} partitions, not {n_partitions}.")
+            if partitioning is not None and partitioning != self.partitioning:
+                raise ValueError(f"The dataset at '{path}' uses {self.partitioning} partitioning, not {partitioning}.")
+        else:
+            partitioning = "hash" if partitioning is None else partitioning
+            if bounds is not None:
+                bounds = pd.Series(bounds).sort_values().tolist()
+                n_partitions = len(bounds) if n_partitions is None else n_partitions
+                if partitioning != "range" or len(bounds) != n_partitions:
+                    raise ValueError("bounds requires 'range' partitioning and one bound per partition.")
+            n_partitions = 16 if n_partitions is None else n_partitions
+            self._metadata = {
+                "n_partitions": n_partitions,
+                "partitioning": partitioning,
+                "bounds": bounds,
+                "tables": {},
+            }
+
+    @property
+    def n_partitions(self):
+        return self._metadata["n_partitions"]
+
+    @property
+    def partitioning(self):
+        return self._metadata["partitioning"]
+
+    @property
+    def tables(self):
+        """Names of the tables and their trackintel model."""
+        return dict(self._metadata["tables"])
+
+    def partition(self, user_id):
+        """
+        Return the partition of every user.
+
+        Parameters
+        ----------
+        user_id : array-like
+
+        Returns
+        -------
+        np.ndarray
+        """
+        user_id = np.asarray(user_id)
+        if self.partitioning == "hash":
+            # hash_array is stable between sessions, in contrast to the built-in hash
+            return (pd.util.hash_array(user_id) % np.uint64(self.n_partitions)).astype(np.int64)
+        bounds = np.asarray(self._metadata["bounds"])
+        return np.maximum(np.searchsorted(bounds, user_id, side="right") - 1, 0)
+
+    def write(self, name, data):
+        """
+        Add the rows of a trackintel table to the partitions of its users.
+
+        Parameters
+        ----------
+        name : str
+            Name of the table, e.g., 'positionfixes'.
+
+        data : Positionfixes, Staypoints, Triplegs, Locations, Trips or Tours
+            The rows to add. The model must match the model of the existing table.
+        """
+        model = _model_name(data)
+        tables = self._metadata["tables"]
+        if tables.setdefault(name, model) != model:
+            raise ValueError(f"Table '{name}' contains {tables[name]} and not {model}.")
+        if self.partitioning == "range" and self._metadata["bounds"] is None:
+            # split the users of the first table into equally sized ranges
+            users = np.unique(data["user_id"])
+            splits = np.array_split(users, min(self.n_partitions, len(users)))
+            # tolist converts numpy scalars (e.g., int64) into Python objects that can be stored as json
+            self._metadata["bounds"] = pd.Series([s[0] for s in splits]).tolist()
+
+        write_parquet = _models[model][2]
+        for partition, rows in data.groupby(self.partition(data["user_id"])).indices.items():
+            directory = self._partition_path(name, partition)
+            os.makedirs(directory, exist_ok=True)
+            chunk = len([f for f in os.listdir(directory) if f.endswith(".parquet")])
+            write_parquet(data.iloc[rows], os.path.join(directory, f"{chunk:05d}.parquet"))
+        self._write_metadata()
+
+    def read(self, name, partition=None, **kwargs):
+        """
+        Read a table or one partition of it.
+
+        Parameters
+        ----------
+        name : str
+            Name of the table.
+
+        partition : int, optional
+            Only read this partition. If None the whole table is read.
+
+        kwargs
+            Additional keyword arguments passed to the read_xyz_parquet function of the model of the table,
+            e.g., `columns`, `user_id`, `start` or `end`.
+
+        Returns
+        -------
+        Positionfixes, Staypoints, Triplegs, Locations, Trips or Tours
+            None if the partition does not contain any rows.
+        """
+        if name not in self._metadata["tables"]:
+            raise KeyError(f"Table '{name}' not found. The dataset contains {list(self._metadata['tables'])}.")
+        path = os.path.join(self.path, name) if partition is None else self._partition_path(name, partition)
+        if not os.path.isdir(path):
+            return None
+        read_parquet = _models[self._metadata["tables"][name]][1]
+        return read_parquet(path, **kwargs)
+
+    def iter_partitions(self, *names, **kwargs):
+        """
+        Lazily iterate over the partitions and load the tables of one batch of users at a time.
+
+        Parameters
+        ----------
+        names : str
+            Name of the table(s) to load.
+
+        kwargs
+            Additional keyword arguments passed to the read_xyz_parquet functions.
+
+        Yields
+        ------
+        Positionfixes, Staypoints, Triplegs, Locations, Trips, Tours or tuple of those
+            The tables of one partition. Partitions without rows of the first table are skipped, other
+            tables are None if the partition does not contain rows of them.
+        """
+        for partition in range(self.n_partitions):
+            if not os.path.isdir(self._partition_path(names[0], partition)):
+                continue
+            tables = tuple(self.read(name, partition=partition, **kwargs) for name in names)
+            yield tables[0] if len(tables) == 1 else tables
+
+    def _partition_path(self, name, partition):
+        return os.path.join(self.path, name, f"{partition:05d}")
+
+    def _write_metadata(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, _metadata_file), "w") as f:
+            json.dump(self._metadata, f)
+
+
+def _model_name(data):
+    """Return the name of the trackintel model of data."""
+    for name, (model, _, _) in _models.items():
+        if isinstance(data, model):
+            return name
+    raise TypeError(f"Only trackintel models can be written to a PartitionedDataset, not {type(data).__name__}.")
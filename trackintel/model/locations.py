@@ -57,16 +57,20 @@ class Locations(TrackintelBase, TrackintelGeoDataFrame):
     def to_csv(self, filename, *args, **kwargs):
         ti.io.write_locations_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="locations", short="locs")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_locations_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="locations", short="locs")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
     ):
         ti.io.write_locations_postgis(self, name, con, schema, if_exists, index, index_label, chunksize, dtype)
 
-    def spatial_filter(self, areas, method="within", re_project=False):
+    def spatial_filter(self, areas, method="within", re_project=False, area_id=None):
         """
         Filter Locations on a geo extent.
 
         See :func:`trackintel.geogr.spatial_filter` for full documentation.
         """
-        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project)
+        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project, area_id=area_id)
@@ -91,6 +91,7 @@ class Positionfixes(TrackintelBase, TrackintelGeoDataFrame, gpd.GeoDataFrame):
         print_progress=False,
         exclude_duplicate_pfs=True,
         n_jobs=1,
+        engine="numpy",
     ):
         """
         Generate staypoints based on positionfixes.
@@ -108,8 +109,17 @@ class Positionfixes(TrackintelBase, TrackintelGeoDataFrame, gpd.GeoDataFrame):
             print_progress=print_progress,
             exclude_duplicate_pfs=exclude_duplicate_pfs,
             n_jobs=n_jobs,
+            engine=engine,
         )
 
+    def drop_duplicate_fixes(self, subset=None, keep="first"):
+        """
+        Drop duplicate positionfixes.
+
+        See :func:`trackintel.preprocessing.drop_duplicate_fixes` for full documentation.
+        """
+        return ti.preprocessing.drop_duplicate_fixes(self, subset=subset, keep=keep)
+
     def generate_triplegs(
         self,
         staypoints=None,
@@ -136,19 +146,25 @@ class Positionfixes(TrackintelBase, TrackintelGeoDataFrame, gpd.GeoDataFrame):
         """
         ti.io.write_positionfixes_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="positionfixes", short="pfs")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_positionfixes_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="positionfixes", short="pfs")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
     ):
         ti.io.write_positionfixes_postgis(self, name, con, schema, if_exists, index, index_label, chunksize, dtype)
 
-    def calculate_distance_matrix(self, Y=None, dist_metric="haversine", n_jobs=0, **kwds):
+    def calculate_distance_matrix(self, Y=None, dist_metric="haversine", n_jobs=0, max_distance=None, **kwds):
         """
         Calculate a distance matrix based on a specific distance metric.
 
         See :func:`trackintel.geogr.calculate_distance_matrix` for full documentation.
         """
-        return ti.geogr.calculate_distance_matrix(self, Y=Y, dist_metric=dist_metric, n_jobs=n_jobs, **kwds)
+        return ti.geogr.calculate_distance_matrix(
+            self, Y=Y, dist_metric=dist_metric, n_jobs=n_jobs, max_distance=max_distance, **kwds
+        )
 
     def get_speed(self):
         """
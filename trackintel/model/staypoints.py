@@ -90,6 +90,9 @@ class Staypoints(TrackintelBase, TrackintelGeoDataFrame):
         activities_only=False,
         print_progress=False,
         n_jobs=1,
+        precision=None,
+        tile_size=None,
+        add_extent=True,
     ):
         """
         Generate locations from the staypoints.
@@ -106,6 +109,35 @@ class Staypoints(TrackintelBase, TrackintelGeoDataFrame):
             activities_only=activities_only,
             print_progress=print_progress,
             n_jobs=n_jobs,
+            precision=precision,
+            tile_size=tile_size,
+            add_extent=add_extent,
+        )
+
+    def assign_locations(
+        self,
+        locations,
+        epsilon=100,
+        num_samples=1,
+        distance_metric="haversine",
+        agg_level="user",
+        print_progress=False,
+        n_jobs=1,
+    ):
+        """
+        Assign staypoints to existing locations and generate new locations from the remaining staypoints.
+
+        See :func:`trackintel.preprocessing.assign_locations` for full documentation.
+        """
+        return ti.preprocessing.assign_locations(
+            self,
+            locations,
+            epsilon=epsilon,
+            num_samples=num_samples,
+            distance_metric=distance_metric,
+            agg_level=agg_level,
+            print_progress=print_progress,
+            n_jobs=n_jobs,
         )
 
     def merge_staypoints(self, triplegs, max_time_gap="10min", agg={}):
@@ -126,18 +158,32 @@ class Staypoints(TrackintelBase, TrackintelGeoDataFrame):
             self, method=method, time_threshold=time_threshold, activity_column_name=activity_column_name
         )
 
-    def spatial_filter(self, areas, method="within", re_project=False):
+    def calculate_distance_matrix(self, Y=None, dist_metric="haversine", n_jobs=0, max_distance=None, **kwds):
+        """
+        Calculate a distance matrix based on a specific distance metric.
+
+        See :func:`trackintel.geogr.calculate_distance_matrix` for full documentation.
+        """
+        return ti.geogr.calculate_distance_matrix(
+            self, Y=Y, dist_metric=dist_metric, n_jobs=n_jobs, max_distance=max_distance, **kwds
+        )
+
+    def spatial_filter(self, areas, method="within", re_project=False, area_id=None):
         """
         Filter Staypoints on a geo extent.
 
         See :func:`trackintel.geogr.spatial_filter` for full documentation.
         """
-        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project)
+        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project, area_id=area_id)
 
     @doc(_shared_docs["write_csv"], first_arg="", long="staypoints", short="sp")
     def to_csv(self, filename, *args, **kwargs):
         ti.io.write_staypoints_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="staypoints", short="sp")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_staypoints_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="staypoints", short="sp")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
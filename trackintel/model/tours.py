@@ -66,6 +66,10 @@ class Tours(TrackintelBase, TrackintelDataFrame):
     def to_csv(self, filename, *args, **kwargs):
         ti.io.write_tours_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="tours", short="tours")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_tours_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="tours", short="tours")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
@@ -75,6 +75,10 @@ class Triplegs(TrackintelBase, TrackintelGeoDataFrame):
     def to_csv(self, filename, *args, **kwargs):
         ti.io.write_triplegs_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="triplegs", short="tpls")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_triplegs_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="triplegs", short="tpls")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
@@ -89,13 +93,13 @@ class Triplegs(TrackintelBase, TrackintelGeoDataFrame):
         """
         return ti.geogr.calculate_distance_matrix(self, Y=Y, dist_metric=dist_metric, n_jobs=n_jobs, **kwds)
 
-    def spatial_filter(self, areas, method="within", re_project=False):
+    def spatial_filter(self, areas, method="within", re_project=False, area_id=None):
         """
         Filter Triplegs on a geo extent.
 
         See :func:`trackintel.geogr.spatial_filter` for full documentation.
         """
-        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project)
+        return ti.geogr.spatial_filter(self, areas, method=method, re_project=re_project, area_id=area_id)
 
     def generate_trips(self, staypoints, gap_threshold=15, add_geometry=True):
         """
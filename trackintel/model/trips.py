@@ -114,6 +114,10 @@ class TripsDataFrame(TrackintelBase, TrackintelDataFrame):
     def to_csv(self, filename, *args, **kwargs):
         ti.io.write_trips_csv(self, filename, *args, **kwargs)
 
+    @doc(_shared_docs["write_parquet"], first_arg="", long="trips", short="trips")
+    def to_parquet(self, path, **kwargs):
+        ti.io.write_trips_parquet(self, path, **kwargs)
+
     @doc(_shared_docs["write_postgis"], first_arg="", long="trips", short="trips")
     def to_postgis(
         self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
@@ -234,3 +234,60 @@ Examples
 --------
 >>> {short}.to_csv("export_{long}.csv")
 """
+
+_shared_docs[
+    "write_parquet"
+] = """
+Write {long} to a GeoParquet file.
+
+Wraps the (Geo)Pandas to_parquet function. Geometries are stored as WKB, while timezone aware timestamps,
+nullable integers and list columns keep their dtype. The index is always written.
+
+Parameters
+----------{first_arg}
+path : str
+    The file to write to.
+
+kwargs
+    Additional keyword arguments passed to (Geo)DataFrame.to_parquet(), e.g., `compression`.
+
+Examples
+--------
+>>> {short}.to_parquet("export_{long}.parquet")
+>>> ti.io.write_{long}_parquet({short}, "export_{long}.parquet")
+"""
+
+_shared_docs[
+    "read_parquet"
+] = """
+Read {long} from a GeoParquet file.
+
+Wraps the (Geo)Pandas read_parquet function. Row filters are applied while reading,
+such that only the matching rows are loaded into memory.
+
+Parameters
+----------
+path : str
+    Path to a Parquet file or a directory of Parquet files.
+
+columns : list, optional
+    Columns to read. The columns required for {long} (and the geometry) are always read.
+    If None, all columns are read.
+
+user_id : scalar or list, optional
+    Only read the {long} of these users.
+{time_filter}
+filters : pyarrow.compute.Expression or list of tuples, optional
+    Further row filters, see `pyarrow.parquet.read_table`.
+
+kwargs
+    Additional keyword arguments passed to (Geo)Pandas read_parquet().
+
+Returns
+-------
+{short} : {model}
+
+Examples
+--------
+>>> ti.io.read_{long}_parquet("{long}.parquet", user_id=[0, 1])
+"""
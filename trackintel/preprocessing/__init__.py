@@ -1,10 +1,13 @@
 from .positionfixes import generate_staypoints
 from .positionfixes import generate_triplegs
+from .positionfixes import StaypointDetector
+from .positionfixes import drop_duplicate_fixes
 
 from .util import calc_temp_overlap
 from .util import applyParallel
 
 from .staypoints import generate_locations
+from .staypoints import assign_locations
 from .staypoints import merge_staypoints
 
 from .triplegs import generate_trips
@@ -14,7 +17,10 @@ from .trips import generate_tours
 __all__ = [
     "generate_staypoints",
     "generate_triplegs",
+    "StaypointDetector",
+    "drop_duplicate_fixes",
     "generate_locations",
+    "assign_locations",
     "merge_staypoints",
     "generate_trips",
     "generate_tours",
@@ -4,11 +4,13 @@ import warnings
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely.geometry import LineString
+import shapely
+from joblib import Parallel, delayed
+from tqdm import tqdm
 
 from trackintel import Positionfixes, Staypoints, Triplegs
 from trackintel.geogr import check_gdf_planar, point_haversine_dist
-from trackintel.preprocessing.util import _explode_agg, angle_centroid_multipoints, applyParallel
+from trackintel.preprocessing.util import _offset_rows, applyParallel, grouped_centroid
 
 
 def generate_staypoints(
@@ -22,6 +24,7 @@ def generate_staypoints(
     print_progress=False,
     exclude_duplicate_pfs=True,
     n_jobs=1,
+    engine="numpy",
 ):
     """
     Generate staypoints from positionfixes.
@@ -58,7 +61,8 @@ def generate_staypoints(
         Show per-user progress if set to True.
 
     exclude_duplicate_pfs: boolean, default True
-        Filters duplicate positionfixes before generating staypoints. Duplicates can lead to problems in later
+        Filters duplicate positionfixes (same user, time and location) before generating staypoints, see
+        :func:`trackintel.preprocessing.drop_duplicate_fixes`. Duplicates can lead to problems in later
         processing steps (e.g., when generating triplegs). It is not recommended to set this to False.
 
     n_jobs: int, default 1
@@ -67,6 +71,12 @@ def generate_staypoints(
         https://joblib.readthedocs.io/en/latest/parallel.html#parallel-reference-documentation
         for a detailed description
 
+    engine: {'numpy', 'python'}, default 'numpy'
+        Implementation of the 'sliding' method. 'numpy' runs an array-native kernel per user that only
+        emits the start and end of each staypoint and aggregates all staypoint attributes afterwards in one
+        vectorized pass. 'python' creates every staypoint within the per-user loop. Both engines yield the same
+        staypoints.
+
     Returns
     -------
     pfs: Positionfixes
@@ -101,9 +111,7 @@ def generate_staypoints(
     pfs = positionfixes.copy()
 
     if exclude_duplicate_pfs:
-        len_org = pfs.shape[0]
-        pfs = pfs.drop_duplicates()
-        nb_dropped = len_org - pfs.shape[0]
+        pfs, nb_dropped = drop_duplicate_fixes(pfs)
         if nb_dropped > 0:
             warn_str = (
                 f"{nb_dropped} duplicates were dropped from your positionfixes. Dropping duplicates is"
@@ -123,8 +131,25 @@ def generate_staypoints(
     else:
         sp_column = ["user_id", "started_at", "finished_at", geo_col]
 
+    if engine not in ["numpy", "python"]:
+        raise ValueError(f"engine unknown. We only support ['numpy', 'python']. You passed {engine}")
+
     # TODO: tests using a different distance function, e.g., L2 distance
-    if method == "sliding":
+    if method == "sliding" and engine == "numpy":
+        # Algorithm from Li et al. (2008) on plain arrays.
+        sp, pfs, _ = _generate_staypoints_sliding_numpy(
+            pfs,
+            geo_col=geo_col,
+            elevation_flag=elevation_flag,
+            dist_threshold=dist_threshold,
+            time_threshold=time_threshold,
+            gap_threshold=gap_threshold,
+            distance_metric=distance_metric,
+            include_last=include_last,
+            print_progress=print_progress,
+            n_jobs=n_jobs,
+        )
+    elif method == "sliding":
         # Algorithm from Li et al. (2008). For details, please refer to the paper.
         sp = applyParallel(
             pfs.groupby("user_id", as_index=False),
@@ -141,12 +166,20 @@ def generate_staypoints(
         ).reset_index(drop=True)
 
         # index management
-        sp["staypoint_id"] = sp.index
         sp.index.name = "id"
 
-        if "pfs_id" not in sp.columns:
-            sp["pfs_id"] = None
-        pfs = _explode_agg("pfs_id", "staypoint_id", pfs, sp)
+        if "first_row" not in sp.columns:
+            sp["first_row"] = sp["last_row"] = pd.Series(dtype="int64")
+        # user level rows of the staypoints -> rows in pfs ordered by user and time
+        order, _, _ = _sliding_order(pfs)
+        user_size = pfs.groupby("user_id").size()
+        user_offset = sp["user_id"].map(user_size.cumsum() - user_size).to_numpy(dtype="int64")
+        sp_id, rows = _offset_rows(
+            sp["first_row"].to_numpy(dtype="int64") + user_offset, sp["last_row"].to_numpy(dtype="int64") + user_offset
+        )
+        staypoint_id = pd.Series(pd.NA, index=pfs.index, dtype="Int64")
+        staypoint_id.iloc[order[rows]] = sp_id
+        pfs["staypoint_id"] = staypoint_id
     sp = gpd.GeoDataFrame(sp, columns=sp_column, geometry=geo_col, crs=pfs.crs)
 
     ## dtype consistency
@@ -165,6 +198,215 @@ def generate_staypoints(
     return pfs, Staypoints(sp)
 
 
+def drop_duplicate_fixes(positionfixes, subset=None, keep="first"):
+    """
+    Drop duplicate positionfixes.
+
+    Duplicates are detected by hashing plain key arrays. The geometry is compared by its coordinates, thus
+    no shapely objects and no other columns (e.g., accuracy or speed) have to be hashed.
+
+    Parameters
+    ----------
+    positionfixes : Positionfixes
+
+    subset : list of str, optional
+        The columns that identify a positionfix, the geometry column is compared by its x and y coordinates.
+        Defaults to ``['user_id', 'tracked_at', <geometry column>]``.
+
+    keep : {'first', 'last'}, default 'first'
+        Which of the duplicated positionfixes to keep.
+
+    Returns
+    -------
+    pfs: Positionfixes
+        The positionfixes without duplicates.
+
+    nb_dropped: int
+        The number of dropped positionfixes.
+
+    Examples
+    --------
+    >>> pfs, nb_dropped = pfs.drop_duplicate_fixes()
+    >>> pfs, nb_dropped = ti.preprocessing.drop_duplicate_fixes(pfs, subset=["user_id", "tracked_at"])
+    """
+    Positionfixes.validate(positionfixes)
+    geo_col = positionfixes.geometry.name
+    if subset is None:
+        subset = ["user_id", "tracked_at", geo_col]
+    missing = [col for col in subset if col not in positionfixes.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} of subset are not in positionfixes.")
+
+    keys = {}
+    for col in subset:
+        if col == geo_col:
+            keys["__x"] = positionfixes.geometry.x.to_numpy()
+            keys["__y"] = positionfixes.geometry.y.to_numpy()
+        elif isinstance(positionfixes[col].dtype, pd.DatetimeTZDtype):
+            keys[col] = positionfixes[col].dt.as_unit("ns").astype("int64").to_numpy()
+        else:
+            keys[col] = positionfixes[col].array
+    duplicated = pd.DataFrame(keys).duplicated(keep=keep).to_numpy()
+    return positionfixes.take(np.flatnonzero(~duplicated)), int(duplicated.sum())
+
+
+class StaypointDetector:
+    """
+    Stateful staypoint generation for positionfixes that arrive in successive chunks.
+
+    Applies the 'sliding' method of :func:`trackintel.preprocessing.generate_staypoints` in a streaming
+    fashion. Between calls only the positionfixes of the still open sliding window of every user are kept,
+    thus memory is bounded by the open windows and the current chunk instead of the full history.
+
+    Parameters
+    ----------
+    distance_metric : {'haversine'}
+        The distance metric used by the applied method.
+
+    dist_threshold : float, default 100
+        The distance threshold in meters, see :func:`trackintel.preprocessing.generate_staypoints`.
+
+    time_threshold : float, default 5.0 (minutes)
+        The time threshold in minutes, see :func:`trackintel.preprocessing.generate_staypoints`.
+
+    gap_threshold : float, default 15.0 (minutes)
+        The gap threshold in minutes, see :func:`trackintel.preprocessing.generate_staypoints`.
+
+    n_jobs: int, default 1
+        The maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given, no parallel
+        computing code is used at all, which is useful for debugging.
+
+    exclude_duplicate_pfs: boolean, default True
+        If True, duplicate positionfixes are dropped from every chunk (together with the open sliding windows)
+        before staypoints are generated, see :func:`trackintel.preprocessing.drop_duplicate_fixes`.
+
+    Notes
+    -----
+    The chunks must arrive in chronological order per user. Concatenating the results of all ``update()`` calls
+    and the final ``flush()`` yields the same staypoints as calling ``generate_staypoints(include_last=True)``
+    on all positionfixes at once. Staypoint ids are unique over the whole stream.
+
+    Duplicates are only detected within a chunk and the open sliding windows. A duplicate of a positionfix that
+    already left the open windows is not dropped, this can only happen if the chunks overlap in time.
+
+    Examples
+    --------
+    >>> detector = StaypointDetector(dist_threshold=100, time_threshold=5.0)
+    >>> for chunk in chunks:
+    ...     pfs, sp = detector.update(chunk)
+    >>> pfs, sp = detector.flush()
+    """
+
+    def __init__(
+        self,
+        distance_metric="haversine",
+        dist_threshold=100,
+        time_threshold=5.0,
+        gap_threshold=15.0,
+        n_jobs=1,
+        exclude_duplicate_pfs=True,
+    ):
+        if distance_metric != "haversine":
+            raise ValueError("distance_metric unknown. We only support ['haversine']. " f"You passed {distance_metric}")
+        self.distance_metric = distance_metric
+        self.dist_threshold = dist_threshold
+        self.time_threshold = time_threshold
+        self.gap_threshold = gap_threshold
+        self.n_jobs = n_jobs
+        self.exclude_duplicate_pfs = exclude_duplicate_pfs
+        # positionfixes of the open sliding windows and the next free staypoint id
+        self._window = None
+        self._next_id = 0
+
+    def update(self, positionfixes):
+        """
+        Process the next chunk of positionfixes.
+
+        Parameters
+        ----------
+        positionfixes : Positionfixes
+
+        Returns
+        -------
+        pfs: Positionfixes
+            All positionfixes that left the open sliding windows with a new column ``[`staypoint_id`]``.
+
+        sp: Staypoints
+            The staypoints that got finished with this chunk.
+        """
+        Positionfixes.validate(positionfixes)
+        pfs = positionfixes.copy()
+        if "staypoint_id" in pfs:
+            pfs.drop(columns="staypoint_id", inplace=True)
+        if self._window is not None:
+            pfs = pd.concat([self._window, pfs])
+        if self.exclude_duplicate_pfs:
+            pfs, nb_dropped = drop_duplicate_fixes(pfs)
+            if nb_dropped > 0:
+                warn_str = (
+                    f"{nb_dropped} duplicates were dropped from your positionfixes. Dropping duplicates is"
+                    + " recommended but can be prevented using the 'exclude_duplicate_pfs' flag."
+                )
+                warnings.warn(warn_str)
+        return self._detect(pfs, include_last=False)
+
+    def flush(self):
+        """
+        Finish all open sliding windows, this corresponds to ``include_last=True``.
+
+        The detector is reset afterwards and can be reused for new chunks (staypoint ids continue).
+
+        Returns
+        -------
+        pfs: Positionfixes
+            The positionfixes of the open sliding windows with a new column ``[`staypoint_id`]``.
+
+        sp: Staypoints
+            The last staypoint of every user (if long enough).
+        """
+        if self._window is None:
+            raise RuntimeError("No open sliding windows, call update() first.")
+        pfs, sp = self._detect(self._window, include_last=True)
+        self._window = None
+        return pfs, sp
+
+    def _detect(self, pfs, include_last):
+        """Run the sliding kernel on pfs, keep the open windows and return everything that got finished."""
+        geo_col = pfs.geometry.name
+        elevation_flag = "elevation" in pfs.columns
+        sp, pfs, is_open = _generate_staypoints_sliding_numpy(
+            pfs,
+            geo_col=geo_col,
+            elevation_flag=elevation_flag,
+            dist_threshold=self.dist_threshold,
+            time_threshold=self.time_threshold,
+            gap_threshold=self.gap_threshold,
+            distance_metric=self.distance_metric,
+            include_last=include_last,
+            print_progress=False,
+            n_jobs=self.n_jobs,
+        )
+        if not include_last:
+            self._window = pfs[is_open].drop(columns="staypoint_id")
+            pfs = pfs[~is_open].copy()
+
+        if elevation_flag:
+            sp_column = ["user_id", "started_at", "finished_at", "elevation", geo_col]
+        else:
+            sp_column = ["user_id", "started_at", "finished_at", geo_col]
+        sp = gpd.GeoDataFrame(sp, columns=sp_column, geometry=geo_col, crs=pfs.crs)
+
+        # continue ids from previous calls
+        sp.index = sp.index.astype("int64") + self._next_id
+        pfs["staypoint_id"] = pfs["staypoint_id"] + self._next_id
+        self._next_id += len(sp)
+        sp["user_id"] = sp["user_id"].astype(pfs["user_id"].dtype)
+
+        if len(sp) == 0:
+            return pfs, sp
+        return pfs, Staypoints(sp)
+
+
 def generate_triplegs(
     positionfixes,
     staypoints=None,
@@ -252,33 +494,9 @@ def generate_triplegs(
             DeprecationWarning,
         )
 
-        # initialize the index list of pfs where a tpl will begin
-        insert_index_ls = []
-        pfs["staypoint_id"] = pd.Series(dtype="Int64")
-
-        for user_id_this in pfs["user_id"].unique():
-            sp_user = staypoints[staypoints["user_id"] == user_id_this]
-            pfs_user = pfs[pfs["user_id"] == user_id_this]
-
-            # step 1
-            # All positionfixes with timestamp between staypoints are assigned the value 0
-            # Intersect all positionfixes of a user with all staypoints of the same user
-            intervals = pd.IntervalIndex.from_arrays(sp_user["started_at"], sp_user["finished_at"], closed="left")
-            is_in_interval = pfs_user["tracked_at"].apply(lambda x: intervals.contains(x).any()).astype("bool")
-            pfs.loc[is_in_interval[is_in_interval].index, "staypoint_id"] = 0
-
-            # step 2
-            # Identify first positionfix after a staypoint
-            # find index of closest positionfix with equal or greater timestamp.
-            tracked_at_sorted = pfs_user["tracked_at"].sort_values()
-            insert_position_user = tracked_at_sorted.searchsorted(sp_user["finished_at"])
-            insert_index_user = tracked_at_sorted.iloc[insert_position_user].index
-
-            # store the insert insert_position_user in an array
-            insert_index_ls.extend(list(insert_index_user))
-        #
-        cond_staypoints_case2 = pd.Series(False, index=pfs.index)
-        cond_staypoints_case2.loc[insert_index_ls] = True
+        # step 1 and 2 are sort based interval joins over all users at once
+        pfs["staypoint_id"], is_first_after_sp = _match_staypoints_by_time(pfs, staypoints)
+        cond_staypoints_case2 = pd.Series(is_first_after_sp, index=pfs.index)
 
     # initialize tripleg_id with pd.NA and fill all pfs that belong to staypoints with -1
     # pd.NA will be replaced later with tripleg ids
@@ -368,10 +586,9 @@ def generate_triplegs(
             user_id=("user_id", "first"),
             started_at=("tracked_at", "min"),
             finished_at=("tracked_at", "max"),
-            geom=(pfs.geometry.name, lambda x: LineString(x.tolist())),
         )
-        tpls = tpls.set_geometry("geom")
-        tpls.crs = pfs.crs
+        tpls["geom"] = _create_linestrings(pfs["tripleg_id"], pfs.geometry)
+        tpls = tpls.set_geometry("geom", crs=pfs.crs)
     elif method == "overlap_staypoints":
         tpls, pfs = _generate_triplegs_overlap_staypoints(cond_temporal_gap, pfs, staypoints)
 
@@ -392,7 +609,53 @@ def generate_triplegs(
         warnings.warn("No triplegs can be generated, returning empty tpls.")
         return pfs, tpls
 
-    return pfs, Triplegs(tpls)
+    # geometries are already validated in bulk by _drop_invalid_triplegs
+    return pfs, Triplegs(tpls, validate=False)
+
+
+def _match_staypoints_by_time(pfs, staypoints):
+    """Match positionfixes and staypoints of the same user by time.
+
+    Parameters
+    ----------
+    pfs : Positionfixes
+
+    staypoints : Staypoints
+
+    Returns
+    -------
+    staypoint_id : pd.Series
+        Id of the staypoint whose interval [started_at, finished_at) contains the positionfix, pd.NA otherwise.
+
+    is_first_after_sp : np.ndarray
+        Boolean mask of the positionfixes that are the first positionfix at or after the end of a staypoint.
+    """
+    # common integer codes for users, missing user ids (-1) are never matched
+    user_codes, _ = pd.factorize(pd.concat([pfs["user_id"], staypoints["user_id"]], ignore_index=True))
+    pfs_user, sp_user = user_codes[: len(pfs)], user_codes[len(pfs) :]
+
+    def _to_ns(s):
+        return s.dt.tz_convert("UTC").dt.as_unit("ns").astype("int64").to_numpy()
+
+    pfs_time = pd.DataFrame({"user": pfs_user, "t": _to_ns(pfs["tracked_at"]), "pfs_pos": np.arange(len(pfs))})
+    pfs_time = pfs_time[pfs_user > -1].sort_values("t", kind="stable")
+    sp_finished = _to_ns(staypoints["finished_at"])
+    sp_time = pd.DataFrame({"user": sp_user, "t": _to_ns(staypoints["started_at"]), "sp_pos": np.arange(len(sp_user))})
+    sp_time = sp_time[sp_user > -1]
+
+    # step 1: last staypoint that started before the pfs, pfs is contained if it is before the end
+    contained = pd.merge_asof(pfs_time, sp_time.sort_values("t"), on="t", by="user", direction="backward")
+    sp_pos = contained["sp_pos"].fillna(-1).to_numpy(dtype="int64")
+    is_in_sp = (sp_pos > -1) & (contained["t"].to_numpy() < sp_finished[sp_pos])
+    staypoint_id = pd.Series(pd.NA, index=pfs.index, dtype="Int64")
+    staypoint_id.iloc[contained["pfs_pos"].to_numpy()[is_in_sp]] = staypoints.index.to_numpy()[sp_pos[is_in_sp]]
+
+    # step 2: first pfs with timestamp equal or greater than the end of the staypoint
+    sp_time["t"] = sp_finished[sp_time["sp_pos"].to_numpy()]
+    after = pd.merge_asof(sp_time.sort_values("t"), pfs_time, on="t", by="user", direction="forward")
+    is_first_after_sp = np.zeros(len(pfs), dtype=bool)
+    is_first_after_sp[after["pfs_pos"].dropna().to_numpy(dtype="int64")] = True
+    return staypoint_id, is_first_after_sp
 
 
 def _generate_triplegs_overlap_staypoints(cond_temporal_gap, pfs, staypoints):
@@ -449,13 +712,37 @@ def _generate_triplegs_overlap_staypoints(cond_temporal_gap, pfs, staypoints):
     ].geometry.values
 
     # create and set tripleg geometries
-    tpls["geom"] = pfs_copy.groupby("tripleg_id")[pfs_copy.geometry.name].apply(lambda x: LineString(x))
-    tpls = tpls.set_geometry("geom")
-    tpls.crs = pfs.crs
+    tpls["geom"] = _create_linestrings(pfs_copy["tripleg_id"], pfs_copy.geometry)
+    tpls = tpls.set_geometry("geom", crs=pfs.crs)
 
     return tpls, pfs
 
 
+def _create_linestrings(tripleg_id, geometry):
+    """Create the LineStrings of all triplegs in one vectorized call.
+
+    Parameters
+    ----------
+    tripleg_id : pd.Series
+        Tripleg of every positionfix, pd.NA for positionfixes without tripleg.
+
+    geometry : GeoSeries
+        Points of the positionfixes, in order of the tripleg geometry.
+
+    Returns
+    -------
+    pd.Series
+        The LineString of every tripleg indexed by tripleg id.
+    """
+    has_tpl = tripleg_id.notna().to_numpy()
+    tpls_ids, index = np.unique(tripleg_id[has_tpl].to_numpy(dtype="int64"), return_inverse=True)
+    # keep order of positionfixes within a tripleg
+    order = np.argsort(index, kind="stable")
+    coords = shapely.get_coordinates(geometry[has_tpl], include_z=bool(geometry.has_z.any()))
+    lines = shapely.linestrings(coords[order], indices=index[order])
+    return pd.Series(lines, index=tpls_ids)
+
+
 def _generate_staypoints_sliding_user(
     df,
     geo_col,
@@ -496,7 +783,7 @@ def _generate_staypoints_sliding_user(
         if delta_dist >= dist_threshold:
             # we want the staypoint to have long enough duration
             if (df["tracked_at"].iloc[curr] - df["tracked_at"].iloc[start]) >= time_threshold:
-                ret_sp.append(__create_new_staypoints(start, curr, df, elevation_flag, geo_col))
+                ret_sp.append(__create_new_staypoints(start, curr, df, elevation_flag))
             # distance large enough but time is too short -> not a staypoint
             # also initializer when new sp is added
             start = curr
@@ -504,16 +791,240 @@ def _generate_staypoints_sliding_user(
     if include_last:  # aggregate remaining positionfixes
         # additional control: we aggregate only if duration longer than time_threshold
         if (df["tracked_at"].iloc[curr] - df["tracked_at"].iloc[start]) >= time_threshold:
-            new_sp = __create_new_staypoints(start, curr, df, elevation_flag, geo_col, last_flag=True)
+            new_sp = __create_new_staypoints(start, curr, df, elevation_flag, last_flag=True)
             ret_sp.append(new_sp)
 
     ret_sp = pd.DataFrame(ret_sp)
+    if len(ret_sp) > 0:
+        # centroids of all staypoints of the user in one pass
+        sp_id, rows = _offset_rows(ret_sp["first_row"].to_numpy(), ret_sp["last_row"].to_numpy())
+        ret_sp[geo_col] = _staypoint_centroids(x[rows], y[rows], sp_id, check_gdf_planar(df), df.crs)
     ret_sp["user_id"] = df["user_id"].unique()[0]
     return ret_sp
 
 
-def __create_new_staypoints(start, end, pfs, elevation_flag, geo_col, last_flag=False):
-    """Create a staypoint with relevant information from start to end pfs."""
+def _generate_staypoints_sliding_numpy(
+    pfs,
+    geo_col,
+    elevation_flag,
+    dist_threshold,
+    time_threshold,
+    gap_threshold,
+    distance_metric,
+    include_last,
+    print_progress,
+    n_jobs,
+):
+    """Staypoint generation using the array-native sliding kernel, see generate_staypoints() for parameter meaning.
+
+    Returns
+    -------
+    sp: pd.DataFrame
+        The generated staypoints.
+
+    pfs: Positionfixes
+        The positionfixes with a new column ``[`staypoint_id`]``.
+
+    is_open: np.ndarray
+        Boolean mask of the positionfixes that are part of the still open sliding window of their user.
+    """
+    if distance_metric != "haversine":
+        raise ValueError("distance_metric unknown. We only support ['haversine']. " f"You passed {distance_metric}")
+
+    order, user_codes, t = _sliding_order(pfs)
+    user_codes = user_codes[order]
+    t = t[order]
+    x = pfs[geo_col].x.to_numpy()[order]
+    y = pfs[geo_col].y.to_numpy()[order]
+
+    # first and last + 1 row of every user in the sorted arrays
+    user_bounds = np.flatnonzero(np.diff(user_codes)) + 1
+    user_bounds = list(zip(np.r_[0, user_bounds], np.r_[user_bounds, len(order)]))
+
+    time_threshold = pd.Timedelta(time_threshold, unit="minutes").value
+    gap_threshold = pd.Timedelta(gap_threshold, unit="minutes").value
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_sliding_staypoints_kernel)(
+            t[first:last],
+            x[first:last],
+            y[first:last],
+            dist_threshold=dist_threshold,
+            time_threshold=time_threshold,
+            gap_threshold=gap_threshold,
+            include_last=include_last,
+        )
+        for first, last in tqdm(user_bounds, disable=not print_progress)
+    )
+
+    # shift user level positions to positions in the sorted arrays
+    starts = [user_starts + first for (user_starts, _, _), (first, _) in zip(results, user_bounds)]
+    ends = [user_ends + first for (_, user_ends, _), (first, _) in zip(results, user_bounds)]
+    # last staypoint of a user with include_last ends at its last pfs
+    finished = [np.minimum(e, last - 1) for e, (_, last) in zip(ends, user_bounds)]
+    starts = np.concatenate(starts or [np.empty(0, dtype=np.int64)])
+    ends = np.concatenate(ends or [np.empty(0, dtype=np.int64)])
+    finished = np.concatenate(finished or [np.empty(0, dtype=np.int64)])
+
+    # sp_id of every pfs that belongs to a staypoint and its row in the sorted arrays
+    sp_id, rows = _offset_rows(starts, ends - 1)
+
+    sp = pd.DataFrame(
+        {
+            "user_id": pfs["user_id"].iloc[order[starts]].array,
+            "started_at": pfs["tracked_at"].iloc[order[starts]].array,
+            "finished_at": pfs["tracked_at"].iloc[order[finished]].array,
+        }
+    )
+
+    sp[geo_col] = _staypoint_centroids(x[rows], y[rows], sp_id, check_gdf_planar(pfs), pfs.crs)
+
+    if elevation_flag:
+        elevation = pd.Series(pfs["elevation"].to_numpy()[order[rows]])
+        sp["elevation"] = elevation.groupby(sp_id).median()
+    sp.index.name = "id"
+
+    staypoint_id = pd.Series(pd.NA, index=pfs.index, dtype="Int64")
+    staypoint_id.iloc[order[rows]] = sp_id
+    pfs["staypoint_id"] = staypoint_id
+
+    # pfs from the start of the open window until the end of the user
+    is_open = np.zeros(len(pfs), dtype=bool)
+    for (_, _, open_start), (first, last) in zip(results, user_bounds):
+        is_open[order[first + open_start : last]] = True
+    return sp, pfs, is_open
+
+
+def _sliding_order(pfs):
+    """Order pfs per user (in groupby order) by time, ties are resolved by the index.
+
+    Returns
+    -------
+    order : np.ndarray
+        Positions of the ordered pfs, pfs with missing user_id are excluded (as in groupby).
+
+    user_codes : np.ndarray
+        Group number of the user of every pfs (unordered).
+
+    t : np.ndarray
+        'tracked_at' of every pfs as int64 epoch nanoseconds (unordered).
+    """
+    user_codes = pfs.groupby("user_id").ngroup().to_numpy()
+    t = pfs["tracked_at"].dt.as_unit("ns").astype("int64").to_numpy()
+    order = np.argsort(pfs.index, kind="stable")
+    order = order[np.lexsort((t[order], user_codes[order]))]
+    order = order[user_codes[order] > -1]
+    return order, user_codes, t
+
+
+def _sliding_staypoints_kernel(t, x, y, dist_threshold, time_threshold, gap_threshold, include_last=False):
+    """
+    Sliding window of Li et al. (2008) on the time sorted positionfixes of a single user.
+
+    Parameters
+    ----------
+    t : np.ndarray
+        'tracked_at' as int64 epoch timestamps in nanoseconds, sorted ascending.
+
+    x : np.ndarray
+        Longitudes as float64.
+
+    y : np.ndarray
+        Latitudes as float64.
+
+    dist_threshold : float
+        The distance threshold in meters.
+
+    time_threshold : int
+        The time threshold in nanoseconds.
+
+    gap_threshold : int
+        The gap threshold in nanoseconds.
+
+    include_last : bool, default False
+        Emit the last staypoint of the user (if long enough).
+
+    Returns
+    -------
+    starts, ends : np.ndarray
+        The pfs ``[start, end)`` form a staypoint that finishes at ``t[end]``.
+        For the last staypoint with ``include_last`` ``end`` is ``len(t)`` and it finishes at ``t[-1]``.
+
+    open_start : int
+        Start of the sliding window after the last pfs, i.e., the pfs ``[open_start, len(t))`` are not
+        part of a finished staypoint yet.
+    """
+    n = len(t)
+    starts, ends = [], []
+    if n == 0:
+        return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), 0
+
+    # a gap before pfs i restarts the window at i, limit[i] is the first gap after i
+    gaps = np.flatnonzero(np.diff(t) > gap_threshold) + 1
+    limit = np.append(gaps, n)[np.searchsorted(gaps, np.arange(n), side="right")]
+    # covers the frequent case of a moving user without creating arrays per step
+    leaves_next = point_haversine_dist(x[:-1], y[:-1], x[1:], y[1:]) >= dist_threshold
+
+    start = 0
+    while True:
+        curr = -1
+        if start + 1 < limit[start] and leaves_next[start]:
+            curr = start + 1
+        else:
+            # search for the first pfs outside the window in blocks of growing size
+            lower, size = start + 2, 64
+            while lower < limit[start]:
+                upper = min(lower + size, limit[start])
+                dist = point_haversine_dist(x[start], y[start], x[lower:upper], y[lower:upper])
+                outside = np.flatnonzero(dist >= dist_threshold)
+                if len(outside) > 0:
+                    curr = lower + outside[0]
+                    break
+                lower, size = upper, size * 2
+
+        if curr > -1:
+            # we want the staypoint to have long enough duration
+            if t[curr] - t[start] >= time_threshold:
+                starts.append(start)
+                ends.append(curr)
+            start = curr
+        elif limit[start] < n:
+            start = limit[start]
+        else:
+            break
+
+    # aggregate remaining positionfixes if duration longer than time_threshold
+    if include_last and t[n - 1] - t[start] >= time_threshold:
+        starts.append(start)
+        ends.append(n)
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), start
+
+
+def _staypoint_centroids(x, y, sp_id, planar, crs):
+    """Calculate the centroids of all staypoints in one pass over the coordinates of their pfs.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Coordinates of the pfs that belong to a staypoint.
+    sp_id : np.ndarray
+        Staypoint of every pfs, integers in [0, number of staypoints).
+    planar : bool
+        If False, the wrap of longitudes at [-180, +180] is handled.
+    crs : pyproj.CRS
+
+    Returns
+    -------
+    geopandas.GeometryArray
+        Centroid of every staypoint (shapely.Point)
+    """
+    # repeated coordinates only count once, as in the union of the points
+    coords = pd.DataFrame({"sp_id": sp_id, "x": x, "y": y}).drop_duplicates()
+    x, y = grouped_centroid(coords["x"].to_numpy(), coords["y"].to_numpy(), coords["sp_id"].to_numpy(), planar)
+    return gpd.points_from_xy(x, y, crs=crs)
+
+
+def __create_new_staypoints(start, end, pfs, elevation_flag, last_flag=False):
+    """Create a staypoint with relevant information from start to end pfs, the geometry is added afterwards."""
     new_sp = {}
 
     # Here we consider pfs[end] time for stp 'finished_at', but only include
@@ -524,15 +1035,12 @@ def __create_new_staypoints(start, end, pfs, elevation_flag, geo_col, last_flag=
     # if end is the last pfs, we want to include the info from it as well
     if last_flag:
         end = len(pfs)
-    points = pfs[geo_col].iloc[start:end].union_all()
-    if check_gdf_planar(pfs):
-        new_sp[geo_col] = points.centroid
-    else:
-        new_sp[geo_col] = angle_centroid_multipoints(points)[0]
 
     if elevation_flag:
         new_sp["elevation"] = pfs["elevation"].iloc[start:end].median()
-    new_sp["pfs_id"] = pfs.index[start:end].to_list()
+    # pfs of the staypoint are the contiguous rows [first_row, last_row] of the time ordered user pfs
+    new_sp["first_row"] = start
+    new_sp["last_row"] = end - 1
 
     return new_sp
 
@@ -556,12 +1064,12 @@ def _drop_invalid_triplegs(tpls, pfs):
     Notes
     -----
     Valid is defined using shapely (https://shapely.readthedocs.io/en/stable/manual.html#object.is_valid) via
-    the geopandas accessor.
+    the geopandas accessor. Validity is evaluated once for all geometries.
     """
-    invalid_tpls = tpls[~tpls.geometry.is_valid]
-    if invalid_tpls.shape[0] > 0:
+    is_valid = tpls.geometry.is_valid.to_numpy()
+    if not is_valid.all():
         # identify invalid tripleg ids
-        invalid_tpls_ids = invalid_tpls.index.to_list()
+        invalid_tpls_ids = tpls.index[~is_valid].to_list()
 
         # reset tpls id in pfs
         invalid_pfs_ixs = pfs[pfs.tripleg_id.isin(invalid_tpls_ids)].index
@@ -573,5 +1081,5 @@ def _drop_invalid_triplegs(tpls, pfs):
         warnings.warn(warn_string)
 
         # return valid triplegs
-        tpls = tpls[tpls.geometry.is_valid]
+        tpls = tpls[is_valid]
     return tpls, pfs
@@ -1,12 +1,15 @@
+import itertools
 import numpy as np
 import geopandas as gpd
 import pandas as pd
+import shapely
 from sklearn.cluster import DBSCAN
+from sklearn.neighbors import BallTree, NearestNeighbors
 import warnings
 
 from trackintel import Staypoints, Locations
 from trackintel.geogr import meters_to_decimal_degrees, check_gdf_planar
-from trackintel.preprocessing.util import applyParallel, angle_centroid_multipoints
+from trackintel.preprocessing.util import _union_find, applyParallel, grouped_centroid
 
 
 def generate_locations(
@@ -19,6 +22,9 @@ def generate_locations(
     activities_only=False,
     print_progress=False,
     n_jobs=1,
+    precision=None,
+    tile_size=None,
+    add_extent=True,
 ):
     """
     Generate locations from the staypoints.
@@ -62,13 +68,28 @@ def generate_locations(
         https://joblib.readthedocs.io/en/latest/parallel.html#parallel-reference-documentation
         for a detailed description
 
+    precision : int, optional
+        Number of decimals the staypoint coordinates are rounded to before clustering. Staypoints with the same
+        (rounded) coordinates are clustered only once, weighted by their count. If None, only exact duplicates
+        are collapsed, which does not change the result.
+
+    tile_size : float, optional
+        Only used if `agg_level` is 'dataset'. Side length of square tiles (in meters for 'haversine' and
+        'euclidean') that are clustered in parallel (see `n_jobs`). The tiles overlap by `epsilon`, and clusters
+        crossing tile borders are merged such that the result equals clustering all staypoints at once.
+        If None, all staypoints are clustered at once.
+
+    add_extent : bool, default True
+        If True, the extent of each location is added to the output in the geometry column "extent".
+        Set `add_extent=False` for better runtime performance (if only the location center is required).
+
     Returns
     -------
     sp: Staypoints
         The original staypoints with a new column ``[`location_id`]``.
 
     locs: Locations
-        The generated locations, with geometry columns ``[`center` (default geometry), `extent`]``. Depending on the contained staypoints, `center` is their centroid, and `extent` is their convex hull with a buffer distance of `epsilon`.
+        The generated locations, with geometry columns ``[`center` (default geometry), `extent`]``. Depending on the contained staypoints, `center` is their centroid, and `extent` is their convex hull with a buffer distance of `epsilon`. `extent` is only added if `add_extent` is True.
 
     Examples
     --------
@@ -79,6 +100,8 @@ def generate_locations(
         raise ValueError(f"agg_level '{agg_level}' is unknown. Supported values are ['user', 'dataset'].")
     if method not in ["dbscan"]:
         raise ValueError(f"method '{method}' is unknown. Supported value is ['dbscan'].")
+    if tile_size is not None and distance_metric not in ["haversine", "euclidean"]:
+        raise ValueError("tile_size is only supported for distance_metric ['haversine', 'euclidean'].")
 
     # initialize the return GeoDataFrames
     sp = staypoints.copy()
@@ -105,6 +128,7 @@ def generate_locations(
                 print_progress=print_progress,
                 distance_metric=distance_metric,
                 db=db,
+                precision=precision,
             )
 
             # keeping track of noise labels
@@ -129,48 +153,47 @@ def generate_locations(
             sp = gpd.GeoDataFrame(pd.concat([sp_non_noise_labels, sp_noise_labels]), geometry=geo_col)
             sp.sort_values(["user_id", "started_at"], inplace=True)
 
+        elif tile_size is not None:
+            _gen_locs_dbscan_tiled(
+                sp,
+                distance_metric=distance_metric,
+                db=db,
+                precision=precision,
+                tile_size=tile_size,
+                n_jobs=n_jobs,
+                print_progress=print_progress,
+            )
         else:
-            _gen_locs_dbscan(sp, db=db, distance_metric=distance_metric)
+            _gen_locs_dbscan(sp, db=db, distance_metric=distance_metric, precision=precision)
 
         ### create locations as grouped staypoints
-        temp_sp = sp[["user_id", "location_id", sp.geometry.name]]
+        # get user-location pairs, with agg_level "dataset" users share the same location geometries
+        locs = sp.loc[sp["location_id"] != -1, ["user_id", "location_id"]].drop_duplicates(ignore_index=True)
         if agg_level == "user":
-            # directly dissolve by 'user_id' and 'location_id'
-            locs = temp_sp.dissolve(by=["user_id", "location_id"], as_index=False)
-        else:
-            ## generate user-location pairs with same geometries across users
-            # get user-location pairs
-            locs = temp_sp[["user_id", "location_id"]].drop_duplicates(ignore_index=True)
-            # get location geometries
-            geom_gdf = temp_sp.dissolve(by=["location_id"], as_index=False).drop(columns={"user_id"})
-            # merge pairs with location geometries
-            locs = geom_gdf.merge(locs, on="location_id", how="right")
-
-        # filter staypoints not belonging to locations
-        locs = locs.loc[locs["location_id"] != -1]
-
-        if check_gdf_planar(locs):
-            locs["center"] = locs.geometry.centroid
-        else:
-            # error of wrapping e.g. mean([-180, +180]) -> own function needed
-            locs["center"] = angle_centroid_multipoints(locs.geometry)
-
-        # extent is the convex hull of the geometry
-        locs["extent"] = locs.geometry.convex_hull
-
-        # We create a buffer of distance epsilon around the convex_hull to denote location extent
-        # Perform meter to decimal conversion if the distance metric is haversine
-        if distance_metric == "haversine":
-            locs["extent"] = locs.apply(
-                lambda p: p["extent"].buffer(meters_to_decimal_degrees(epsilon, p["center"].y)),
-                axis=1,
-                result_type="reduce",
-            )
-        else:
-            locs["extent"] = locs["extent"].buffer(epsilon)
-
-        locs = locs.set_geometry("center", crs=sp.crs)
-        locs = locs[["user_id", "location_id", "center", "extent"]]
+            locs.sort_values("location_id", inplace=True, ignore_index=True)
+
+        # unique staypoint coordinates per location, sorted as in a dissolve
+        coords = pd.DataFrame({"location_id": sp["location_id"].to_numpy(), "x": sp.geometry.x, "y": sp.geometry.y})
+        coords = coords[coords["location_id"] != -1].drop_duplicates().sort_values(["location_id", "x", "y"])
+        location_ids, index = np.unique(coords["location_id"].to_numpy(), return_inverse=True)
+        index = index.reshape(-1)
+        x, y = coords["x"].to_numpy(), coords["y"].to_numpy()
+        # position of the location geometry for every user-location pair
+        loc_pos = np.searchsorted(location_ids, locs["location_id"].to_numpy())
+
+        # error of wrapping e.g. mean([-180, +180]) for geographic coordinates -> own function needed
+        center_x, center_y = grouped_centroid(x, y, index, planar=check_gdf_planar(sp))
+        locs["center"] = gpd.points_from_xy(center_x[loc_pos], center_y[loc_pos], crs=sp.crs)
+        locs = locs.set_geometry("center")
+
+        if add_extent:
+            # extent is the convex hull of the staypoints
+            extent = shapely.convex_hull(shapely.multipoints(np.column_stack([x, y]), indices=index))
+            # We create a buffer of distance epsilon around the convex_hull to denote location extent
+            # Perform meter to decimal conversion if the distance metric is haversine
+            distance = meters_to_decimal_degrees(epsilon, center_y) if distance_metric == "haversine" else epsilon
+            extent = shapely.buffer(extent, distance, quad_segs=16)
+            locs["extent"] = gpd.GeoSeries(extent[loc_pos], index=locs.index, crs=sp.crs)
 
         # index management
         locs.rename(columns={"location_id": "id"}, inplace=True)
@@ -197,28 +220,387 @@ def generate_locations(
     return sp, Locations(locs)
 
 
-def _gen_locs_dbscan(sp, distance_metric, db):
+def assign_locations(
+    staypoints,
+    locations,
+    epsilon=100,
+    num_samples=1,
+    distance_metric="haversine",
+    agg_level="user",
+    print_progress=False,
+    n_jobs=1,
+):
+    """
+    Assign staypoints to existing locations and generate new locations from the remaining staypoints.
+
+    Parameters
+    ----------
+    staypoints : Staypoints
+        New staypoints that should be linked to locations.
+
+    locations : Locations
+        Existing locations, e.g., generated with `generate_locations`.
+
+    epsilon : float, default 100
+        Staypoints are assigned to the nearest location center within epsilon. Also used as epsilon for the
+        'dbscan' method to generate new locations. The unit is in meters.
+
+    num_samples : int, default 1
+        The minimal number of samples in a new location.
+
+    distance_metric: {'haversine', 'euclidean'}
+        The distance metric used to assign staypoints and generate new locations.
+
+    agg_level: {'user','dataset'}
+        The level of aggregation of the locations:
+
+        - `user`: staypoints are only assigned to locations of the same user.
+        - `dataset`: staypoints are assigned to the locations of all users.
+
+    print_progress : bool, default False
+        If print_progress is True, the progress bar is displayed
+
+    n_jobs: int, default 1
+        The maximum number of concurrently running jobs. If -1 all CPUs are used. If 1 is given, no parallel
+        computing code is used at all, which is useful for debugging. See
+        https://joblib.readthedocs.io/en/latest/parallel.html#parallel-reference-documentation
+        for a detailed description
+
+    Returns
+    -------
+    sp: Staypoints
+        The staypoints with a new column ``[`location_id`]``.
+
+    locs: Locations
+        The existing locations with the newly generated locations appended. The ids of the new locations continue
+        from the maximal existing location id.
+
+    Notes
+    -----
+    Only staypoints further than `epsilon` from all existing location centers are clustered into new locations,
+    thus the runtime depends only on the number of new staypoints. The existing locations are not updated, if
+    their center or extent should reflect the new staypoints, generate the locations from all staypoints again.
+
+    Examples
+    --------
+    >>> sp_new, locs = sp_new.assign_locations(locs, epsilon=100)
+    """
+    Staypoints.validate(staypoints)
+    Locations.validate(locations)
+    if agg_level not in ["user", "dataset"]:
+        raise ValueError(f"agg_level '{agg_level}' is unknown. Supported values are ['user', 'dataset'].")
+    if distance_metric not in ["haversine", "euclidean"]:
+        raise ValueError(
+            f"distance_metric '{distance_metric}' is unknown. Supported values are ['haversine', 'euclidean']."
+        )
+
+    sp = staypoints.copy()
+    # location geometries are shared across users on dataset level
+    centers = locations if agg_level == "user" else locations[~locations.index.duplicated()]
+
+    # search radius
+    if distance_metric == "haversine":
+        # nearest chord on the unit sphere is the nearest (haversine) distance
+        radius = 2 * np.sin(min(epsilon / 6371000, np.pi) / 2)
+    else:
+        radius = epsilon
+    # users are separated by a distance larger than the radius in an additional dimension
+    if agg_level == "user":
+        user_codes, _ = pd.factorize(pd.concat([sp["user_id"], centers["user_id"]], ignore_index=True))
+        user_codes = user_codes * (2 * radius + 1)
+    else:
+        user_codes = np.zeros(len(sp) + len(centers))
+    sp_coords = np.column_stack([_tree_coordinates(sp.geometry, distance_metric), user_codes[: len(sp)]])
+    loc_coords = np.column_stack([_tree_coordinates(centers.geometry, distance_metric), user_codes[len(sp) :]])
+
+    dist, ind = BallTree(loc_coords).query(sp_coords, k=1)
+    assigned = dist[:, 0] <= radius
+    sp["location_id"] = pd.Series(pd.NA, index=sp.index, dtype="Int64")
+    sp.loc[assigned, "location_id"] = centers.index.to_numpy()[ind[assigned, 0]]
+
+    locs = [locations]
+    if agg_level == "dataset":
+        # add user-location pairs for users that are new to a location
+        pairs = sp.loc[assigned, ["user_id", "location_id"]].drop_duplicates()
+        existing = pd.MultiIndex.from_arrays([locations["user_id"], locations.index])
+        pairs = pairs[~pd.MultiIndex.from_frame(pairs).isin(existing)]
+        new_pairs = centers.loc[pairs["location_id"].to_numpy()].copy()
+        new_pairs["user_id"] = pairs["user_id"].to_numpy()
+        locs.append(new_pairs)
+
+    # cluster the remaining staypoints into new locations
+    if not assigned.all():
+        with warnings.catch_warnings():
+            # remaining staypoints that form no location are expected
+            warnings.filterwarnings("ignore", "No locations can be generated", UserWarning)
+            sp_rest, locs_rest = generate_locations(
+                sp.loc[~assigned, staypoints.columns.drop("location_id", errors="ignore")],
+                epsilon=epsilon,
+                num_samples=num_samples,
+                distance_metric=distance_metric,
+                agg_level=agg_level,
+                print_progress=print_progress,
+                n_jobs=n_jobs,
+                add_extent="extent" in locations.columns,
+            )
+        # new ids continue from the maximal existing id
+        offset = locations.index.max() + 1
+        sp.loc[sp_rest.index, "location_id"] = sp_rest["location_id"] + offset
+        if len(locs_rest):
+            locs_rest.index = locs_rest.index + offset
+            if locs_rest.geometry.name != locations.geometry.name:
+                locs_rest = locs_rest.rename_geometry(locations.geometry.name)
+            locs.append(locs_rest)
+
+    locs = pd.concat(locs)
+    locs.index.name = locations.index.name
+    # keep class of staypoints
+    sp = Staypoints(sp) if isinstance(staypoints, Staypoints) else sp
+    return sp, Locations(locs)
+
+
+def _tree_coordinates(geometry, distance_metric):
+    """Get coordinates of points for a nearest neighbour search with euclidean distance.
+
+    Parameters
+    ----------
+    geometry : GeoSeries
+    distance_metric : {"haversine", "euclidean"}
+
+    Returns
+    -------
+    np.ndarray
+        Coordinates of the points, on the unit sphere if `distance_metric` is "haversine".
+    """
+    x, y = geometry.x.to_numpy(), geometry.y.to_numpy()
+    if distance_metric == "euclidean":
+        return np.column_stack([x, y])
+    lon, lat = np.deg2rad(x), np.deg2rad(y)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _gen_locs_dbscan(sp, distance_metric, db, precision=None):
     """Small helper function that takes staypoints and apply them to DBSCAN.
 
+    Duplicated coordinates are clustered only once with their count as sample weight.
+
     Parameters
     ----------
     sp : Staypoints
     distance_metric : str
     db : sklearn.cluster.DBSCAN
+    precision : int, optional
+        Number of decimals the coordinates are rounded to before clustering.
 
     Returns
     -------
     sp : Staypoints
         Staypoints with new column "location_id"
     """
+    p, weight, inverse = _unique_coordinates(sp, distance_metric, precision)
+    labels = db.fit_predict(p, sample_weight=weight)
+    sp["location_id"] = labels[inverse]
+    return sp
+
+
+def _unique_coordinates(sp, distance_metric, precision=None):
+    """Get the unique (rounded) coordinates of staypoints in order of their first occurrence.
+
+    Parameters
+    ----------
+    sp : Staypoints
+    distance_metric : str
+    precision : int, optional
+        Number of decimals the coordinates are rounded to.
+
+    Returns
+    -------
+    p : np.ndarray
+        Unique coordinates, in radians if `distance_metric` is "haversine".
+    weight : np.ndarray
+        Number of staypoints per unique coordinate.
+    inverse : np.ndarray
+        Position of the unique coordinate of every staypoint.
+    """
     p = np.array([sp.geometry.x, sp.geometry.y]).transpose()
+    if precision is not None:
+        p = np.round(p, precision)
+    _, first, inverse, counts = np.unique(p, axis=0, return_index=True, return_inverse=True, return_counts=True)
+    # keep order of first occurrence -> labels are numbered as if all points were clustered
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    p = p[first[order]]
     if distance_metric == "haversine":
         p = np.deg2rad(p)  # haversine distance metric assumes input is in rad
-    labels = db.fit_predict(p)
-    sp["location_id"] = labels
+    return p, counts[order], rank[inverse.reshape(-1)]
+
+
+def _gen_locs_dbscan_tiled(sp, distance_metric, db, tile_size, precision=None, n_jobs=1, print_progress=False):
+    """Apply DBSCAN to staypoints in overlapping tiles and stitch the clusters together.
+
+    The labels are identical to `_gen_locs_dbscan`. Every point belongs to exactly one (home) tile, the tiles
+    are extended by epsilon such that the full neighbourhood of the home points is available. In a first pass
+    the core points are determined per tile. In a second pass the core points are connected per tile, and the
+    clusters crossing tile borders are merged with a union-find.
+
+    Parameters
+    ----------
+    sp : Staypoints
+    distance_metric : {"haversine", "euclidean"}
+    db : sklearn.cluster.DBSCAN
+    tile_size : float
+        Side length of the tiles (in meters).
+    precision : int, optional
+        Number of decimals the coordinates are rounded to before clustering.
+    n_jobs : int, default 1
+    print_progress : bool, default False
+
+    Returns
+    -------
+    sp : Staypoints
+        Staypoints with new column "location_id"
+    """
+    p, weight, inverse = _unique_coordinates(sp, distance_metric, precision)
+    if distance_metric == "haversine":
+        # tile on the unit sphere, the chord length is a lower bound of the (haversine) distance.
+        # sklearn interprets the first coordinate as latitude.
+        coords = np.array([np.cos(p[:, 0]) * np.cos(p[:, 1]), np.cos(p[:, 0]) * np.sin(p[:, 1]), np.sin(p[:, 0])]).T
+        margin = 2 * np.sin(min(db.eps, np.pi) / 2)
+        tile_size = tile_size / 6371000
+    else:
+        coords = p
+        margin = db.eps
+    # enlarge margin against rounding errors, tiles can hold more points than necessary
+    margin = margin * (1 + 1e-6)
+
+    members = _tile_members(coords, tile_size, margin)
+    # tiles that only contain margin points are not needed
+    members = members[members["tile"].isin(members.loc[members["is_home"], "tile"])].copy()
+    members[["p0", "p1"]] = p[members["pos"].to_numpy()]
+    members["weight"] = weight[members["pos"].to_numpy()]
+    kwargs = {"db": db, "n_jobs": n_jobs, "print_progress": print_progress}
+
+    # first pass: core points have a (weighted) number of neighbours greater or equal to min_samples
+    core = np.zeros(len(p), dtype=bool)
+    tile_core = applyParallel(members.groupby("tile"), _tile_core_points, **kwargs)
+    core[tile_core.index.to_numpy()] = tile_core.to_numpy()
+    if not core.any():
+        sp["location_id"] = -1
+        return sp
+
+    # second pass: connect core points per tile (tiles without core points have no clusters)
+    members["core"] = core[members["pos"].to_numpy()]
+    members = members[members["tile"].isin(members.loc[members["core"], "tile"])]
+    edges = applyParallel(members.groupby("tile"), _tile_core_edges, **kwargs)
+    is_core_edge = edges["is_core_edge"].to_numpy()
+    node, other = edges["pos"].to_numpy(), edges["other"].to_numpy()
+
+    # union-find over tiles, clusters are numbered in order of their first core point (as in DBSCAN)
+    cluster = _union_find(len(p), node[is_core_edge], other[is_core_edge])
+    labels = np.full(len(p), -1)
+    labels[core] = np.unique(cluster[core], return_inverse=True)[1].reshape(-1)
+    # border points belong to the first cluster that reaches them
+    border_labels = np.full(len(p), len(p))
+    np.minimum.at(border_labels, node[~is_core_edge], labels[other[~is_core_edge]])
+    is_border = border_labels < len(p)
+    labels[is_border] = border_labels[is_border]
+
+    sp["location_id"] = labels[inverse]
     return sp
 
 
+def _tile_members(coords, tile_size, margin):
+    """Assign points to all tiles they fall in after extending the tiles by margin.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Coordinates of the points used for tiling.
+    tile_size : float
+    margin : float
+
+    Returns
+    -------
+    members : pd.DataFrame
+        One row per point and tile with columns ["tile", "pos", "is_home"].
+    """
+    home = np.floor(coords / tile_size).astype("int64")
+    low = np.floor((coords - margin) / tile_size).astype("int64")
+    high = np.floor((coords + margin) / tile_size).astype("int64")
+    n_offsets = int((high - low).max()) + 1
+    pos, tiles = [], []
+    for offset in itertools.product(range(n_offsets), repeat=coords.shape[1]):
+        tile = low + np.array(offset)
+        inside = (tile <= high).all(axis=1)
+        pos.append(np.flatnonzero(inside))
+        tiles.append(tile[inside])
+    pos, tiles = np.concatenate(pos), np.concatenate(tiles)
+    is_home = (tiles == home[pos]).all(axis=1)
+    tile_id = np.unique(tiles, axis=0, return_inverse=True)[1].reshape(-1)
+    return pd.DataFrame({"tile": tile_id, "pos": pos, "is_home": is_home})
+
+
+def _tile_neighbours(tile, db, candidates):
+    """Sparse radius neighbours graph from the home points of a tile (rows) to the candidates (columns)."""
+    p = tile[["p0", "p1"]].to_numpy()
+    nn = NearestNeighbors(radius=db.eps, algorithm=db.algorithm, metric=db.metric).fit(p[candidates])
+    return nn.radius_neighbors_graph(p[tile["is_home"].to_numpy()], mode="connectivity")
+
+
+def _tile_core_points(tile, db):
+    """Determine if the home points of a tile are core points.
+
+    Parameters
+    ----------
+    tile : pd.DataFrame
+        Members of the tile, see `_tile_members`.
+    db : sklearn.cluster.DBSCAN
+
+    Returns
+    -------
+    pd.Series
+        Core flag indexed by point position.
+    """
+    graph = _tile_neighbours(tile, db, np.ones(len(tile), dtype=bool))
+    n_neighbours = graph @ tile["weight"].to_numpy()
+    return pd.Series(n_neighbours >= db.min_samples, index=tile.loc[tile["is_home"], "pos"].to_numpy())
+
+
+def _tile_core_edges(tile, db):
+    """Connect the core points of a tile and link the border points to them.
+
+    Parameters
+    ----------
+    tile : pd.DataFrame
+        Members of the tile, see `_tile_members` with additional column "core".
+    db : sklearn.cluster.DBSCAN
+
+    Returns
+    -------
+    pd.DataFrame
+        Edges with columns ["pos", "other", "is_core_edge"]. Core edges link core points to the smallest
+        core point connected within the tile, the other edges link home border points to these.
+    """
+    core = tile["core"].to_numpy()
+    is_home = tile["is_home"].to_numpy()
+    pos = tile["pos"].to_numpy()
+    graph = _tile_neighbours(tile, db, core)
+    home_node = np.repeat(np.arange(graph.shape[0]), np.diff(graph.indptr))
+    core_node = graph.indices
+    core_pos = pos[core]
+    # position of home points in the core points of the tile, -1 for non core points
+    home_in_core = np.where(core, np.cumsum(core) - 1, -1)[is_home]
+
+    is_core = home_in_core[home_node] != -1
+    root = _union_find(len(core_pos), home_in_core[home_node[is_core]], core_node[is_core])
+    core_edges = pd.DataFrame({"pos": core_pos, "other": core_pos[root], "is_core_edge": True})
+    border_edges = pd.DataFrame(
+        {"pos": pos[is_home][home_node[~is_core]], "other": core_pos[root[core_node[~is_core]]], "is_core_edge": False}
+    )
+    return pd.concat([core_edges, border_edges.drop_duplicates()])
+
+
 def merge_staypoints(staypoints, triplegs, max_time_gap="10min", agg={}):
     """
     Aggregate staypoints horizontally via time threshold.
@@ -271,61 +653,27 @@ def merge_staypoints(staypoints, triplegs, max_time_gap="10min", agg={}):
         raise TypeError("Parameter max_time_gap must be either of type String or pd.Timedelta!")
     assert "location_id" in staypoints.columns, "Staypoints must contain column location_id"
 
-    sp_merge = staypoints.copy()
     index_name = staypoints.index.name
-
-    # concat sp and tpls to get information whether there is a tripleg between to staypoints
-    tpls_merge = triplegs.copy()
-    tpls_merge["type"] = "tripleg"
-    sp_merge["type"] = "staypoint"
-    # convert datatypes in order to preserve the datatypes (especially ints) despite of NaNs during concat
-    sp_merge = sp_merge.convert_dtypes()
-
-    # a joined dataframe sp_tpls is constructed to add the columns 'type' and 'next_type' to the 'sp_merge' table
-    # concat and sort by time
-    sp_tpls = pd.concat([sp_merge, tpls_merge]).sort_values(by=["user_id", "started_at"])
-    # TODO: we want to make tpls as argumtent optional and adapt this logic here. See issue #463.
-    sp_tpls.index.rename(index_name, inplace=True)
-    # get information whether the there is a tripleg after a staypoint
-    sp_tpls["next_type"] = sp_tpls["type"].shift(-1)
-    # get only staypoints, but with next type information
-    sp_merge = sp_tpls[sp_tpls["type"] == "staypoint"]
-
-    # reset index and make temporary index
-    sp_merge = sp_merge.reset_index()
-    # copy index to use it in the end (id is modified)
-    sp_merge["index_temp"] = sp_merge[index_name]
-
-    # roll by 1 to get next row info
-    sp_merge[["next_user_id", "next_started_at", "next_location_id"]] = sp_merge[
-        ["user_id", "started_at", "location_id"]
-    ].shift(-1)
-    # Conditions to keep on merging
-    cond = pd.Series(data=False, index=sp_merge.index)
-    cond_old = pd.Series(data=True, index=sp_merge.index)
-    cond_diff = cond != cond_old
-
-    while np.sum(cond_diff) >= 1:
-        # .values is important otherwise the "=" would imply a join via the new index
-        sp_merge["next_id"] = sp_merge["index_temp"].shift(-1).values
-
-        # identify rows to merge
-        cond0 = sp_merge["next_user_id"] == sp_merge["user_id"]
-        cond1 = sp_merge["next_started_at"] - sp_merge["finished_at"] <= max_time_gap  # time constraint
-        cond2 = sp_merge["location_id"] == sp_merge["next_location_id"]
-        cond3 = sp_merge["index_temp"] != sp_merge["next_id"]  # already merged
-        cond4 = sp_merge["next_type"] != "tripleg"  # no tripleg inbetween two staypoints
-        cond = cond0 & cond1 & cond2 & cond3 & cond4
-
-        # assign index to next row
-        sp_merge.loc[cond, "index_temp"] = sp_merge.loc[cond, "next_id"]
-        # check whether anything was changed
-        cond_diff = cond != cond_old
-        cond_old = cond.copy()
+    # convert datatypes to return nullable dtypes (especially ints) as before
+    sp_merge = staypoints.convert_dtypes()
+    sp_merge = sp_merge.sort_values(by=["user_id", "started_at"], kind="stable").reset_index()
+    # column of the original index after reset_index
+    index_col = sp_merge.columns[0]
+
+    # conditions to merge a staypoint with the next one
+    next_sp = sp_merge[["user_id", "started_at", "location_id"]].shift(-1)
+    cond0 = next_sp["user_id"] == sp_merge["user_id"]
+    cond1 = next_sp["started_at"] - sp_merge["finished_at"] <= max_time_gap  # time constraint
+    cond2 = (next_sp["location_id"] == sp_merge["location_id"]).fillna(False).astype(bool)
+    cond3 = ~_tripleg_in_between(sp_merge, triplegs)  # no tripleg inbetween two staypoints
+    merge_with_next = (cond0 & cond1 & cond2 & cond3).to_numpy()
+
+    # every staypoint that is not merged into the previous one starts a new group
+    sp_merge["index_temp"] = np.cumsum(np.concatenate([[True], ~merge_with_next[:-1]]))
 
     # Staypoint-required columnsare aggregated in the following manner:
     agg_dict = {
-        index_name: "first",
+        index_col: "first",
         "user_id": "first",
         "started_at": "first",
         "finished_at": "last",
@@ -334,9 +682,44 @@ def merge_staypoints(staypoints, triplegs, max_time_gap="10min", agg={}):
     # User-defined further aggregation
     agg_dict.update(agg)
 
-    # aggregate values
-    sp = sp_merge.groupby(by="index_temp").agg(agg_dict).sort_values(by=["user_id", "started_at"])
+    # aggregate values, groups are already sorted by user and time
+    sp = sp_merge.groupby(by="index_temp").agg(agg_dict)
 
     # clean
-    sp = sp.set_index(index_name)
+    sp = sp.set_index(index_col)
+    sp.index.name = index_name
     return sp
+
+
+def _tripleg_in_between(sp, triplegs):
+    """Check if a tripleg starts between the start of a staypoint and the start of the next staypoint.
+
+    Parameters
+    ----------
+    sp : Staypoints
+        Staypoints sorted by user and start time.
+    triplegs : Triplegs
+
+    Returns
+    -------
+    pd.Series
+        True if a tripleg of the same user starts in [started_at, next started_at) of the staypoint.
+    """
+    # an empty DataFrame can be passed as triplegs to merge staypoints regardless of triplegs
+    if triplegs.empty or any(c not in triplegs.columns for c in ["user_id", "started_at", "finished_at"]):
+        return pd.Series(False, index=sp.index)
+    user_codes, _ = pd.factorize(pd.concat([sp["user_id"], triplegs["user_id"]], ignore_index=True))
+    # rank all times together, a sortable key of (user, time) is then user * number of ranks + rank
+    times = np.concatenate(
+        [
+            sp["started_at"].to_numpy(dtype="datetime64[ns]"),
+            pd.to_datetime(triplegs["started_at"], utc=True).to_numpy(dtype="datetime64[ns]"),
+        ]
+    )
+    _, rank = np.unique(times, return_inverse=True)
+    key = user_codes.astype("int64") * (len(times) + 1) + rank.reshape(-1)
+    sp_key, tpls_key = key[: len(sp)], np.sort(key[len(sp) :])
+    # number of triplegs (sorted by user and time) before the start of each staypoint
+    tpls_before = np.searchsorted(tpls_key, sp_key, side="left")
+    tpls_before_next = np.append(tpls_before[1:], len(tpls_key))
+    return pd.Series(tpls_before_next > tpls_before, index=sp.index)
@@ -3,10 +3,10 @@ import warnings
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely.geometry import MultiPoint, Point
+import shapely
 
 from trackintel import Staypoints, Triplegs, Trips
-from trackintel.preprocessing.util import _explode_agg
+from trackintel.preprocessing.util import _offset_rows
 
 
 def generate_trips(staypoints, triplegs, gap_threshold=15, add_geometry=True):
@@ -94,29 +94,26 @@ def generate_trips(staypoints, triplegs, gap_threshold=15, add_geometry=True):
 
     # exclude activities to aggregate trips together.
     # activity can be thought of as the same aggregation level as trips.
-    sp_tpls_no_act = sp_tpls[~sp_tpls["is_activity"]]
+    sp_tpls_no_act = sp_tpls[~sp_tpls["is_activity"]].copy()
     sp_tpls_only_act = sp_tpls[sp_tpls["is_activity"]]
+    # trips cover contiguous rows of sp_tpls_no_act -> store offsets for id assignment
+    sp_tpls_no_act["row"] = np.arange(len(sp_tpls_no_act))
+
+    is_tpls = (sp_tpls_no_act["type"] == "tripleg").to_numpy()
 
     trips_grouper = sp_tpls_no_act.groupby("temp_trip_id")
     trips = trips_grouper.agg(
-        {"user_id": "first", "started_at": "min", "finished_at": "max", "type": list, "sp_tpls_id": list}
+        user_id=("user_id", "first"),
+        started_at=("started_at", "min"),
+        finished_at=("finished_at", "max"),
+        first_row=("row", "min"),
+        last_row=("row", "max"),
     )
 
-    def _seperate_ids(row):
-        """Split aggregated sp_tpls_ids into staypoint ids and tripleg ids columns."""
-        row_type = np.array(row["type"])
-        row_id = np.array(row["sp_tpls_id"])
-        t = row_type == "tripleg"
-        tpls_ids = row_id[t]
-        sp_ids = row_id[~t]
-        # for dropping trips that don't have triplegs
-        tpls_ids = tpls_ids if len(tpls_ids) > 0 else None
-        return [sp_ids, tpls_ids]
-
-    trips[["sp", "tpls"]] = trips.apply(_seperate_ids, axis=1, result_type="expand")
-
-    # drop all trips that don't contain any triplegs
-    trips.dropna(subset=["tpls"], inplace=True)
+    # rows of the first and last tripleg per trip, inner join drops all trips that don't contain any triplegs
+    tpls_rows = sp_tpls_no_act.loc[is_tpls].groupby("temp_trip_id")["row"].agg(["min", "max"])
+    tpls_rows.columns = ["first_tpls_row", "last_tpls_row"]
+    trips = trips.join(tpls_rows, how="inner")
 
     # recount trips ignoring empty trips and save trip_id as for id assignment.
     trips.reset_index(inplace=True, drop=True)
@@ -134,9 +131,6 @@ def generate_trips(staypoints, triplegs, gap_threshold=15, add_geometry=True):
 
     # merge trips with (filler) activities
 
-    # make space so no overlap with activity "sp_tpls_id"
-    trips.drop(columns=["type", "sp_tpls_id"], inplace=True)
-
     # trips are no activity (with this we don't have to fillna later)
     trips["is_activity"] = False
 
@@ -176,9 +170,15 @@ def generate_trips(staypoints, triplegs, gap_threshold=15, add_geometry=True):
     )
 
     # now handle the data that is aggregated in the trips
+    # resolve the (first_row, last_row) offsets of the trips to a trip_id per sp_tpls_no_act row
+    trip_pos, rows = _offset_rows(trips["first_row"].to_numpy(dtype="int64"), trips["last_row"].to_numpy(dtype="int64"))
+    trip_id = pd.Series(pd.NA, index=sp_tpls_no_act["sp_tpls_id"], dtype="Int64")
+    trip_id.iloc[rows] = trips["trip_id"].to_numpy()[trip_pos]
+
     # assign trip_id to tpls, override "trip_id" -> warning in _create_sp_tpls
     cols = triplegs.columns.difference(["trip_id"])
-    tpls = _explode_agg("tpls", "trip_id", triplegs[cols], trips)  # creates copy of triplegs
+    tpls = triplegs[cols].copy()
+    tpls["trip_id"] = trip_id[is_tpls].reindex(tpls.index).array
 
     # first assign prev_trip_id, next_trip_id for activity staypoints
     activity_staypoints = trips_with_act[trips_with_act["type"] == "staypoint"].copy()
@@ -188,33 +188,31 @@ def generate_trips(staypoints, triplegs, gap_threshold=15, add_geometry=True):
     cols = staypoints.columns.difference(["prev_trip_id", "next_trip_id", "trip_id"])
     sp = staypoints[cols].join(activity_staypoints[["prev_trip_id", "next_trip_id"]], how="left")
     # second assign trip_id to all staypoints
-    sp = _explode_agg("sp", "trip_id", sp, trips)
+    sp["trip_id"] = trip_id[~is_tpls].reindex(sp.index).array
 
     # fill missing points and convert to MultiPoint
     # for all trips with missing 'origin_staypoint_id' we now assign the startpoint of the first tripleg of the trip.
     # for all tripls with missing 'destination_staypoint_id' we now assign the endpoint of the last tripleg of the trip.
     if add_geometry:
-        # fill geometry for origin staypoints that are NaN
-        origin_nan_rows = trips[pd.isna(trips["origin_staypoint_id"])].copy()
-        trips.loc[pd.isna(trips["origin_staypoint_id"]), "origin_geom"] = origin_nan_rows.tpls.map(
-            # from tpls table, get the first point of the first tripleg for the trip
-            lambda x: Point(tpls.loc[x[0], tpls.geometry.name].coords[0])
-        )
-        # fill geometry for destionations staypoints that are NaN
-        destination_nan_rows = trips[pd.isna(trips["destination_staypoint_id"])].copy()
-        trips.loc[pd.isna(trips["destination_staypoint_id"]), "destination_geom"] = destination_nan_rows.tpls.map(
-            # from tpls table, get the last point of the last tripleg on the trip
-            lambda x: Point(tpls.loc[x[-1], tpls.geometry.name].coords[-1])
-        )
+        tpls_geom = sp_tpls_no_act["geom"].to_numpy()
+        # fill geometry for origin staypoints that are NaN with the first point of the first tripleg of the trip
+        origin_nan = pd.isna(trips["origin_staypoint_id"]).to_numpy()
+        first_tpls_row = trips["first_tpls_row"].to_numpy(dtype="int64")[origin_nan]
+        trips.loc[origin_nan, "origin_geom"] = shapely.get_point(tpls_geom[first_tpls_row], 0)
+        # fill geometry for destination staypoints that are NaN with the last point of the last tripleg of the trip
+        destination_nan = pd.isna(trips["destination_staypoint_id"]).to_numpy()
+        last_tpls_row = trips["last_tpls_row"].to_numpy(dtype="int64")[destination_nan]
+        trips.loc[destination_nan, "destination_geom"] = shapely.get_point(tpls_geom[last_tpls_row], -1)
         # convert to GeoDataFrame with MultiPoint column and crs (not-None if possible)
-        trips["geom"] = [MultiPoint([x, y]) for x, y in zip(trips.origin_geom, trips.destination_geom)]
+        endpoints = np.stack([trips["origin_geom"].to_numpy(), trips["destination_geom"].to_numpy()], axis=1)
+        trips["geom"] = shapely.multipoints(endpoints)
         crs_trips = sp.crs if sp.crs else tpls.crs
         trips = gpd.GeoDataFrame(trips, geometry="geom", crs=crs_trips)
         # cleanup
         trips.drop(["origin_geom", "destination_geom"], inplace=True, axis=1)
 
     # final cleaning
-    trips.drop(columns=["tpls", "sp", "trip_id"], inplace=True)
+    trips.drop(columns=["trip_id", "first_row", "last_row", "first_tpls_row", "last_tpls_row"], inplace=True)
 
     # dtype consistency
     # trips id (generated by this function) should be int64
@@ -3,6 +3,7 @@ from datetime import timedelta
 
 import numpy as np
 import pandas as pd
+import shapely
 
 import trackintel as ti
 from trackintel import Tours
@@ -148,17 +149,31 @@ def generate_tours(
         trips_input.drop(columns="tour_id", inplace=True)
         warnings.warn("Deleted existing column 'tour_id' from trips.")
 
+    # only pass the columns needed for the search to the per-user function
+    columns = ["user_id", "started_at", "finished_at", "origin_staypoint_id", "destination_staypoint_id"]
+    if staypoints is not None:
+        # trips are connected via the location of their staypoints, missing locations (-1) never match
+        location_code, location_ids = pd.factorize(staypoints["location_id"])
+        location_code = pd.Series(location_code, index=staypoints.index)
+        user_trips = trips_input[columns].assign(
+            origin_loc=location_code.reindex(trips_input["origin_staypoint_id"], fill_value=-1).to_numpy(),
+            destination_loc=location_code.reindex(trips_input["destination_staypoint_id"], fill_value=-1).to_numpy(),
+        )
+    else:
+        location_ids = None
+        user_trips = trips_input[columns + [geom_col]]
+
     kwargs = {
         "max_dist": max_dist,
         "max_nr_gaps": max_nr_gaps,
         "max_time": max_time,
-        "staypoints": staypoints,
+        "location_ids": location_ids,
         "geom_col": geom_col,
         "crs_is_projected": crs_is_projected,
     }
 
     tours = applyParallel(
-        trips_input.groupby("user_id", group_keys=False, as_index=False),
+        user_trips.groupby("user_id", group_keys=False, as_index=False),
         _generate_tours_user,
         print_progress=print_progress,
         n_jobs=n_jobs,
@@ -190,7 +205,7 @@ def generate_tours(
 
 def _generate_tours_user(
     user_trip_df,
-    staypoints=None,
+    location_ids=None,
     max_dist=100,
     max_nr_gaps=0,
     max_time=timedelta(days=1),
@@ -202,12 +217,14 @@ def _generate_tours_user(
 
     Parameters
     ----------
-    user_trip_df : Trips
-        The trips have to follow the standard definition for trips DataFrames
+    user_trip_df : DataFrame
+        The trips of one user with the columns ``['user_id', 'started_at', 'finished_at', 'origin_staypoint_id',
+        'destination_staypoint_id']``, and either the location codes ``['origin_loc', 'destination_loc']``
+        of the staypoints or the geometry column.
 
-    staypoints : Staypoints, optional
-        Must contain location ID column to connect trips via locations to a tour.
-        If None, trips will be connected based only on a distance threshold `max_dist`.
+    location_ids : pd.Index, optional
+        The location ID of every location code. If None, trips will be connected based only on a distance
+        threshold `max_dist`.
 
     max_dist: float, default 100 (meters)
         Maximum distance between the end point of one trip and the start point of the next trip on a tour.
@@ -237,48 +254,70 @@ def _generate_tours_user(
     # sort by time
     user_trip_df = user_trip_df.sort_values(by=["started_at"])
 
-    # save only the trip id (row.name) in the start candidates
+    # pre-extract everything needed for the search into numpy arrays
+    started_at = user_trip_df["started_at"].to_numpy(dtype="datetime64[ns]")
+    finished_at = user_trip_df["finished_at"].to_numpy(dtype="datetime64[ns]")
+    max_time_np = pd.Timedelta(max_time).to_timedelta64()
+    has_origin = user_trip_df["origin_staypoint_id"].notna().to_numpy()
+    has_destination = user_trip_df["destination_staypoint_id"].notna().to_numpy()
+
+    if location_ids is not None:
+        # trips are connected if the staypoints share the same location, missing locations (-1) never match
+        origin_loc = user_trip_df["origin_loc"].to_numpy()
+        destination_loc = user_trip_df["destination_loc"].to_numpy()
+
+        def _is_connected(dest, orig):
+            """Check if trip(s) `dest` end at the location where trip(s) `orig` start."""
+            return (destination_loc[dest] != -1) & (destination_loc[dest] == origin_loc[orig])
+
+    else:
+        # trips are connected if the end point and the start point are less or equal than max_dist apart
+        geoms = user_trip_df[geom_col].to_numpy()
+        origin_geom = shapely.get_geometry(geoms, 0)
+        destination_geom = shapely.get_geometry(geoms, 1)
+        origin_x, origin_y = shapely.get_x(origin_geom), shapely.get_y(origin_geom)
+        destination_x, destination_y = shapely.get_x(destination_geom), shapely.get_y(destination_geom)
+
+        def _is_connected(dest, orig):
+            """Check if trip(s) `dest` end at most max_dist from where trip(s) `orig` start."""
+            if crs_is_projected:
+                dist = shapely.distance(destination_geom[dest], origin_geom[orig])
+            else:
+                dist = ti.geogr.point_haversine_dist(
+                    destination_x[dest], destination_y[dest], origin_x[orig], origin_y[orig]
+                )
+            return dist <= max_dist
+
+    # Check if there is a spatial gap between the previous and current trip for all trips at once
+    pos = np.arange(len(user_trip_df))
+    connected_to_previous = np.zeros(len(user_trip_df), dtype=bool)
+    connected_to_previous[1:] = _is_connected(pos[:-1], pos[1:])
+
+    # save only the trip position in the start candidates, gaps are marked with -1
     start_candidates = []
 
     # collect tours
     tours = []
     # Iterate over trips
-    for _, row in user_trip_df.iterrows():
-        end_time = row["finished_at"]
-
-        if len(start_candidates) > 0:
-            # Check if there is a spatial gap between the previous and current trip:
-            # If staypoints with locations are available, check whether they share the same location
-            if staypoints is not None:
-                end_start_at_same_loc = _check_same_loc(
-                    user_trip_df.loc[start_candidates[-1], "destination_staypoint_id"],  # dest. stp of previous trip
-                    row["origin_staypoint_id"],  # start stp of current trip
-                    staypoints,
-                )
+    for i in range(len(user_trip_df)):
+        end_time = finished_at[i]
+
+        # if the current trip does not start at the end of the previous trip, there is a gap
+        if len(start_candidates) > 0 and not connected_to_previous[i]:
+            # the previous candidate is always the previous trip, as the candidate list is never empty otherwise
+            # option 1: no gaps allowed - start search again
+            if max_nr_gaps == 0:
+                start_candidates = [i]
+                continue
+            # option 2: gaps allowed - search further
             else:
-                # If no locations are available, check whether the distance is smaller than max_dist
-                end_start_at_same_loc = _check_max_dist(
-                    user_trip_df.loc[start_candidates[-1], geom_col].geoms[1],  # destination point of previous trip
-                    row[geom_col].geoms[0],  # start point of current trip
-                    max_dist,
-                    crs_is_projected,
-                )
-
-            # if the current trip does not start at the end of the previous trip, there is a gap
-            if not end_start_at_same_loc:
-                # option 1: no gaps allowed - start search again
-                if max_nr_gaps == 0:
-                    start_candidates = [row.name]
-                    continue
-                # option 2: gaps allowed - search further
-                else:
-                    start_candidates.append(np.nan)
+                start_candidates.append(-1)
 
         # Add this point as a candidate
-        start_candidates.append(row.name)
+        start_candidates.append(i)
 
         # Check whether endpoint would be an unknown activity
-        if pd.isna(row["destination_staypoint_id"]):
+        if not has_destination[i]:
             continue
 
         # keep a list of which candidates to remove (because of time frame)
@@ -290,7 +329,7 @@ def _generate_tours_user(
         # check for all candidates whether they form a tour with the current trip
         for j, cand in enumerate(start_candidates[::-1]):
             # gap
-            if np.isnan(cand):
+            if cand == -1:
                 gap_counter += 1
                 if gap_counter > max_nr_gaps:
                     # these gaps won't vanish, so we can crop the candidate list here
@@ -300,37 +339,21 @@ def _generate_tours_user(
                     continue
 
             # check time difference - if time too long, we can remove the candidate
-            cand_start_time = user_trip_df.loc[cand, "started_at"]
-            if end_time - cand_start_time > max_time:
+            if end_time - started_at[cand] > max_time_np:
                 new_list_start = len(start_candidates) - j - 1
                 break
 
             # check whether the start-end candidate of a tour is an unknown activity
-            if pd.isna(user_trip_df.loc[cand, "origin_staypoint_id"]):
+            if not has_origin[cand]:
                 continue
 
             # check if endpoint of trip = start location of cand
-            if staypoints is not None:
-                end_start_at_same_loc = _check_same_loc(
-                    user_trip_df.loc[cand, "origin_staypoint_id"],  # start stp of first trip
-                    row["destination_staypoint_id"],  # destination stp of current trip
-                    staypoints,
-                )
-            else:
-                # if no locations are available, check whether the distance is smaller than max_dist
-                end_start_at_same_loc = _check_max_dist(
-                    user_trip_df.loc[cand, geom_col].geoms[0],  # start point of first trip
-                    row[geom_col].geoms[1],  # destination point of current trip
-                    max_dist,
-                    crs_is_projected=crs_is_projected,
-                )
-
-            if end_start_at_same_loc:
+            if _is_connected(i, cand):
                 # Tour found!
                 # collect the trips on the tour in a list
-                non_gap_trip_idxs = [c for c in start_candidates[-j - 1 :] if ~np.isnan(c)]
-                tour_candidate = user_trip_df[user_trip_df.index.isin(non_gap_trip_idxs)]
-                tours.append(_create_tour_from_stack(tour_candidate, staypoints, max_time))
+                non_gap_trip_pos = [c for c in start_candidates[-j - 1 :] if c != -1]
+                tour_candidate = user_trip_df.iloc[non_gap_trip_pos]
+                tours.append(_create_tour_from_stack(tour_candidate, location_ids, max_time))
 
                 # do not consider the other trips - one trip cannot close two tours at a time
                 break
@@ -355,52 +378,7 @@ def _generate_tours_user(
     return tours_df
 
 
-def _check_same_loc(stp1, stp2, staypoints):
-    """Check whether two staypoints are at the same location
-
-    Parameters
-    ----------
-    stp1 : int
-        First staypoint id
-    stp2 : int
-        Second staypoint id
-    staypoints : Trackintel staypoints
-        GeoDataFrame with staypoints and also location ids
-
-    Returns
-    -------
-    share_location, bool
-        If True, stp1 and stp2 are at the same location
-    """
-    if pd.isna(stp1) or pd.isna(stp2):
-        return False
-    share_location = staypoints.loc[stp1, "location_id"] == staypoints.loc[stp2, "location_id"]
-    return share_location
-
-
-def _check_max_dist(p1, p2, max_dist, crs_is_projected=False):
-    """
-    Check whether two points p1, p2 are less or equal than max_dist apart
-
-    Parameters
-    --------
-    p1, p2: shapely Point objects
-    max_dist: int
-
-    Returns
-    ------
-    dist_below_thresh: bool
-        indicating whether p1 and p2 are less than max_dist apart
-    """
-    if crs_is_projected:
-        dist = p1.distance(p2)
-    else:
-        dist = ti.geogr.point_haversine_dist(p1.x, p1.y, p2.x, p2.y)
-    dist_below_thresh = dist <= max_dist
-    return dist_below_thresh
-
-
-def _create_tour_from_stack(temp_tour_stack, staypoints, max_time):
+def _create_tour_from_stack(temp_tour_stack, location_ids, max_time):
     """
     Aggregate information of tour elements in a structured dictionary.
 
@@ -410,6 +388,9 @@ def _create_tour_from_stack(temp_tour_stack, staypoints, max_time):
         list of dictionary like elements (either pandas series or python dictionary).
         Contains all trips that will be aggregated into a tour
 
+    location_ids : pd.Index or None
+        The location ID of every location code in the columns 'origin_loc' and 'destination_loc'.
+
     Returns
     -------
     tour_dict_entry: dictionary
@@ -420,11 +401,10 @@ def _create_tour_from_stack(temp_tour_stack, staypoints, max_time):
     last_trip = temp_tour_stack.iloc[-1]
 
     # get location ID if available:
-    if staypoints is not None:
-        start_loc = staypoints.loc[first_trip["origin_staypoint_id"], "location_id"]
+    if location_ids is not None:
         # double check whether start and end location are the same
-        end_loc = staypoints.loc[last_trip["destination_staypoint_id"], "location_id"]
-        assert start_loc == end_loc
+        assert first_trip["origin_loc"] == last_trip["destination_loc"]
+        start_loc = location_ids[first_trip["origin_loc"]]
     else:
         # set location to NaN since not available
         start_loc = pd.NA
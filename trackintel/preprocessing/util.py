@@ -84,34 +84,71 @@ def applyParallel(dfGrouped, func, n_jobs, print_progress, **kwargs):
     return pd.concat(df_ls)
 
 
-def _explode_agg(column, agg, orig_df, agg_df):
+def _offset_rows(first, last):
     """
-    Assign new aggrated information back to the original dataframe.
+    Expand groups of contiguous rows given by their offsets into one entry per row.
 
     Parameters
     ----------
-    column : IndexLabel
-        Column(s) to explode. Should be index column of orig_df.
-    agg : IndexLabel
-        Aggregate column to join back to original df.
-    orig_df : pd.DataFrame
-        Original Dataframe without the aggregate column.
-    agg_df : pd.DataFrame
-        Dataframe with the aggregate column.
+    first : np.ndarray
+        Position of the first row of every group.
+    last : np.ndarray
+        Position of the last row of every group (inclusive).
 
     Returns
     -------
-    pd.DataFrame
-        Original Dataframe with additional colum from aggregated DataFrame.
+    group : np.ndarray
+        Position of the group of every covered row.
+    rows : np.ndarray
+        Position of every covered row.
+
+    Examples
+    --------
+    >>> _offset_rows(np.array([0, 5]), np.array([2, 6]))
+    (array([0, 0, 0, 1, 1]), array([0, 1, 2, 5, 6]))
     """
-    temp = agg_df.explode(column)
-    temp = temp[temp[column].notna()]
-    temp.index = temp[column]
+    lengths = last - first + 1
+    group = np.repeat(np.arange(len(first)), lengths)
+    rows = np.arange(lengths.sum()) + np.repeat(first - np.cumsum(lengths) + lengths, lengths)
+    return group, rows
 
-    return_df = orig_df.join(temp[agg], how="left")
-    # ensure index dtype the same as input
-    return_df.index = return_df.index.astype(orig_df.index.dtype)
-    return return_df
+
+def _union_find(n, a, b):
+    """
+    Find the connected components of a graph with a vectorized union-find.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes.
+    a, b : np.ndarray
+        Nodes of every edge.
+
+    Returns
+    -------
+    np.ndarray
+        Smallest node of the component of every node.
+
+    Examples
+    --------
+    >>> _union_find(5, np.array([4, 1]), np.array([1, 3]))
+    array([0, 1, 2, 1, 1])
+    """
+    parent = np.arange(n)
+    a, b = np.asarray(a, dtype=parent.dtype), np.asarray(b, dtype=parent.dtype)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        merge = root_a != root_b
+        if not merge.any():
+            return parent
+        # union: hook the larger root below the smaller one -> roots are always the smallest node
+        np.minimum.at(parent, np.maximum(root_a[merge], root_b[merge]), np.minimum(root_a[merge], root_b[merge]))
+        # find: full path compression
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
 
 
 def angle_centroid_multipoints(geometry):
@@ -128,16 +165,44 @@ def angle_centroid_multipoints(geometry):
         Centroid of geometries (shapely.Point)
     """
     g, index = shapely.get_coordinates(geometry, return_index=True)
-    # number of coordinate pairs per MultiPoint
+    x, y = grouped_centroid(g[:, 0], g[:, 1], index)
+    # shapely Geometry has no crs information
+    crs = None if isinstance(geometry, BaseGeometry) else geometry.crs
+    return gpd.points_from_xy(x, y, crs=crs)
+
+
+def grouped_centroid(x, y, index, planar=False):
+    """Calculate the centroid of groups of coordinates in one pass.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        x coordinates (longitudes if not planar).
+    y : np.ndarray
+        y coordinates (latitudes if not planar).
+    index : np.ndarray
+        Group of every coordinate pair as integers in [0, number of groups).
+    planar : bool, default False
+        If False, the mean of x is calculated as mean of angles to handle the wrap at [-180, +180].
+
+    Returns
+    -------
+    x, y : np.ndarray
+        Centroid coordinates per group.
+
+    Examples
+    --------
+    >>> x, y = grouped_centroid(np.array([179., -179., 8.]), np.array([0., 0., 47.]), np.array([0, 0, 1]))
+    """
+    # number of coordinate pairs per group
     count = np.bincount(index)
-    x, y = g[:, 0], g[:, 1]
     # calculate mean of y Coordinates -> no wrapping
     y = np.bincount(index, weights=y) / count
+    if planar:
+        return np.bincount(index, weights=x) / count, y
     # calculate mean of x Coordinates with wrapping
     x_rad = np.deg2rad(x)
     x_sin = np.bincount(index, weights=np.sin(x_rad)) / count
     x_cos = np.bincount(index, weights=np.cos(x_rad)) / count
     x = np.rad2deg(np.arctan2(x_sin, x_cos))
-    # shapely Geometry has no crs information
-    crs = None if isinstance(geometry, BaseGeometry) else geometry.crs
-    return gpd.points_from_xy(x, y, crs=crs)
+    return x, y